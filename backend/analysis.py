@@ -1,91 +1,167 @@
 # backend/analysis.py
+#
+# The local pandas analysis behind /insights/deep-dive/: Level 1 KPIs, Level 2
+# operational figures and Level 3 signals for every business x function group.
+#
+#   ANALYSIS_ENGINE=vectorized  (default) every group at once: one groupby().agg, least
+#                               squares slopes and p-values from grouped sums, z-scores
+#                               via transform, and the summaries joined in one merge
+#   ANALYSIS_ENGINE=loop        the original per-group loop (linregress/zscore per group)
+#
+# Both engines return the same results (tests/test_analysis_engines.py checks it,
+# bench_analysis.py times them). The string columns may be categorical
+# (analytics.load_frames_from_sql), hence observed=True.
+# Either engine can also run spread over several processes (ANALYSIS_PROCESSES, see
+# analysis_pool.py).
+
+import os
 
 import pandas as pd
 import numpy as np
-from scipy.stats import linregress, zscore
+from scipy.stats import linregress, zscore, t as t_distribution
 from datetime import datetime
 
-def generate_deep_insights(hirings_df: pd.DataFrame, summaries_df: pd.DataFrame) -> list:
+import analysis_pool
+
+ENGINE = os.getenv("ANALYSIS_ENGINE", "vectorized").lower()
+
+GROUP_KEYS = ["business_group", "function"]
+
+# linregress's guard against dividing by zero for perfectly correlated data.
+_TINY = 1.0e-20
+
+
+def _group_result(biz, func, *, hires, time_to_fill, cost_per_hire, build_ratio, ijp_rate, div_ratio,
+                  top_sources, top_source_costly, gap, hiring_months, ttf_trend, costliest_source,
+                  cost_outliers) -> dict:
+    """Formats one group's figures into the Level 1/2/3 texts (and keeps them raw, too)."""
+    # NumPy rounds halfway cases differently from round() on a Python float; the texts
+    # have always used NumPy's.
+    time_to_fill, cost_per_hire = np.float64(time_to_fill), np.float64(cost_per_hire)
+
+    # ---------------- LEVEL 1 ----------------
+    level1 = {
+        "Total Hires": hires,
+        "Avg Time to Fill": round(time_to_fill, 1),
+        "Avg Cost/Hire": round(cost_per_hire, 1),
+        "Build %": f"{build_ratio:.1%}",
+        "IJP %": f"{ijp_rate:.1%}",
+        "Diversity %": f"{div_ratio:.1%}",
+        "Top Sources": ", ".join(top_sources)
+    }
+
+    # ---------------- LEVEL 2 ----------------
+    coverage = hires / (gap + 1) if gap is not None and (gap + 1) != 0 else None
+    stagnant_months = 12 - hiring_months
+    cost_efficiency = (
+        "⚠️ Top source has high cost"
+        if top_source_costly
+        else "✅ Top source is cost-efficient"
+    )
+    level2 = {
+        "Headcount Gap": gap if gap is not None else "N/A",
+        "Coverage %": round(coverage * 100, 1) if coverage is not None else "N/A",
+        "Hiring Months": hiring_months,
+        "Stagnant Months": stagnant_months,
+        "Top Source Cost-Efficiency": cost_efficiency,
+    }
+
+    # ---------------- LEVEL 3 ----------------
+    level3 = []
+    if ttf_trend is not None:
+        slope, p = np.float64(ttf_trend[0]), np.float64(ttf_trend[1])
+        if p < 0.05 and slope > 0:
+            level3.append(f"📈 Time to Fill rising by {round(slope, 2)} days/month (p={round(p, 4)})")
+    if costliest_source is not None:
+        level3.append(f"💸 Source '{costliest_source[0]}' has high cost (₹{costliest_source[1]}) and diversity: {costliest_source[2]:.1%}")
+    if cost_outliers:
+        level3.append(f"💣 {cost_outliers} cost outlier(s) detected (Z > 2)")
+    if build_ratio < 0.25 or build_ratio > 0.75:
+        level3.append(f"🔀 Build/Buy imbalance: {build_ratio:.1%}")
+    if div_ratio < 0.15 or div_ratio > 0.85:
+        level3.append(f"🧬 Diversity outlier: {div_ratio:.1%}")
+    # The flags that mark the group as notable (the costliest source is always reported).
+    signals = [flag for flag in level3 if not flag.startswith("💸")]
+
+    return {
+        "Business": biz, "Function": func,
+        "Level_1_KPIs": "\n".join([f"{k}: {v}" for k, v in level1.items()]),
+        "Level_2_Operational": "\n".join([f"{k}: {v}" for k, v in level2.items()]),
+        "Level_3_Deep_Insights": "\n".join(level3) if level3 else "No deep signals",
+        # The same figures unformatted, for the compact prompt (deep_dive_prompt.py).
+        "Metrics": {
+            "hires": hires,
+            "time_to_fill": float(time_to_fill),
+            "cost_per_hire": float(cost_per_hire),
+            "build_rate": float(build_ratio),
+            "ijp_rate": float(ijp_rate),
+            "diversity_rate": float(div_ratio),
+            "gap": float(gap) if gap is not None else None,
+            "coverage": float(coverage) if coverage is not None else None,
+            "stagnant_months": int(stagnant_months),
+            "cost_outliers": cost_outliers,
+            "top_sources": list(top_sources),
+            "costliest_source": costliest_source,
+        },
+        "Signals": signals,
+    }
+
+
+def deep_insights_loop(hirings_df: pd.DataFrame, summaries_df: pd.DataFrame) -> list:
     """
-    Takes pre-filtered DataFrames and performs the deep analysis,
+    Takes pre-filtered DataFrames and performs the deep analysis group by group,
     returning a list of insight dictionaries.
     """
-    # This function contains the exact analysis logic from your script,
-    # but it operates on the DataFrames passed to it as arguments.
-
     if hirings_df.empty:
         return []
 
     results = []
-    
+
     # Loop over the pre-filtered data
-    for (biz, func), df in hirings_df.groupby(["business_group", "function"]):
+    for (biz, func), df in hirings_df.groupby(GROUP_KEYS, observed=True):
         try:
             df = df.copy()
             summary = summaries_df[(summaries_df["business_group"] == biz) & (summaries_df["function"] == func)]
 
-            # ---------------- LEVEL 1 ----------------
-            level1 = {
-                "Total Hires": len(df),
-                "Avg Time to Fill": round(df["time_to_fill"].mean(), 1),
-                "Avg Cost/Hire": round(df["cost_per_hire"].mean(), 1),
-                "Build %": f"{(df['build_buy_ratio'] == 'Build').mean():.1%}",
-                "IJP %": f"{df['ijp_adherence'].mean():.1%}",
-                "Diversity %": f"{df['diversity_ratio'].mean():.1%}",
-                "Top Sources": ", ".join(df["source"].value_counts().head(2).index.tolist())
-            }
-
-            # ---------------- LEVEL 2 ----------------
-            hires = len(df)
-            gap = summary["gap"].values[0] if not summary.empty else None
-            coverage = hires / (gap + 1) if gap is not None and (gap + 1) != 0 else None
-            monthly_hires = df["hire_date"].dt.month.value_counts().sort_index()
-            stagnant_months = 12 - monthly_hires.count()
-            avg_cost_by_source = df.groupby("source")["cost_per_hire"].mean()
-            top_source = df["source"].value_counts().idxmax()
-            cost_efficiency = (
-                "⚠️ Top source has high cost"
-                if avg_cost_by_source[top_source] > df["cost_per_hire"].mean()
-                else "✅ Top source is cost-efficient"
-            )
-            level2 = {
-                "Headcount Gap": gap if gap is not None else "N/A",
-                "Coverage %": round(coverage * 100, 1) if coverage is not None else "N/A",
-                "Hiring Months": monthly_hires.count(),
-                "Stagnant Months": stagnant_months,
-                "Top Source Cost-Efficiency": cost_efficiency,
-            }
-
-            # ---------------- LEVEL 3 ----------------
-            level3 = []
+            source_counts = df["source"].value_counts()
+            source_counts = source_counts[source_counts > 0]  # categorical columns count unused sources, too
+            avg_cost_by_source = df.groupby("source", observed=True)["cost_per_hire"].mean()
+            # Groups whose every source is NULL have no top or costliest source.
+            top_source = source_counts.idxmax() if not source_counts.empty else None
+
+            ttf_trend = None
             df["days"] = (df["hire_date"] - df["hire_date"].min()).dt.days
             if df["days"].nunique() > 10 and df['time_to_fill'].nunique() > 1:
                 slope, _, _, p, _ = linregress(df["days"], df["time_to_fill"])
-                if p < 0.05 and slope > 0:
-                    level3.append(f"📈 Time to Fill rising by {round(slope, 2)} days/month (p={round(p, 4)})")
-            if not df.empty:
-                roi = df.groupby("source").agg({ "cost_per_hire": "mean", "time_to_fill": "mean", "diversity_ratio": "mean" }).sort_values(by="cost_per_hire", ascending=False)
-                worst = roi.head(1)
-                if not worst.empty:
-                    level3.append(f"💸 Source '{worst.index[0]}' has high cost (₹{int(worst['cost_per_hire'].values[0])}) and diversity: {worst['diversity_ratio'].values[0]:.1%}")
+                ttf_trend = (slope, p)
+
+            costliest_source = None
+            roi = df.groupby("source", observed=True).agg({ "cost_per_hire": "mean", "time_to_fill": "mean", "diversity_ratio": "mean" }).sort_values(by="cost_per_hire", ascending=False)
+            worst = roi.dropna(subset=["cost_per_hire"]).head(1)
+            if not worst.empty:
+                costliest_source = (worst.index[0], int(worst['cost_per_hire'].values[0]), float(worst['diversity_ratio'].values[0]))
+
+            cost_outliers = 0
             if len(df) > 10 and df['cost_per_hire'].nunique() > 1:
                 df["cost_z"] = zscore(df["cost_per_hire"])
-                extreme = df[df["cost_z"] > 2]
-                if not extreme.empty:
-                    level3.append(f"💣 {len(extreme)} cost outlier(s) detected (Z > 2)")
-            build_ratio = (df["build_buy_ratio"] == "Build").mean()
-            if build_ratio < 0.25 or build_ratio > 0.75:
-                level3.append(f"🔀 Build/Buy imbalance: {build_ratio:.1%}")
-            div_ratio = df["diversity_ratio"].mean()
-            if div_ratio < 0.15 or div_ratio > 0.85:
-                level3.append(f"🧬 Diversity outlier: {div_ratio:.1%}")
+                cost_outliers = len(df[df["cost_z"] > 2])
 
-            results.append({
-                "Business": biz, "Function": func,
-                "Level_1_KPIs": "\n".join([f"{k}: {v}" for k, v in level1.items()]),
-                "Level_2_Operational": "\n".join([f"{k}: {v}" for k, v in level2.items()]),
-                "Level_3_Deep_Insights": "\n".join(level3) if level3 else "No deep signals"
-            })
+            results.append(_group_result(
+                biz, func,
+                hires=len(df),
+                time_to_fill=df["time_to_fill"].mean(),
+                cost_per_hire=df["cost_per_hire"].mean(),
+                build_ratio=(df["build_buy_ratio"] == "Build").mean(),
+                ijp_rate=df["ijp_adherence"].mean(),
+                div_ratio=df["diversity_ratio"].mean(),
+                top_sources=source_counts.head(2).index.tolist(),
+                top_source_costly=top_source is not None and avg_cost_by_source[top_source] > df["cost_per_hire"].mean(),
+                gap=summary["gap"].values[0] if not summary.empty else None,
+                hiring_months=df["hire_date"].dt.month.value_counts().count(),
+                ttf_trend=ttf_trend,
+                costliest_source=costliest_source,
+                cost_outliers=cost_outliers,
+            ))
         except Exception as e:
             # If a group fails, we can add a record to show the error
             results.append({
@@ -95,4 +171,131 @@ def generate_deep_insights(hirings_df: pd.DataFrame, summaries_df: pd.DataFrame)
                 "Level_3_Deep_Insights": "Skipping due to error."
             })
 
-    return results
\ No newline at end of file
+    return results
+
+
+def deep_insights_vectorized(hirings_df: pd.DataFrame, summaries_df: pd.DataFrame) -> list:
+    """deep_insights_loop() computed for all groups at once."""
+    if hirings_df.empty:
+        return []
+
+    df = hirings_df[GROUP_KEYS + ["hire_date", "time_to_fill", "cost_per_hire", "ijp_adherence",
+                                  "diversity_ratio", "build_buy_ratio", "source"]].dropna(subset=GROUP_KEYS)
+    df = df.assign(
+        is_build=df["build_buy_ratio"] == "Build",
+        month=df["hire_date"].dt.month,
+    )
+    grouped = df.groupby(GROUP_KEYS, observed=True)
+    df["days"] = (df["hire_date"] - grouped["hire_date"].transform("min")).dt.days.astype(float)
+
+    # Least squares of time_to_fill over days per group, from centred grouped sums
+    # (the same population moments linregress gets from np.cov(bias=1)).
+    dx = df["days"] - grouped["days"].transform("mean")
+    dy = df["time_to_fill"] - grouped["time_to_fill"].transform("mean")
+    # z-scores of the cost within each group (ddof=0, like scipy's zscore).
+    cost_z = (df["cost_per_hire"] - grouped["cost_per_hire"].transform("mean")) / grouped["cost_per_hire"].transform("std", ddof=0)
+    df = df.assign(sxx=dx * dx, sxy=dx * dy, syy=dy * dy, cost_outlier=cost_z > 2)
+
+    stats = df.groupby(GROUP_KEYS, observed=True).agg(
+        hires=("time_to_fill", "size"),
+        time_to_fill=("time_to_fill", "mean"),
+        cost_per_hire=("cost_per_hire", "mean"),
+        build_ratio=("is_build", "mean"),
+        ijp_rate=("ijp_adherence", "mean"),
+        div_ratio=("diversity_ratio", "mean"),
+        hiring_months=("month", "nunique"),
+        distinct_days=("days", "nunique"),
+        distinct_ttf=("time_to_fill", "nunique"),
+        distinct_costs=("cost_per_hire", "nunique"),
+        cost_outliers=("cost_outlier", "sum"),
+        sxx=("sxx", "mean"),
+        sxy=("sxy", "mean"),
+        syy=("syy", "mean"),
+    )
+
+    r = (stats["sxy"] / np.sqrt(stats["sxx"] * stats["syy"])).clip(-1.0, 1.0)
+    dof = stats["hires"] - 2
+    t_stat = r * np.sqrt(dof / ((1.0 - r + _TINY) * (1.0 + r + _TINY)))
+    stats = stats.assign(
+        slope=stats["sxy"] / stats["sxx"],
+        p_value=2 * t_distribution.sf(np.abs(t_stat), dof),
+        has_trend=(stats["distinct_days"] > 10) & (stats["distinct_ttf"] > 1),
+        counts_outliers=(stats["hires"] > 10) & (stats["distinct_costs"] > 1),
+    )
+
+    # Per source: how often it was used (the top two), and what it cost. Equally used
+    # sources rank as value_counts() ranks them in the loop: by category order for
+    # categorical columns, else by first appearance in the group.
+    source_order = df["source"].cat.codes if isinstance(df["source"].dtype, pd.CategoricalDtype) else np.arange(len(df))
+    by_source = df.assign(source_order=source_order).groupby(GROUP_KEYS + ["source"], observed=True).agg(
+        uses=("source", "size"),
+        source_order=("source_order", "min"),
+        source_cost=("cost_per_hire", "mean"),
+        source_div=("diversity_ratio", "mean"),
+    )
+    ranked = by_source.sort_values(["uses", "source_order"], ascending=[False, True], kind="stable")
+    top_sources = (
+        ranked.groupby(GROUP_KEYS, observed=True).head(2)
+        .reset_index("source")["source"].astype(object)
+        .groupby(GROUP_KEYS, observed=True).agg(list)
+        .rename("top_sources")
+    )
+    # Sources without a known cost can't be the costliest; groups with no such source get none.
+    priced = by_source.dropna(subset=["source_cost"])
+    costliest = (
+        priced.loc[priced.groupby(GROUP_KEYS, observed=True)["source_cost"].idxmax(), ["source_cost", "source_div"]]
+        .reset_index("source")
+        .rename(columns={"source": "costliest_source"})
+    )
+    top_source_cost = (
+        ranked.groupby(GROUP_KEYS, observed=True).head(1)["source_cost"]
+        .droplevel("source")
+        .rename("top_source_cost")
+    )
+    stats = stats.join([top_sources, costliest, top_source_cost]).reset_index()
+
+    summaries = summaries_df[GROUP_KEYS + ["gap"]].drop_duplicates(GROUP_KEYS)
+    stats = stats.merge(summaries, on=GROUP_KEYS, how="left", indicator=True)
+    gap_type = summaries_df["gap"].dtype.type
+
+    results = []
+    for row in stats.to_dict("records"):
+        results.append(_group_result(
+            row["business_group"], row["function"],
+            hires=int(row["hires"]),
+            time_to_fill=row["time_to_fill"],
+            cost_per_hire=row["cost_per_hire"],
+            build_ratio=row["build_ratio"],
+            ijp_rate=row["ijp_rate"],
+            div_ratio=row["div_ratio"],
+            top_sources=row["top_sources"] if isinstance(row["top_sources"], list) else [],
+            top_source_costly=bool(row["top_source_cost"] > row["cost_per_hire"]),
+            gap=gap_type(row["gap"]) if row["_merge"] == "both" else None,
+            hiring_months=int(row["hiring_months"]),
+            ttf_trend=(row["slope"], row["p_value"]) if row["has_trend"] else None,
+            costliest_source=(
+                (row["costliest_source"], int(row["source_cost"]), float(row["source_div"]))
+                if pd.notna(row["source_cost"]) else None
+            ),
+            cost_outliers=int(row["cost_outliers"]) if row["counts_outliers"] else 0,
+        ))
+    return results
+
+
+ENGINES = {
+    "loop": deep_insights_loop,
+    "vectorized": deep_insights_vectorized,
+}
+
+if ENGINE not in ENGINES:
+    raise ValueError(f"Unknown ANALYSIS_ENGINE '{ENGINE}'. Choose from: {', '.join(ENGINES)}.")
+
+
+def generate_deep_insights(hirings_df: pd.DataFrame, summaries_df: pd.DataFrame) -> list:
+    """
+    Takes pre-filtered DataFrames and performs the deep analysis with the configured
+    engine, returning a list of insight dictionaries.
+    """
+    if analysis_pool.is_enabled():
+        return analysis_pool.generate_deep_insights(hirings_df, summaries_df, ENGINE)
+    return ENGINES[ENGINE](hirings_df, summaries_df)
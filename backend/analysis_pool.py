@@ -0,0 +1,152 @@
+# backend/analysis_pool.py
+#
+# Runs the deep-dive analysis (analysis.py) on several cores. The hirings are sorted
+# by business x function group and written once, as an Arrow IPC stream, into a
+# shared memory block; each task names a contiguous run of groups (a row range) and
+# a worker of a persistent ProcessPoolExecutor maps the block, slices out its rows
+# without copying them and runs the configured engine on them. Only the block's
+# name, the row range and the small summaries frame are pickled per task.
+#
+# Groups are independent, so concatenating the partitions' results in group order
+# gives exactly the serial output. Small inputs run serially: below
+# ANALYSIS_PARALLEL_MIN_ROWS the handoff costs more than it saves.
+#
+#   ANALYSIS_PROCESSES=0                0 = off (serial); N = worker processes
+#   ANALYSIS_PARALLEL_MIN_ROWS=200000
+#
+# Workers are spawned (not forked: the server has threads) at app startup or on first
+# use, once per server process. Needs pyarrow; without it, runs serially.
+
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+import pandas as pd
+
+import analysis
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is only needed for the parallel mode
+    pa = None
+
+AVAILABLE = pa is not None
+
+PROCESSES = int(os.getenv("ANALYSIS_PROCESSES", "0"))
+MIN_ROWS = int(os.getenv("ANALYSIS_PARALLEL_MIN_ROWS", "200000"))
+
+# Tasks per worker: more, smaller partitions even out groups of different sizes.
+PARTITIONS_PER_PROCESS = 2
+
+_pool = None
+_pool_pid = None
+_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    return PROCESSES > 0 and AVAILABLE
+
+
+def _executor() -> ProcessPoolExecutor:
+    """The process-wide pool (a forked gunicorn worker starts its own)."""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ProcessPoolExecutor(max_workers=PROCESSES, mp_context=get_context("spawn"))
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+def start():
+    """Spawns the workers now (they import pandas and scipy), so no request waits for that."""
+    if is_enabled():
+        pool = _executor()
+        for future in [pool.submit(_ready) for _ in range(PROCESSES)]:
+            future.result()
+
+
+@atexit.register
+def shutdown():
+    global _pool
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.shutdown(cancel_futures=True)
+    _pool = None
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Maps a block the parent owns (and unlinks)."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        # Pool workers share the parent's resource tracker, which already knows the block.
+        return shared_memory.SharedMemory(name=name)
+
+
+def _analyse_partition(engine: str, block_name: str, size: int, start: int, stop: int,
+                       summaries_df: pd.DataFrame) -> list:
+    """Worker side: the analysis of rows [start, stop) of the shared hirings."""
+    block = _attach(block_name)
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(block.buf[:size])).read_all()
+        hirings_df = table.slice(start, stop - start).to_pandas()
+        del table  # its buffers point into the block, which is closed below
+        return analysis.ENGINES[engine](hirings_df, summaries_df)
+    finally:
+        hirings_df = None
+        block.close()
+
+
+def _partitions(group_sizes: np.ndarray, count: int) -> list:
+    """Splits the groups (in order) into up to `count` row ranges of similar size."""
+    ends = np.cumsum(group_sizes)
+    targets = ends[-1] * np.arange(1, count) / count
+    # Cut after the group whose end is nearest each target, never inside a group.
+    cuts = sorted(set(int(ends[np.abs(ends - target).argmin()]) for target in targets) - {int(ends[-1])})
+    bounds = [0] + cuts + [int(ends[-1])]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def generate_deep_insights(hirings_df: pd.DataFrame, summaries_df: pd.DataFrame, engine: str) -> list:
+    """analysis.ENGINES[engine] spread over the pool, or run serially for small inputs."""
+    run_serially = analysis.ENGINES[engine]
+    if len(hirings_df) < MIN_ROWS:
+        return run_serially(hirings_df, summaries_df)
+
+    group_numbers = hirings_df.groupby(analysis.GROUP_KEYS, observed=True, sort=True).ngroup().to_numpy()
+    group_sizes = np.bincount(group_numbers[group_numbers >= 0])
+    if len(group_sizes) < 2:
+        return run_serially(hirings_df, summaries_df)
+    # Rows without a business group or function belong to no group; drop them like groupby does.
+    order = np.argsort(group_numbers, kind="stable")[np.count_nonzero(group_numbers < 0):]
+    ordered = hirings_df.iloc[order]
+
+    table = pa.Table.from_pandas(ordered, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    stream = sink.getvalue()
+    del table, ordered
+
+    block = shared_memory.SharedMemory(create=True, size=stream.size)
+    try:
+        block.buf[:stream.size] = memoryview(stream).cast("B")
+        pool = _executor()
+        futures = [
+            pool.submit(_analyse_partition, engine, block.name, stream.size, start, stop, summaries_df)
+            for start, stop in _partitions(group_sizes, PROCESSES * PARTITIONS_PER_PROCESS)
+        ]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+    finally:
+        block.close()
+        block.unlink()
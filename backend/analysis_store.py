@@ -0,0 +1,89 @@
+# backend/analysis_store.py
+#
+# Stored deep-dive analysis results (analysis.generate_deep_insights) in the
+# analysis_results table, one row per filter slice and data version. The insight
+# warm-up (warmup.py) analyses every slice once per data load and stores the result;
+# the deep-dive endpoints then only read it, and fall back to loading and analysing
+# the data themselves for slices or date ranges that were not warmed. Rows of older
+# data versions are deleted whenever a newer result is stored.
+#
+# Results go through JSON either way (see normalize), so a stored and a freshly
+# computed result build the same prompt and share the LLM cache entry.
+#
+#   ANALYSIS_STORE_ENABLED=false     always analyse on request
+
+import hashlib
+import json
+import os
+import time
+from datetime import date
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm import Session
+
+import models
+from database import READ_ONLY, SessionLocal
+
+ENABLED = os.getenv("ANALYSIS_STORE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+_R = models.AnalysisResult
+
+
+def _plain(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _encode(results: list) -> str:
+    return json.dumps(results, ensure_ascii=False, default=_plain)
+
+
+def normalize(results: list) -> list:
+    """The results as they read back from the store: NumPy scalars as Python ones, tuples as lists."""
+    return json.loads(_encode(results))
+
+
+def slice_key(version: int, business_group, function, start_date, end_date) -> str:
+    """The key of one slice's result; '' and None filters share it, as in cache.py."""
+    filters = [
+        (value.strip() or None) if isinstance(value, str) else value
+        for value in (business_group, function)
+    ]
+    dates = [value.isoformat() if isinstance(value, date) else None for value in (start_date, end_date)]
+    payload = json.dumps([version, *filters, *dates])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get(db: Session, version: int, business_group, function, start_date, end_date) -> list | None:
+    """The stored analysis of this slice at `version`, or None."""
+    if not ENABLED:
+        return None
+    key = slice_key(version, business_group, function, start_date, end_date)
+    try:
+        stored = db.execute(select(_R.result).where(_R.key == key)).scalar()
+    except DBAPIError:
+        # A read-only snapshot taken before the table existed.
+        return None
+    return json.loads(stored) if stored is not None else None
+
+
+def put(version: int, business_group, function, start_date, end_date, results: list):
+    """Stores one slice's analysis at `version` and drops results of older versions."""
+    if not ENABLED or READ_ONLY:
+        return
+    key = slice_key(version, business_group, function, start_date, end_date)
+    db = SessionLocal()
+    try:
+        db.execute(delete(_R).where((_R.key == key) | (_R.data_version < version)))
+        db.execute(insert(_R).values(key=key, data_version=version, result=_encode(results), created_at=time.time()))
+        db.commit()
+    except IntegrityError:
+        db.rollback()  # stored concurrently by another worker
+    except DBAPIError as e:
+        db.rollback()
+        print(f"⚠️ Storing the analysis failed: {e}")
+    finally:
+        db.close()
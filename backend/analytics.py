@@ -0,0 +1,213 @@
+# backend/analytics.py
+#
+# Pluggable analytics backends for the read-heavy aggregations: crud.get_kpi_aggregates,
+# the all-KPI drilldown (drilldown_crud) and the data load behind /insights/deep-dive/.
+#
+#   ANALYTICS_BACKEND=sql     (default) every query goes to the row store through SQLAlchemy
+#   ANALYTICS_BACKEND=numpy   in-process NumPy columnar store (columnar.py)
+#   ANALYTICS_BACKEND=duckdb  embedded DuckDB (duckdb_backend.py)
+#
+# A backend is a snapshot object built by `load(db, version)` that provides
+# kpi_aggregates() and drilldown_cube(), and optionally frames() for the insights
+# data. It is loaded at startup (in the gunicorn master when preload_app is on, so
+# forked workers share it copy-on-write) and reloaded whenever the data version
+# (data_version.py) moves past the one it was loaded at; a replaced snapshot's
+# retire() is then called, if it has one.
+#
+# With the sql backend, the insights data is read by load_frames_from_sql: a filtered
+# SELECT of just the columns analysis.py uses, INSIGHTS_LOAD_CHUNK_ROWS rows at a time,
+# into compact dtypes.
+#
+#   INSIGHTS_LOAD_CHUNK_ROWS=50000
+
+import os
+import threading
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+import columnar
+import data_version
+import duckdb_backend
+import models
+from database import open_read_session
+
+BACKENDS = {
+    "numpy": columnar.ColumnarStore.load,
+    "duckdb": duckdb_backend.DuckDBBackend.load,
+}
+
+INSIGHTS_LOAD_CHUNK_ROWS = int(os.getenv("INSIGHTS_LOAD_CHUNK_ROWS", "50000"))
+
+BACKEND = os.getenv("ANALYTICS_BACKEND", "numpy" if columnar.ENABLED else "sql").lower()
+
+if BACKEND != "sql" and BACKEND not in BACKENDS:
+    raise ValueError(f"Unknown ANALYTICS_BACKEND '{BACKEND}'. Choose from: sql, {', '.join(BACKENDS)}.")
+
+
+# === Process-wide snapshot ===
+
+_backend = None
+_lock = threading.Lock()
+
+
+def _is_current(version) -> bool:
+    return _backend is not None and _backend.version == version
+
+
+def _reload(db: Session, version):
+    """Loads the snapshot for `version`. While another thread is loading, the previous one is returned."""
+    global _backend
+    if not _lock.acquire(blocking=_backend is None):
+        data_version.mark_stale()
+        return _backend
+    try:
+        if not _is_current(version):
+            previous, _backend = _backend, BACKENDS[BACKEND](db, version)
+            # Backends holding external resources (DuckDB's connection) release them
+            # once the requests still using the old snapshot are done.
+            if hasattr(previous, "retire"):
+                previous.retire()
+    finally:
+        _lock.release()
+    return _backend
+
+
+def _reload_in_own_session(version):
+    db = open_read_session()
+    try:
+        return _reload(db, version)
+    finally:
+        db.close()
+
+
+def get_backend(db: Session):
+    """The current backend snapshot (reloaded when the data version moved), or None for plain SQL."""
+    if BACKEND == "sql":
+        return None
+    version = data_version.current(db)
+    if _is_current(version):
+        return _backend
+    return _reload(db, version)
+
+
+async def get_backend_async(db):
+    """
+    get_backend for an AsyncSession. A load scans whole tables, so it runs in the
+    threadpool with its own sync session, and requests keep getting the previous
+    snapshot until it is done.
+    """
+    if BACKEND == "sql":
+        return None
+    version = await data_version.current_async(db)
+    if _is_current(version):
+        return _backend
+    if _backend is not None and _lock.locked():
+        data_version.mark_stale()
+        return _backend
+    return await run_in_threadpool(_reload_in_own_session, version)
+
+
+def load_on_startup(session_factory):
+    """Loads the backend up front, so preloaded gunicorn workers inherit it on fork."""
+    if BACKEND == "sql":
+        return
+    db = session_factory()
+    try:
+        get_backend(db)
+        print(f"Analytics backend '{BACKEND}' loaded.")
+    finally:
+        db.close()
+
+
+# === Insights data ===
+
+# The hirings columns analysis.py reads, by the compact dtype they are loaded as.
+CATEGORY_COLUMNS = ("business_group", "function", "build_buy_ratio", "source")
+INT32_COLUMNS = ("time_to_fill", "cost_per_hire")
+BOOL_COLUMNS = ("ijp_adherence", "diversity_ratio")
+ANALYSIS_COLUMNS = CATEGORY_COLUMNS + INT32_COLUMNS + BOOL_COLUMNS + ("hire_date",)
+
+
+def load_frames(db: Session, business_group=None, function=None, start_date=None, end_date=None):
+    """
+    Returns (filtered hirings, business summaries) as DataFrames for the insights
+    analysis. Backends without a frames() method fall back to load_frames_from_sql().
+    """
+    backend = get_backend(db)
+    if backend is not None and hasattr(backend, "frames"):
+        return backend.frames(business_group, function, start_date, end_date)
+    return load_frames_from_sql(db, business_group, function, start_date, end_date)
+
+
+def _insights_filters(table, business_group, function):
+    # Case-insensitive, like the pandas filters this replaced; the lower(...) expression
+    # indexes on the models serve these.
+    filters = []
+    if business_group:
+        filters.append(func.lower(table.c.business_group) == business_group.lower())
+    if function:
+        filters.append(func.lower(table.c.function) == function.lower())
+    return filters
+
+
+def _compact(chunk: pd.DataFrame) -> pd.DataFrame:
+    """One chunk of hirings in compact dtypes (columns with NULLs keep a nullable dtype)."""
+    for name in CATEGORY_COLUMNS:
+        chunk[name] = chunk[name].astype("category")
+    for name in INT32_COLUMNS:
+        if chunk[name].notna().all():
+            chunk[name] = chunk[name].astype("int32")
+    for name in BOOL_COLUMNS:
+        if chunk[name].notna().all():
+            chunk[name] = chunk[name].astype(bool)
+    chunk["hire_date"] = pd.to_datetime(chunk["hire_date"])
+    return chunk
+
+
+def _concat(chunks: list) -> pd.DataFrame:
+    """Joins the chunks, merging their categories instead of falling back to strings."""
+    if len(chunks) == 1:
+        return chunks[0]
+    columns = {}
+    for name in chunks[0].columns:
+        parts = [chunk[name] for chunk in chunks]
+        if name in CATEGORY_COLUMNS:
+            columns[name] = union_categoricals(parts, ignore_order=True)
+        else:
+            columns[name] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def load_frames_from_sql(db: Session, business_group=None, function=None, start_date=None, end_date=None):
+    """
+    The insights inputs straight from SQL: the filters and the column list go into the
+    SELECT, so the work and memory follow the selected slice rather than the table.
+    """
+    h = models.Hiring.__table__
+    query = (
+        select(*[h.c[name] for name in ANALYSIS_COLUMNS])
+        .where(*_insights_filters(h, business_group, function))
+        .execution_options(stream_results=True)  # a server-side cursor where the driver has one
+    )
+    if start_date:
+        query = query.where(h.c.hire_date >= start_date)
+    if end_date:
+        query = query.where(h.c.hire_date <= end_date)
+
+    connection = db.connection()
+    chunks = [
+        _compact(chunk)
+        for chunk in pd.read_sql(query, connection, chunksize=INSIGHTS_LOAD_CHUNK_ROWS)
+    ]
+    hirings_df = _concat(chunks) if chunks else _compact(pd.DataFrame(columns=list(ANALYSIS_COLUMNS)))
+
+    s = models.BusinessSummary.__table__
+    summaries_df = pd.read_sql(
+        select(s.c.business_group, s.c.function, s.c.gap).where(*_insights_filters(s, business_group, function)),
+        connection,
+    )
+    return hirings_df, summaries_df
@@ -0,0 +1,150 @@
+# backend/arrow_export.py
+#
+# Turns batches of plain DB rows into Arrow record batches and writes them out as an
+# Arrow IPC stream or a Parquet file. Low-cardinality text columns are dictionary
+# encoded; their dictionaries only ever grow, so IPC streams send new values as
+# dictionary deltas instead of repeating the whole dictionary per batch.
+#
+# Encoding, compression and the Parquet file I/O are CPU and disk work, so the async
+# writers run each step in the threadpool and the event loop only awaits the chunks.
+
+import os
+import tempfile
+
+from sqlalchemy import Boolean, Date, Integer, String
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed for the columnar exports
+    pa = None
+    pq = None
+
+AVAILABLE = pa is not None
+
+# Compression for both formats; readers from pyarrow/Polars/DuckDB all support zstd.
+COMPRESSION = os.getenv("EXPORT_COMPRESSION", "zstd")
+
+MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+_PARQUET_CHUNK_BYTES = 1024 * 1024
+
+
+def _arrow_type(column):
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, Date):
+        return pa.date32()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, String):
+        return pa.string()
+    raise TypeError(f"No Arrow type for column {column.name} ({column.type!r})")
+
+
+class BatchEncoder:
+    """Builds Arrow record batches for a fixed list of table columns."""
+
+    def __init__(self, table, column_names, dictionary_columns):
+        self.column_names = list(column_names)
+        self.fields = []
+        for name in self.column_names:
+            arrow_type = _arrow_type(table.c[name])
+            if name in dictionary_columns:
+                arrow_type = pa.dictionary(pa.int32(), arrow_type)
+            self.fields.append(pa.field(name, arrow_type))
+        self.schema = pa.schema(self.fields)
+        # Per dictionary column: value -> index, plus the values in index order.
+        self._dictionaries = {name: ({}, []) for name in self.column_names if name in dictionary_columns}
+
+    def _dictionary_array(self, name, values):
+        lookup, ordered = self._dictionaries[name]
+        indices = []
+        for value in values:
+            if value is None:
+                indices.append(None)
+                continue
+            index = lookup.get(value)
+            if index is None:
+                index = lookup[value] = len(ordered)
+                ordered.append(value)
+            indices.append(index)
+        return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), pa.array(ordered, pa.string()))
+
+    def encode(self, rows):
+        columns = list(zip(*rows)) if rows else [() for _ in self.column_names]
+        arrays = []
+        for field, values in zip(self.fields, columns):
+            if field.name in self._dictionaries:
+                arrays.append(self._dictionary_array(field.name, values))
+            else:
+                arrays.append(pa.array(values, field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+
+class _Sink:
+    """Minimal writable file that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+        self.closed = False
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def ipc_stream(encoder: BatchEncoder, batches):
+    """Yields an Arrow IPC stream, one chunk of bytes per batch of rows."""
+    sink = _Sink()
+    options = pa.ipc.IpcWriteOptions(compression=COMPRESSION or None, emit_dictionary_deltas=True)
+    writer = pa.ipc.new_stream(sink, encoder.schema, options=options)
+
+    def write(rows) -> bytes:
+        writer.write_batch(encoder.encode(rows))
+        return sink.drain()
+
+    def close() -> bytes:
+        writer.close()
+        return sink.drain()
+
+    async for rows in batches:
+        yield await run_in_threadpool(write, rows)
+    yield await run_in_threadpool(close)
+
+
+async def parquet_file(encoder: BatchEncoder, batches):
+    """
+    Yields a Parquet file. Its footer is only known once every row group is written,
+    so the file is built in a temporary file (one row group per batch) and then streamed.
+    """
+    with tempfile.TemporaryFile() as spool:
+        writer = pq.ParquetWriter(spool, encoder.schema, compression=COMPRESSION or "none")
+
+        def write(rows):
+            writer.write_batch(encoder.encode(rows))
+
+        def finish():
+            writer.close()
+            spool.seek(0)
+
+        async for rows in batches:
+            await run_in_threadpool(write, rows)
+        await run_in_threadpool(finish)
+        while chunk := await run_in_threadpool(spool.read, _PARQUET_CHUNK_BYTES):
+            yield chunk
@@ -0,0 +1,100 @@
+# backend/bench_analysis.py
+#
+# Benchmark of the deep-dive analysis engines (analysis.py): runs the per-group loop
+# and the vectorized engine on the same frames and reports the speedup. That they
+# return the same results is checked by tests/test_analysis_engines.py.
+#
+# The hirings are scaled up from the database to --rows by copying them as extra
+# business groups ("Energy #2", ...), with jittered costs, times to fill and hire
+# dates, so both the row count and the number of groups grow as they would in
+# production.
+#
+# --processes N also times both engines spread over N worker processes
+# (analysis_pool.py); the pool is started before timing, as it would be in a server
+# that has already handled a request.
+#
+# Usage:
+#   python bench_analysis.py
+#   python bench_analysis.py --rows 2000000 --repeat 3
+#   python bench_analysis.py --processes 4
+#   python bench_analysis.py --rows 0          # just the rows in the database
+
+import argparse
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+import analysis
+import analysis_pool
+import analytics
+from database import SessionLocal
+
+
+def scaled_frames(hirings_df: pd.DataFrame, summaries_df: pd.DataFrame, rows: int, seed: int):
+    """The frames copied (and jittered) until there are at least `rows` hirings."""
+    copies = max(1, math.ceil(rows / len(hirings_df))) if rows else 1
+    rng = np.random.default_rng(seed)
+    hirings, summaries = [hirings_df], [summaries_df]
+    for copy in range(2, copies + 1):
+        jittered = hirings_df.copy()
+        jittered["business_group"] = jittered["business_group"].astype(str) + f" #{copy}"
+        jittered["cost_per_hire"] = jittered["cost_per_hire"] + rng.integers(-5000, 5000, len(jittered))
+        jittered["time_to_fill"] = (jittered["time_to_fill"] + rng.integers(-10, 10, len(jittered))).clip(lower=1)
+        jittered["hire_date"] = jittered["hire_date"] + pd.to_timedelta(rng.integers(-20, 20, len(jittered)), unit="D")
+        hirings.append(jittered)
+        copied_summaries = summaries_df.copy()
+        copied_summaries["business_group"] = copied_summaries["business_group"] + f" #{copy}"
+        summaries.append(copied_summaries)
+    hirings_df = pd.concat(hirings, ignore_index=True)
+    # Keep the compact dtypes the loader produces (analytics.load_frames_from_sql).
+    for name in analytics.CATEGORY_COLUMNS:
+        hirings_df[name] = hirings_df[name].astype("category")
+    return hirings_df, pd.concat(summaries, ignore_index=True)
+
+
+def best_of(engine, hirings_df, summaries_df, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = engine(hirings_df, summaries_df)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the loop and vectorized deep-dive analysis engines.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="hirings to analyse (0 = as in the database)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per engine; the best is reported")
+    parser.add_argument("--processes", type=int, default=0, help="also time the engines on this many worker processes")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        hirings_df, summaries_df = analytics.load_frames(db, None, None, None, None)
+    finally:
+        db.close()
+    hirings_df, summaries_df = scaled_frames(hirings_df, summaries_df, args.rows, args.seed)
+    groups = hirings_df.groupby(analysis.GROUP_KEYS, observed=True).ngroups
+    print(f"{len(hirings_df):,} hirings in {groups} business x function groups")
+
+    loop_seconds, _ = best_of(analysis.deep_insights_loop, hirings_df, summaries_df, args.repeat)
+    print(f"loop        {loop_seconds * 1000:>10.1f} ms")
+    vectorized_seconds, _ = best_of(analysis.deep_insights_vectorized, hirings_df, summaries_df, args.repeat)
+    print(f"vectorized  {vectorized_seconds * 1000:>10.1f} ms   ({loop_seconds / vectorized_seconds:.1f}x faster)")
+
+    if args.processes:
+        analysis_pool.PROCESSES, analysis_pool.MIN_ROWS = args.processes, 0
+        analysis_pool.start()
+        for engine, serial_seconds in (("loop", loop_seconds), ("vectorized", vectorized_seconds)):
+            pooled_seconds, _ = best_of(
+                lambda h, s: analysis_pool.generate_deep_insights(h, s, engine), hirings_df, summaries_df, args.repeat
+            )
+            print(f"{engine} x{args.processes:<{10 - len(engine)}}{pooled_seconds * 1000:>10.1f} ms   "
+                  f"({serial_seconds / pooled_seconds:.1f}x vs serial {engine})")
+
+
+if __name__ == "__main__":
+    main()
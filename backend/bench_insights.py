@@ -0,0 +1,217 @@
+# backend/bench_insights.py
+#
+# Latency benchmark of the insight pipeline against the local mock LLM
+# (mock_llm_server.py). Drives /insights/deep-dive/ and /kpis/drilldown/{kpi} (plus
+# the insight endpoint it hands out a token for) under concurrency over every filter
+# slice and reports p50/p95/p99 of the time spent in SQL, loading the data, the pandas
+# analysis, prompt building and the LLM call, each separately, from the Server-Timing
+# header (timings.py).
+#
+# By default the app runs in-process with every cache off, so each request does the
+# full work; --warm keeps the result and LLM caches on to measure repeat visits. The
+# mock's canned answers then end up in the llm_cache table, so only use --warm on a
+# scratch database (or run `python llm_cache.py purge` afterwards).
+#
+# Usage:
+#   python bench_insights.py
+#   python bench_insights.py --requests 200 --concurrency 16 --latency-ms 900 --sigma 0.5 --error-rate 0.02
+#   python bench_insights.py --warm
+#   python bench_insights.py --base-url http://localhost:8000   # a running server started with
+#                                                                # SERVER_TIMING_ENABLED=true
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import sys
+import threading
+import time
+
+PHASES = ["sql", "data", "analysis", "prompt", "llm", "total"]
+KPIS = ["time_to_fill", "cost_per_hire", "diversity_rate", "ijp_adherence_rate", "build_rate", "total_hires"]
+DATE_RANGE = {"start_date": "2025-01-01", "end_date": "2025-12-31"}
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_mock_llm(latency_ms: float, sigma: float, error_rate: float) -> str:
+    """Runs the mock LLM in a background thread and returns its base URL."""
+    import uvicorn
+    import mock_llm_server
+
+    mock_llm_server.configure(latency_ms, sigma, error_rate)
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(mock_llm_server.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}/v1"
+
+
+def configure_environment(args, mock_url: str):
+    # Must happen before the app modules are imported: they read it at import time.
+    os.environ.update({
+        "OPENAI_BASE_URL": mock_url,
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "mock"),
+        "SERVER_TIMING_ENABLED": "true",
+        "WARMUP_ENABLED": "false",
+        "HTTP_CACHE_ENABLED": "false",
+    })
+    if not args.warm:
+        os.environ.update({
+            "RESULT_CACHE_ENABLED": "false",
+            "LLM_CACHE_ENABLED": "false",
+            # Long enough for the waiting insight request to collect the job, too short
+            # to serve a later operation on the same slice.
+            "INSIGHT_JOB_RESULT_TTL_SECONDS": "1",
+        })
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.failures = {}
+
+    def add(self, endpoint: str, phases: dict):
+        self.samples.setdefault(endpoint, []).append(phases)
+
+    def fail(self, endpoint: str, reason: str):
+        self.failures.setdefault(endpoint, []).append(reason)
+
+    def report(self):
+        print(f"\n{'endpoint':<22}{'phase':<10}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for endpoint, samples in sorted(self.samples.items()):
+            for name in PHASES + ["wall"]:
+                values = [sample.get(name, 0.0) for sample in samples]
+                print(
+                    f"{endpoint:<22}{name:<10}{len(values):>6}"
+                    f"{percentile(values, 0.50):>10.1f}{percentile(values, 0.95):>10.1f}{percentile(values, 0.99):>10.1f}"
+                )
+        for endpoint, reasons in sorted(self.failures.items()):
+            print(f"[FAIL] {endpoint}: {len(reasons)} failed requests (first: {reasons[0]})")
+
+
+def _add_timings(total: dict, response):
+    import timings
+
+    for name, ms in timings.parse_header(response.headers.get("Server-Timing", "")).items():
+        total[name] = total.get(name, 0.0) + ms
+
+
+async def deep_dive(client, recorder: Recorder, business_group, function):
+    params = {key: value for key, value in (("business_group", business_group), ("function", function)) if value}
+    started = time.perf_counter()
+    response = await client.get("/api/v1/insights/deep-dive/", params={**params, **DATE_RANGE})
+    if response.status_code != 200:
+        recorder.fail("deep-dive", f"HTTP {response.status_code}")
+        return
+    phases = {"wall": (time.perf_counter() - started) * 1000}
+    _add_timings(phases, response)
+    recorder.add("deep-dive", phases)
+
+
+async def drilldown(client, recorder: Recorder, kpi: str, business_group, function):
+    """A drilldown plus collecting its insights: the time until the user sees both."""
+    params = {key: value for key, value in (("business_group", business_group), ("function", function)) if value}
+    started = time.perf_counter()
+    response = await client.get(f"/api/v1/kpis/drilldown/{kpi}", params=params)
+    if response.status_code != 200:
+        recorder.fail("drilldown", f"HTTP {response.status_code}")
+        return
+    charts = {"wall": (time.perf_counter() - started) * 1000}
+    _add_timings(charts, response)
+    recorder.add("drilldown (charts)", dict(charts))
+
+    body = response.json()
+    phases = charts
+    while body.get("ai_insights") is None:
+        response = await client.get(f"/api/v1/kpis/drilldown/insights/{body['insight_token']}", params={"wait": 10})
+        if response.status_code not in (200, 202):
+            recorder.fail("drilldown", f"insights HTTP {response.status_code}")
+            return
+        _add_timings(phases, response)
+        body = response.json()
+    phases["wall"] = (time.perf_counter() - started) * 1000
+    recorder.add("drilldown (+insights)", phases)
+
+
+async def run(args):
+    import httpx
+
+    if args.base_url:
+        transport, base_url = None, args.base_url
+    else:
+        import main as app_module
+        transport, base_url = httpx.ASGITransport(app=app_module.app), "http://bench"
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=120) as client:
+        bootstrap = await client.get("/api/v1/dashboard/bootstrap")
+        bootstrap.raise_for_status()
+        filters = bootstrap.json()["filters"]
+        slices = [(None, None)] + [(bg, None) for bg in filters["business_groups"]] + [
+            (bg, fn) for bg in filters["business_groups"] for fn in filters["functions"]
+        ]
+
+        rng = random.Random(args.seed)
+        operations = []
+        for _ in range(args.requests):
+            business_group, function = rng.choice(slices)
+            if rng.random() < args.deep_dive_share:
+                operations.append((deep_dive, (business_group, function)))
+            else:
+                operations.append((drilldown, (rng.choice(KPIS), business_group, function)))
+
+        recorder = Recorder()
+        slots = asyncio.Semaphore(args.concurrency)
+
+        async def one(operation, operation_args):
+            async with slots:
+                try:
+                    await operation(client, recorder, *operation_args)
+                except Exception as e:
+                    recorder.fail(operation.__name__, repr(e))
+
+        started = time.perf_counter()
+        await asyncio.gather(*[one(operation, operation_args) for operation, operation_args in operations])
+        elapsed = time.perf_counter() - started
+
+    print(f"{args.requests} operations at concurrency {args.concurrency} in {elapsed:.1f}s "
+          f"({args.requests / elapsed:.1f} ops/s, {'warm' if args.warm else 'cold'} caches)")
+    recorder.report()
+    return recorder
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the insight endpoints against a mock LLM.")
+    parser.add_argument("--requests", type=int, default=60, help="number of deep-dive/drilldown operations")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--deep-dive-share", type=float, default=0.5, help="share of operations that are deep dives")
+    parser.add_argument("--latency-ms", type=float, default=900, help="median mock LLM latency")
+    parser.add_argument("--sigma", type=float, default=0.4, help="log-normal spread of the mock LLM latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of mock LLM calls that fail")
+    parser.add_argument("--warm", action="store_true", help="keep the result and LLM caches on")
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if not args.base_url:
+        if args.warm:
+            print("⚠️ --warm stores the mock LLM's answers in llm_cache; use a scratch database.")
+        configure_environment(args, start_mock_llm(args.latency_ms, args.sigma, args.error_rate))
+    recorder = asyncio.run(run(args))
+    if recorder.failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
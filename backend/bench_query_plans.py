@@ -0,0 +1,182 @@
+# backend/bench_query_plans.py
+#
+# Runs every CRUD query against one or more databases, prints its timing and
+# query plan, and exits non-zero if any of them falls back to a full table scan.
+#
+# Usage:
+#   python bench_query_plans.py                                  # uses DATABASE_URL
+#   python bench_query_plans.py --url sqlite:///./dashboard.db --url postgresql://user:pw@localhost/dashboard
+#   BENCH_POSTGRES_URL=postgresql://... python bench_query_plans.py
+
+import os
+import re
+import sys
+import time
+import argparse
+from datetime import date
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import sessionmaker
+from dotenv import load_dotenv
+
+import models
+import analytics
+import crud
+import drilldown_crud
+import rollup
+import cache
+from migrations import run_migrations
+from database import build_engine
+from pagination import encode_cursor
+
+load_dotenv()
+
+# SQLite: "SCAN hirings" and "SCAN hirings USING INDEX ..." visit every row of the table;
+# only SEARCH (index range lookups) and "SCAN ... USING COVERING INDEX" stay off the table.
+SQLITE_FULL_SCAN = re.compile(r"^SCAN (\w+)(?!\w| USING COVERING INDEX)")
+# PostgreSQL: run with enable_seqscan=off, so a remaining Seq Scan means no index can serve the query.
+POSTGRES_FULL_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+def build_cases(bg: str, fn: str):
+    """
+    Every CRUD call paired with the filter shapes the routers actually send.
+    `full_scan_ok` marks queries that, by design, return every row of a small table.
+    """
+    year_start, year_end = date(2025, 1, 1), date(2025, 12, 31)
+    mid_start, mid_end = date(2025, 3, 15), date(2025, 9, 10)
+    cases = [
+        ("crud.get_all_business_summaries", lambda db: crud.get_all_business_summaries(db), True),
+        ("crud.get_summaries_by_business_group", lambda db: crud.get_summaries_by_business_group(db, bg), False),
+        ("crud.get_filtered_hirings[bg+fn+dates]", lambda db: crud.get_filtered_hirings(db, business_group=bg, function=fn, start_date=mid_start, end_date=mid_end), False),
+        ("crud.get_filtered_hirings[bg]", lambda db: crud.get_filtered_hirings(db, business_group=bg), False),
+        ("crud.get_filtered_hirings[fn+dates]", lambda db: crud.get_filtered_hirings(db, function=fn, start_date=mid_start, end_date=mid_end), False),
+        ("crud.get_filtered_hirings[dates]", lambda db: crud.get_filtered_hirings(db, start_date=mid_start, end_date=mid_end), False),
+        ("crud.get_filtered_hirings[bg+cursor]", lambda db: crud.get_filtered_hirings(db, business_group=bg, cursor=encode_cursor(mid_start, 0)), False),
+        ("crud.get_filtered_hirings[cursor]", lambda db: crud.get_filtered_hirings(db, cursor=encode_cursor(mid_start, 0)), False),
+        ("crud.get_all_business_summaries[cursor]", lambda db: crud.get_all_business_summaries(db, cursor=encode_cursor(10)), False),
+        ("crud.get_unique_business_groups", lambda db: crud.get_unique_business_groups(db), False),
+        ("crud.get_unique_functions", lambda db: crud.get_unique_functions(db), False),
+        ("crud.get_filter_options", lambda db: crud.get_filter_options(db), False),
+        ("crud.get_kpi_aggregates[bg+fn+month range]", lambda db: crud.get_kpi_aggregates(db, bg, fn, year_start, year_end), False),
+        ("crud.get_kpi_aggregates[bg+fn+day range]", lambda db: crud.get_kpi_aggregates(db, bg, fn, mid_start, mid_end), False),
+        ("crud.get_kpi_aggregates[fn+day range]", lambda db: crud.get_kpi_aggregates(db, None, fn, mid_start, mid_end), False),
+        ("crud.get_kpi_aggregates[bg]", lambda db: crud.get_kpi_aggregates(db, bg, None), False),
+        ("drilldown_crud.get_summary_data[bg+fn]", lambda db: drilldown_crud.get_summary_data(db, bg, fn), False),
+        ("drilldown_crud.get_summary_data[fn]", lambda db: drilldown_crud.get_summary_data(db, None, fn), False),
+    ]
+    # The insights loader matches case-insensitively, through the lower(...) expression indexes.
+    # Without a business group or function, every business summary row is read, by design.
+    for label, args, full_scan_ok in (
+        ("bg+fn+dates", (bg.upper(), fn.lower(), mid_start, mid_end), False),
+        ("bg", (bg.lower(), None, None, None), False),
+        ("fn+dates", (None, fn.upper(), mid_start, mid_end), False),
+        ("dates", (None, None, mid_start, mid_end), True),
+    ):
+        cases.append((f"analytics.load_frames_from_sql[{label}]", (lambda a: lambda db: analytics.load_frames_from_sql(db, *a))(args), full_scan_ok))
+    # The query behind every drilldown endpoint. Unfiltered, it reads the whole rollup
+    # (or, with the rollup off, every dated hiring), by design.
+    for label, args, full_scan_ok in (
+        ("bg+fn", (bg, fn), False),
+        ("bg", (bg, None), False),
+        ("fn", (None, fn), False),
+        ("all", (None, None), True),
+    ):
+        cases.append((f"drilldown_crud.drilldown_cube_query[{label}]", (lambda a: lambda db: db.execute(drilldown_crud.drilldown_cube_query(*a)).all())(args), full_scan_ok))
+    return cases
+
+
+def explain(connection, statement: str, parameters):
+    """Returns the query plan of one captured statement as a list of text lines."""
+    if connection.dialect.name == "postgresql":
+        rows = connection.exec_driver_sql("EXPLAIN " + statement, parameters).fetchall()
+        return [row[0] for row in rows]
+    rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def full_scans(dialect_name: str, plan_lines):
+    pattern = POSTGRES_FULL_SCAN if dialect_name == "postgresql" else SQLITE_FULL_SCAN
+    found = []
+    for line in plan_lines:
+        match = pattern.search(line.strip())
+        if match:
+            found.append(match.group(1))
+    return found
+
+
+def run_for_url(url: str, analyze: bool) -> list:
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    engine = build_engine(url)
+    run_migrations(engine)
+    dialect_name = engine.dialect.name
+
+    captured = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith("EXPLAIN"):
+            captured.append((statement, parameters))
+
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    failures = []
+    try:
+        if analyze:
+            db.execute(text("ANALYZE"))
+        if dialect_name == "postgresql":
+            db.execute(text("SET enable_seqscan = off"))
+
+        bg = (crud.get_unique_business_groups(db) or ["Tech"])[0]
+        fn = (crud.get_unique_functions(db) or ["Sales"])[0]
+        print(f"\n=== {engine.url.render_as_string(hide_password=True)} ({dialect_name}) — filters bg={bg!r}, fn={fn!r} ===")
+
+        for use_rollup in (True, False):
+            rollup.ENABLED = use_rollup
+            print(f"\n--- rollup {'enabled' if use_rollup else 'disabled'} ---")
+            for name, call, full_scan_ok in build_cases(bg, fn):
+                captured.clear()
+                started = time.perf_counter()
+                call(db)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                statements = list(captured)
+                print(f"{elapsed_ms:8.2f} ms  {name}")
+                for statement, parameters in statements:
+                    plan = explain(db.connection(), statement, parameters)
+                    scans = full_scans(dialect_name, plan)
+                    for line in plan:
+                        print(f"              {line}")
+                    if scans and not full_scan_ok:
+                        failures.append((url, f"{name} (rollup {'on' if use_rollup else 'off'})", scans, plan))
+    finally:
+        db.close()
+        engine.dispose()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN every CRUD query and fail on full table scans.")
+    parser.add_argument("--url", action="append", help="Database URL to check (repeatable).")
+    parser.add_argument("--analyze", action="store_true", help="Run ANALYZE first so the planner has statistics.")
+    args = parser.parse_args()
+
+    urls = args.url or [u for u in (os.getenv("DATABASE_URL", "sqlite:///./dashboard.db"), os.getenv("BENCH_POSTGRES_URL")) if u]
+
+    # Every call must reach the database to be EXPLAINed.
+    cache.ENABLED = False
+
+    failures = []
+    for url in urls:
+        failures.extend(run_for_url(url, args.analyze))
+
+    if failures:
+        print("\n[FAIL] The following queries fall back to a full table scan:")
+        for url, name, scans, plan in failures:
+            print(f"  - {name} on {', '.join(sorted(set(scans)))} ({url})")
+        sys.exit(1)
+    print("\n✅ No query falls back to a full table scan.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# backend/cache.py
+#
+# Process-local LRU/TTL cache for the read-only crud and drilldown_crud functions.
+# Entries are keyed on the function plus its normalized filter arguments and tagged
+# with the data version (data_version.py): any write to hirings or business_summaries
+# moves the version, so stale entries are never served and simply age out of the LRU.
+# Results flagged with data_version.mark_stale() are returned but not stored.
+# The TTL is only a safety net.
+#
+#   RESULT_CACHE_ENABLED=false       turns the cache off
+#   RESULT_CACHE_SIZE=1024           maximum number of entries per process
+#   RESULT_CACHE_TTL_SECONDS=3600
+
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+import data_version
+
+ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+MAX_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+
+
+class ResultCache:
+    """A bounded, thread-safe LRU mapping with per-entry expiry and hit/miss counters."""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Returns (True, value) on a hit and (False, None) on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": ENABLED,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+results = ResultCache(MAX_SIZE, TTL_SECONDS)
+
+
+def _normalize(value):
+    """Makes equivalent filters share a key: '' and None, padded strings, dates."""
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _key_builder(fn):
+    signature = inspect.signature(fn)
+    name = f"{fn.__module__}.{fn.__qualname__}"
+
+    def key(args, kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        # The first parameter is always the DB session, which is not part of the key.
+        params = list(bound.arguments.items())[1:]
+        return (name,) + tuple((param, _normalize(value)) for param, value in params)
+
+    return key
+
+
+def cached(fn):
+    """
+    Caches a `fn(db, *filters)` crud function, sync or async, per data version.
+    The async twin is keyed under its own name, so each keeps its own entries.
+    """
+    key_for = _key_builder(fn)
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(db, *args, **kwargs):
+            if not ENABLED:
+                return await fn(db, *args, **kwargs)
+            key = (await data_version.current_async(db),) + key_for((db,) + args, kwargs)
+            hit, value = results.get(key)
+            if hit:
+                return value
+            with data_version.tracking_staleness() as staleness:
+                value = await fn(db, *args, **kwargs)
+            if not staleness["stale"]:
+                results.put(key, value)
+            return value
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(db, *args, **kwargs):
+        if not ENABLED:
+            return fn(db, *args, **kwargs)
+        key = (data_version.current(db),) + key_for((db,) + args, kwargs)
+        hit, value = results.get(key)
+        if hit:
+            return value
+        with data_version.tracking_staleness() as staleness:
+            value = fn(db, *args, **kwargs)
+        if not staleness["stale"]:
+            results.put(key, value)
+        return value
+    return wrapper
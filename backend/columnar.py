@@ -0,0 +1,187 @@
+# backend/columnar.py
+#
+# Optional in-process columnar copy of the hirings table for the KPI endpoints.
+# Every column is a NumPy array; text columns are dictionary-encoded as small integers
+# and hire_date is stored as int32 days since 1970-01-01, so a KPI query is a handful
+# of vectorized masks plus np.bincount instead of a SQL round trip.
+#
+# Selected with ANALYTICS_BACKEND=numpy (or the older KPI_COLUMNAR_ENABLED=true); see
+# analytics.py for how the store is loaded, shared across gunicorn workers and refreshed.
+# Values follow the rollup semantics: rows without a hire_date count when there is no
+# date filter and are left out of date ranges and the monthly drilldowns, and like
+# AVG() the averages skip NULL measures (each measure keeps a "known" mask).
+
+import os
+from collections import namedtuple
+from datetime import date
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import models
+
+ENABLED = os.getenv("KPI_COLUMNAR_ENABLED", "false").lower() in ("1", "true", "yes")
+
+_EPOCH = date(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+_UNDATED = np.iinfo(np.int32).min  # hire_day of rows without a hire_date
+_LOAD_BATCH_SIZE = 100_000
+
+# One (label, value) point of a drilldown trend or breakdown.
+Point = namedtuple("Point", ["label", "value"])
+
+# The dictionary-encoded columns.
+CATEGORICAL = ["business_group", "function", "source", "role_title"]
+
+# Which rows have a value for time_to_fill, cost_per_hire, diversity_ratio, ijp_adherence
+# and build_buy_ratio, in the order of the drilldown cube's non-NULL counts.
+KNOWN = ["time_to_fill_known", "cost_per_hire_known", "diversity_known", "ijp_adherence_known", "build_known"]
+
+
+def _days(d: date) -> int:
+    return (d - _EPOCH).days
+
+
+def _encode(values, lookup: dict) -> np.ndarray:
+    """Dictionary codes of `values`, adding unseen values to `lookup` (value -> code)."""
+    codes, uniques = pd.factorize(np.array(values, dtype=object), use_na_sentinel=False)
+    # factorize turns None into NaN; the vocabularies keep None, like the SQL rows.
+    mapping = np.array([lookup.setdefault(None if pd.isna(u) else u, len(lookup)) for u in uniques], dtype=np.int32)
+    return mapping[codes] if len(mapping) else codes.astype(np.int32)
+
+
+def _code_dtype(size: int):
+    return np.int8 if size <= 127 else np.int16 if size <= 32767 else np.int32
+
+
+class ColumnarStore:
+    """Immutable snapshot of the hirings table as NumPy arrays."""
+
+    def __init__(self, columns: dict, vocabularies: dict, version):
+        self.vocabularies = vocabularies
+        self.codes = {name: {value: i for i, value in enumerate(vocab)} for name, vocab in vocabularies.items()}
+        self.version = version
+        for name, array in columns.items():
+            setattr(self, name, array)
+        self.dated = self.hire_day != _UNDATED
+        # Months as consecutive integers (year * 12 + month - 1), offset so the first is 0;
+        # undated rows get 0 too, and are masked out wherever months matter.
+        months = self.hire_day.astype("datetime64[D]").astype("datetime64[M]").astype(np.int32)
+        self.first_month = int(months[self.dated].min()) if self.dated.any() else 0
+        self.month = np.where(self.dated, months - self.first_month, 0).astype(np.int16)
+        self.month_count = int(self.month.max()) + 1 if len(self.month) else 0
+        self.size = len(self.hire_day)
+
+    @classmethod
+    def load(cls, db: Session, version=None) -> "ColumnarStore":
+        h = models.Hiring
+        query = (
+            select(
+                h.business_group, h.function, h.source, h.role_title, h.hire_date,
+                h.time_to_fill, h.cost_per_hire, h.ijp_adherence, h.build_buy_ratio, h.diversity_ratio,
+            )
+            .execution_options(yield_per=_LOAD_BATCH_SIZE)
+        )
+        lookups = {name: {} for name in CATEGORICAL}
+        chunks = {name: [] for name in CATEGORICAL + ["hire_day", "time_to_fill", "cost_per_hire", "ijp_adherence", "build", "diversity"] + KNOWN}
+        # Core rather than ORM rows, and whole-column conversions: a reload runs next to
+        # live requests, so it should hold the GIL as briefly as possible.
+        for batch in db.connection().execute(query).partitions():
+            bg, fn, src, role, hire_date, ttf, cost, ijp, build_buy, diversity = zip(*batch)
+            for name, values in zip(CATEGORICAL, (bg, fn, src, role)):
+                chunks[name].append(_encode(values, lookups[name]))
+            ordinals = (d.toordinal() - _EPOCH_ORDINAL if d is not None else _UNDATED for d in hire_date)
+            chunks["hire_day"].append(np.fromiter(ordinals, np.int32, len(hire_date)))
+            # As floats, NULLs become NaN.
+            ttf, cost, ijp, diversity = (np.array(v, dtype=np.float64) for v in (ttf, cost, ijp, diversity))
+            build_buy = np.array(build_buy, dtype=object)
+            chunks["time_to_fill"].append(np.nan_to_num(ttf).astype(np.int32))
+            chunks["cost_per_hire"].append(np.nan_to_num(cost).astype(np.int64))
+            chunks["ijp_adherence"].append(ijp == 1)
+            chunks["build"].append(build_buy == "Build")
+            chunks["diversity"].append(diversity == 1)
+            for name, values in zip(KNOWN, (ttf, cost, diversity, ijp)):
+                chunks[name].append(~np.isnan(values))
+            chunks["build_known"].append(build_buy != None)  # noqa: E711 (elementwise)
+
+        columns = {}
+        for name, parts in chunks.items():
+            dtype = np.int32 if name in CATEGORICAL or name == "hire_day" else None
+            columns[name] = np.concatenate(parts) if parts else np.zeros(0, dtype or np.int32)
+        vocabularies = {}
+        for name in CATEGORICAL:
+            vocabularies[name] = list(lookups[name])
+            columns[name] = columns[name].astype(_code_dtype(len(vocabularies[name])))
+        return cls(columns, vocabularies, version)
+
+    # --- Filtering ---
+
+    def _mask(self, business_group=None, function=None, start_date=None, end_date=None):
+        """Boolean row mask for the filters, or None when a filter value is unknown (no rows)."""
+        mask = np.ones(self.size, dtype=np.bool_)
+        for name, value in (("business_group", business_group), ("function", function)):
+            if value:
+                code = self.codes[name].get(value)
+                if code is None:
+                    return None
+                mask &= getattr(self, name) == code
+        if start_date or end_date:
+            mask &= self.dated
+        if start_date:
+            mask &= self.hire_day >= _days(start_date)
+        if end_date:
+            mask &= self.hire_day <= _days(end_date)
+        return mask
+
+    # --- KPI aggregates ---
+
+    def kpi_aggregates(self, business_group=None, function=None, start_date=None, end_date=None):
+        """Same fields as the SQL KPI aggregate row, ready for crud._format_kpi_aggregates."""
+        mask = self._mask(business_group, function, start_date, end_date)
+        total = int(mask.sum()) if mask is not None else 0
+        if total == 0:
+            return SimpleNamespace(total_hires=0)
+        ttf_known = np.count_nonzero(self.time_to_fill_known & mask)
+        cost_known = np.count_nonzero(self.cost_per_hire_known & mask)
+        return SimpleNamespace(
+            avg_time_to_fill=float(self.time_to_fill[mask].sum()) / ttf_known if ttf_known else None,
+            avg_cost_per_hire=float(self.cost_per_hire[mask].sum()) / cost_known if cost_known else None,
+            ijp_adherence_rate=np.count_nonzero(self.ijp_adherence & mask) / total,
+            build_buy_rate=np.count_nonzero(self.build & mask) / total,
+            diversity_hire_rate=np.count_nonzero(self.diversity & mask) / total,
+            total_hires=total,
+        )
+
+    # --- Drilldowns ---
+
+    def _month_label(self, i) -> str:
+        return str(np.datetime64(self.first_month + int(i), "M"))
+
+    def drilldown_cube(self, business_group=None, function=None, dim="function"):
+        """
+        Rows of (month, dim, source, hires, time_to_fill sum, cost sum, diversity, ijp,
+        build counts, then the non-NULL count of each of those five) for every
+        combination present, from one bincount pass.
+        """
+        mask = self._mask(business_group, function)
+        if mask is None:
+            return []
+        mask &= self.dated
+        dims, sources = self.vocabularies[dim], self.vocabularies["source"]
+        cell_count = len(dims) * len(sources)
+        key = (self.month[mask].astype(np.int64) * len(dims) + getattr(self, dim)[mask]) * len(sources) + self.source[mask]
+        size = self.month_count * cell_count
+        counts = np.bincount(key, minlength=size)
+        sums = [
+            np.bincount(key, weights=getattr(self, name)[mask].astype(np.float64), minlength=size)
+            for name in ("time_to_fill", "cost_per_hire", "diversity", "ijp_adherence", "build", *KNOWN)
+        ]
+        rows = []
+        for k in np.flatnonzero(counts):
+            month, cell = divmod(int(k), cell_count)
+            d, src = divmod(cell, len(sources))
+            rows.append((self._month_label(month), dims[d], sources[src], int(counts[k]), *(float(x[k]) for x in sums)))
+        return rows
@@ -1,27 +1,105 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, distinct, cast, Float, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, cast, Float, Integer, case, tuple_
 from datetime import date
 import models
 import schemas
+import rollup
+import cache
+import analytics
+from pagination import decode_cursor, next_cursor
+
+# Each query is built once by a `*_query` helper and executed by a sync function
+# (for scripts and threadpool routes) and an `*_async` twin (for async routes).
+# Read-only results are memoized per data version by @cache.cached (see cache.py);
+# get_filtered_hirings is not, its pages are large and rarely requested twice.
+# Cached functions return plain values or pydantic schemas, never ORM instances:
+# those stay bound to the session that loaded them, and cached ones would be shared.
 
 # === BusinessSummary CRUD Functions ===
 
-def get_all_business_summaries(db: Session, skip: int = 0, limit: int = 100):
+def _all_business_summaries_query(skip: int, limit: int, cursor: str | None = None):
+    query = select(models.BusinessSummary).order_by(models.BusinessSummary.id)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        return query.filter(models.BusinessSummary.id > last_id).limit(limit)
+    return query.offset(skip).limit(limit)
+
+def next_summaries_cursor(summaries, limit: int) -> str | None:
+    """Cursor for the page of summaries after this one, or None on the last page."""
+    return next_cursor(summaries, limit, lambda s: (s.id,))
+
+def business_summaries(rows) -> list:
+    """BusinessSummary rows as detached schemas.BusinessSummary objects, safe to cache and share."""
+    return [schemas.BusinessSummary.model_validate(row) for row in rows]
+
+def _summaries_by_business_group_query(business_group: str):
+    return select(models.BusinessSummary).filter(models.BusinessSummary.business_group == business_group)
+
+@cache.cached
+def get_all_business_summaries(db: Session, skip: int = 0, limit: int = 100, cursor: str | None = None):
     """
     Retrieve all business summary records with pagination.
+    Pass the `cursor` of the previous page instead of `skip` to page by keyset.
     """
-    return db.query(models.BusinessSummary).offset(skip).limit(limit).all()
+    return business_summaries(db.scalars(_all_business_summaries_query(skip, limit, cursor)))
+
+@cache.cached
+async def get_all_business_summaries_async(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: str | None = None):
+    """Async version of get_all_business_summaries."""
+    return business_summaries(await db.scalars(_all_business_summaries_query(skip, limit, cursor)))
 
+@cache.cached
 def get_summaries_by_business_group(db: Session, business_group: str):
     """
     Retrieve all summary records for a specific business group.
     Note: The original file had a different function name here, this one aligns with the router.
     """
-    return db.query(models.BusinessSummary).filter(models.BusinessSummary.business_group == business_group).all()
+    return business_summaries(db.scalars(_summaries_by_business_group_query(business_group)))
+
+@cache.cached
+async def get_summaries_by_business_group_async(db: AsyncSession, business_group: str):
+    """Async version of get_summaries_by_business_group."""
+    return business_summaries(await db.scalars(_summaries_by_business_group_query(business_group)))
 
 
 # === Hiring CRUD Functions ===
 
+def _apply_hiring_filters(query, business_group, function, start_date, end_date):
+    if business_group:
+        query = query.filter(models.Hiring.business_group == business_group)
+    if function:
+        query = query.filter(models.Hiring.function == function)
+    if start_date:
+        query = query.filter(models.Hiring.hire_date >= start_date)
+    if end_date:
+        query = query.filter(models.Hiring.hire_date <= end_date)
+    return query
+
+def _filtered_hirings_queries(skip, limit, business_group, function, start_date, end_date, cursor=None):
+    """
+    The queries that fill one page, in order: each runs only while the page is short.
+    Pages are ordered by (hire_date, id) with undated rows last, so they are stable and
+    a cursor can seek straight to the next page through the (..., hire_date) indexes.
+    """
+    h = models.Hiring
+    query = _apply_hiring_filters(select(h), business_group, function, start_date, end_date)
+    if not cursor:
+        return [query.order_by(h.hire_date.asc().nulls_last(), h.id).offset(skip).limit(limit)]
+
+    # The undated rows are paged by id alone, after all the dated ones. Keeping them out
+    # of the (hire_date, id) seek lets that stay an index range scan.
+    undated = query.filter(h.hire_date.is_(None)).order_by(h.id)
+    last_date, last_id = decode_cursor(cursor, date | None, int)
+    if last_date is None:
+        return [undated.filter(h.id > last_id).limit(limit)]
+    dated = query.filter(tuple_(h.hire_date, h.id) > tuple_(last_date, last_id)).order_by(h.hire_date, h.id)
+    return [dated.limit(limit), undated]
+
+def next_hirings_cursor(hirings, limit: int) -> str | None:
+    """Cursor for the page of hirings after this one, or None on the last page."""
+    return next_cursor(hirings, limit, lambda h: (h.hire_date, h.id))
+
 def get_filtered_hirings(
     db: Session,
     skip: int = 0,
@@ -29,44 +107,142 @@ def get_filtered_hirings(
     business_group: str | None = None,
     function: str | None = None,
     start_date: date | None = None,
-    end_date: date | None = None
+    end_date: date | None = None,
+    cursor: str | None = None
 ):
     """
     Retrieve hiring records with dynamic filters and pagination.
+    Pass the `cursor` of the previous page instead of `skip` to page by keyset.
     """
-    query = db.query(models.Hiring)
+    hirings = []
+    for query in _filtered_hirings_queries(skip, limit, business_group, function, start_date, end_date, cursor):
+        hirings += db.scalars(query.limit(limit - len(hirings))).all()
+        if len(hirings) == limit:
+            break
+    return hirings
 
-    if business_group:
-        query = query.filter(models.Hiring.business_group == business_group)
-    if function:
-        query = query.filter(models.Hiring.function == function)
-    if start_date:
-        query = query.filter(models.Hiring.hire_date >= start_date)
-    if end_date:
-        query = query.filter(models.Hiring.hire_date <= end_date)
+async def get_filtered_hirings_async(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    business_group: str | None = None,
+    function: str | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    cursor: str | None = None
+):
+    """Async version of get_filtered_hirings."""
+    hirings = []
+    for query in _filtered_hirings_queries(skip, limit, business_group, function, start_date, end_date, cursor):
+        hirings += (await db.scalars(query.limit(limit - len(hirings)))).all()
+        if len(hirings) == limit:
+            break
+    return hirings
+
+
+# === Export ===
+
+# The columns of schemas.Hiring, in output order.
+HIRING_EXPORT_COLUMNS = list(schemas.Hiring.model_fields)
+
+def hirings_export_query(business_group, function, start_date, end_date):
+    """Plain column rows (no ORM objects) in (hire_date, id) order, for streaming exports."""
+    columns = [getattr(models.Hiring, name) for name in HIRING_EXPORT_COLUMNS]
+    query = select(*columns).order_by(models.Hiring.hire_date, models.Hiring.id)
+    return _apply_hiring_filters(query, business_group, function, start_date, end_date)
+
+async def stream_filtered_hirings_async(
+    db: AsyncSession,
+    business_group: str | None = None,
+    function: str | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    batch_size: int = 5000
+):
+    """
+    Yields the matching hiring rows in batches of `batch_size` tuples, read through a
+    server-side cursor so memory use does not grow with the size of the export.
+    """
+    query = hirings_export_query(business_group, function, start_date, end_date)
+    result = await db.stream(query.execution_options(yield_per=batch_size))
+    async for batch in result.partitions():
+        yield batch
 
-    return query.offset(skip).limit(limit).all()
+
+# The columns of schemas.BusinessSummary, in output order.
+SUMMARY_EXPORT_COLUMNS = list(schemas.BusinessSummary.model_fields)
+
+async def stream_business_summaries_async(db: AsyncSession, batch_size: int = 5000):
+    """Yields every business summary as batches of plain column tuples, in id order."""
+    columns = [getattr(models.BusinessSummary, name) for name in SUMMARY_EXPORT_COLUMNS]
+    query = select(*columns).order_by(models.BusinessSummary.id)
+    result = await db.stream(query.execution_options(yield_per=batch_size))
+    async for batch in result.partitions():
+        yield batch
 
 
 # === Functions for UI Filters ===
 
+def _unique_values_query(column):
+    return select(column).distinct()
+
+@cache.cached
 def get_unique_business_groups(db: Session):
     """
     Get a list of unique business groups to populate UI filters.
     """
-    results = db.query(distinct(models.Hiring.business_group)).all()
-    return [result[0] for result in results]
+    return db.scalars(_unique_values_query(models.Hiring.business_group)).all()
 
+@cache.cached
+async def get_unique_business_groups_async(db: AsyncSession):
+    """Async version of get_unique_business_groups."""
+    return (await db.scalars(_unique_values_query(models.Hiring.business_group))).all()
+
+@cache.cached
 def get_unique_functions(db: Session):
     """
     Get a list of unique functions to populate UI filters.
     """
-    results = db.query(distinct(models.Hiring.function)).all()
-    return [result[0] for result in results]
+    return db.scalars(_unique_values_query(models.Hiring.function)).all()
+
+@cache.cached
+async def get_unique_functions_async(db: AsyncSession):
+    """Async version of get_unique_functions."""
+    return (await db.scalars(_unique_values_query(models.Hiring.function))).all()
+
+
+def _filter_options_query():
+    return select(models.Hiring.business_group, models.Hiring.function).distinct()
+
+def _split_filter_options(pairs) -> dict:
+    return {
+        "business_groups": sorted({bg for bg, _ in pairs if bg is not None}),
+        "functions": sorted({fn for _, fn in pairs if fn is not None}),
+    }
+
+@cache.cached
+def get_filter_options(db: Session) -> dict:
+    """
+    Both filter lists from one DISTINCT (business_group, function) scan of the index,
+    instead of one scan per list.
+    """
+    return _split_filter_options(db.execute(_filter_options_query()).all())
+
+@cache.cached
+async def get_filter_options_async(db: AsyncSession) -> dict:
+    """Async version of get_filter_options."""
+    return _split_filter_options((await db.execute(_filter_options_query())).all())
 
 
 # === KPI Aggregation Function ===
 
+def _kpi_aggregates_query(business_group, function, start_date, end_date):
+    """Month-aligned date ranges are answered from the monthly rollup table."""
+    if rollup.ENABLED and rollup.is_month_aligned(start_date, end_date):
+        return _kpi_aggregates_from_rollup_query(business_group, function, start_date, end_date)
+    return _kpi_aggregates_from_hirings_query(business_group, function, start_date, end_date)
+
+@cache.cached
 def get_kpi_aggregates(
     db: Session,
     business_group: str | None = None,
@@ -76,8 +252,56 @@ def get_kpi_aggregates(
 ):
     """
     Calculates and formats aggregate KPIs based on the provided filters.
+    Served by the configured analytics backend (NumPy/DuckDB) if any; otherwise
+    month-aligned date ranges are answered from the monthly rollup table.
     """
-    query = db.query(
+    backend = analytics.get_backend(db)
+    if backend is not None:
+        return _format_kpi_aggregates(backend.kpi_aggregates(business_group, function, start_date, end_date))
+    raw_results = db.execute(_kpi_aggregates_query(business_group, function, start_date, end_date)).first()
+    return _format_kpi_aggregates(raw_results)
+
+@cache.cached
+async def get_kpi_aggregates_async(
+    db: AsyncSession,
+    business_group: str | None = None,
+    function: str | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None
+):
+    """Async version of get_kpi_aggregates."""
+    backend = await analytics.get_backend_async(db)
+    if backend is not None:
+        return _format_kpi_aggregates(backend.kpi_aggregates(business_group, function, start_date, end_date))
+    raw_results = (await db.execute(_kpi_aggregates_query(business_group, function, start_date, end_date))).first()
+    return _format_kpi_aggregates(raw_results)
+
+def _format_kpi_aggregates(raw_results):
+    if raw_results and raw_results.total_hires > 0:
+        # We have valid results, so we format them into a clean dictionary.
+        return {
+            "avg_time_to_fill": round(raw_results.avg_time_to_fill or 0),
+            "avg_cost_per_hire": round(raw_results.avg_cost_per_hire or 0),
+            "ijp_adherence_rate": round((raw_results.ijp_adherence_rate or 0) * 100),
+            "build_buy_rate": round((raw_results.build_buy_rate or 0) * 100),
+            "diversity_hire_rate": round((raw_results.diversity_hire_rate or 0) * 100),
+            "total_hires": raw_results.total_hires,
+        }
+    else:
+        # No results found, return a default dictionary of clean integers.
+        return {
+            "avg_time_to_fill": 0,
+            "avg_cost_per_hire": 0,
+            "ijp_adherence_rate": 0,
+            "build_buy_rate": 0,
+            "diversity_hire_rate": 0,
+            "total_hires": 0,
+        }
+
+
+def _kpi_aggregates_from_hirings_query(business_group, function, start_date, end_date):
+    """Aggregates the KPIs by scanning the matching rows of the hirings table."""
+    query = select(
         func.avg(models.Hiring.time_to_fill).label("avg_time_to_fill"),
         func.avg(models.Hiring.cost_per_hire).label("avg_cost_per_hire"),
         func.avg(
@@ -110,25 +334,26 @@ def get_kpi_aggregates(
     if end_date:
         query = query.filter(models.Hiring.hire_date <= end_date)
 
-    raw_results = query.first()
+    return query
 
-    if raw_results and raw_results.total_hires > 0:
-        # We have valid results, so we format them into a clean dictionary.
-        return {
-            "avg_time_to_fill": round(raw_results.avg_time_to_fill or 0),
-            "avg_cost_per_hire": round(raw_results.avg_cost_per_hire or 0),
-            "ijp_adherence_rate": round((raw_results.ijp_adherence_rate or 0) * 100),
-            "build_buy_rate": round((raw_results.build_buy_rate or 0) * 100),
-            "diversity_hire_rate": round((raw_results.diversity_hire_rate or 0) * 100),
-            "total_hires": raw_results.total_hires,
-        }
-    else:
-        # No results found, return a default dictionary of clean integers.
-        return {
-            "avg_time_to_fill": 0,
-            "avg_cost_per_hire": 0,
-            "ijp_adherence_rate": 0,
-            "build_buy_rate": 0,
-            "diversity_hire_rate": 0,
-            "total_hires": 0,
-        }
+def _kpi_aggregates_from_rollup_query(business_group, function, start_date, end_date):
+    """Aggregates the KPIs from the monthly rollup; the date range must be month-aligned."""
+    r = models.HiringMonthlyRollup
+    hires = func.sum(r.hire_count)
+    # AVG() skips NULLs: the averages are over the hires that have a value, the rates over all hires.
+    query = select(
+        (cast(func.sum(r.time_to_fill_sum), Float) / func.nullif(func.sum(r.time_to_fill_known), 0)).label("avg_time_to_fill"),
+        (cast(func.sum(r.cost_per_hire_sum), Float) / func.nullif(func.sum(r.cost_per_hire_known), 0)).label("avg_cost_per_hire"),
+        (cast(func.sum(r.ijp_adherence_count), Float) / hires).label("ijp_adherence_rate"),
+        (cast(func.sum(r.build_count), Float) / hires).label("build_buy_rate"),
+        (cast(func.sum(r.diversity_count), Float) / hires).label("diversity_hire_rate"),
+        cast(func.coalesce(hires, 0), Integer).label("total_hires")
+    )
+
+    if business_group:
+        query = query.filter(r.business_group == business_group)
+    if function:
+        query = query.filter(r.function == function)
+    query = rollup.apply_month_range(query, start_date, end_date)
+
+    return query
@@ -0,0 +1,162 @@
+# backend/data_version.py
+#
+# One number that changes whenever the dashboard data does. Every ORM write to
+# hirings or business_summaries (flushed objects and bulk query().update()/delete())
+# bumps the `dataset` row of data_versions inside the same transaction, so the
+# version can never be newer or older than the data it describes. models.py imports
+# this module, so the hooks are active in any process that uses the models. Scripts
+# that write around the ORM (pandas.to_sql) call bump() themselves.
+#
+# Readers tag cached results with current(db). A commit in this process makes the next
+# call re-read the version at once; changes made by other processes (other gunicorn
+# workers, seed.py) are seen after at most DATA_VERSION_POLL_SECONDS.
+#
+# A reader that answers from data older than the current version (an analytics
+# snapshot that is still reloading) calls mark_stale(), so the caches around it
+# (cache.py, http_cache.py) don't file that answer under the current version.
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+import models
+
+DATASET = "dataset"
+POLL_SECONDS = float(os.getenv("DATA_VERSION_POLL_SECONDS", "1"))
+
+_TRACKED_MODELS = (models.Hiring, models.BusinessSummary)
+_V = models.DataVersion
+
+_version = None
+_read_at = 0.0
+_lock = threading.Lock()
+
+
+def _version_query():
+    return select(_V.version).where(_V.name == DATASET)
+
+
+def _remember(version) -> int:
+    global _version, _read_at
+    with _lock:
+        _version = int(version or 0)
+        _read_at = time.monotonic()
+        return _version
+
+
+def known() -> int | None:
+    """The version last read, if it is recent enough to use without asking the database."""
+    if _version is not None and time.monotonic() - _read_at < POLL_SECONDS:
+        return _version
+    return None
+
+
+def current(db: Session) -> int:
+    """The current data version, re-read from the database at most every POLL_SECONDS."""
+    version = known()
+    if version is not None:
+        return version
+    try:
+        return _remember(db.execute(_version_query()).scalar())
+    except DBAPIError:
+        # Only a read-only snapshot created before data_versions existed gets here;
+        # its data never changes.
+        return _remember(0)
+
+
+async def current_async(db) -> int:
+    """current() for an AsyncSession."""
+    version = known()
+    if version is not None:
+        return version
+    try:
+        return _remember((await db.execute(_version_query())).scalar())
+    except DBAPIError:
+        return _remember(0)
+
+
+def forget():
+    """Makes the next current() call re-read the version from the database."""
+    global _version
+    with _lock:
+        _version = None
+
+
+def bump(connection):
+    """Increments the data version on a Core connection, inside its current transaction."""
+    result = connection.execute(update(_V).where(_V.name == DATASET).values(version=_V.version + 1))
+    if result.rowcount == 0:
+        connection.execute(insert(_V).values(name=DATASET, version=1))
+
+
+def ensure_row(engine):
+    """Creates the `dataset` version row when it is missing (called by migrations)."""
+    with engine.begin() as connection:
+        if connection.execute(_version_query()).first() is None:
+            connection.execute(insert(_V).values(name=DATASET, version=0))
+
+
+# === Stale answers ===
+
+# The flags of every tracking_staleness() block the current call runs in.
+_staleness = contextvars.ContextVar("data_version_staleness", default=())
+
+
+@contextmanager
+def tracking_staleness():
+    """Yields a dict whose "stale" turns True if anything inside calls mark_stale()."""
+    flags = {"stale": False}
+    token = _staleness.set(_staleness.get() + (flags,))
+    try:
+        yield flags
+    finally:
+        _staleness.reset(token)
+
+
+def mark_stale():
+    """Reports that the answer being computed comes from data older than current()."""
+    for flags in _staleness.get():
+        flags["stale"] = True
+
+
+# === Bumping on ORM writes ===
+
+def _mark_changed(session: Session):
+    if not session.info.get("data_version_bumped"):
+        bump(session.connection())
+        session.info["data_version_bumped"] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_flush(session: Session, flush_context):
+    changed = any(isinstance(obj, _TRACKED_MODELS) for obj in (*session.new, *session.deleted)) or any(
+        isinstance(obj, _TRACKED_MODELS) and session.is_modified(obj, include_collections=False)
+        for obj in session.dirty
+    )
+    if changed:
+        _mark_changed(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bump_on_bulk_write(orm_execute_state):
+    mapper = orm_execute_state.bind_mapper
+    is_write = orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert
+    if is_write and mapper is not None and mapper.class_ in _TRACKED_MODELS:
+        _mark_changed(orm_execute_state.session)
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_after_commit(session: Session):
+    if session.info.pop("data_version_bumped", False):
+        forget()
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_after_rollback(session: Session):
+    session.info.pop("data_version_bumped", None)
@@ -1,8 +1,14 @@
 # backend/database.py
 
+import asyncio
 import os
-from sqlalchemy import create_engine
+import time
+import threading
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from dotenv import load_dotenv
 
@@ -22,19 +28,191 @@ SQLALCHEMY_DATABASE_URL = DATABASE_URL
 if DATABASE_URL.startswith("postgres://"):
     SQLALCHEMY_DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-# Fix 2: The `connect_args` is only for SQLite. We create a dictionary for it here.
-connect_args = {}
-if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
+# Optional read replicas for the GET endpoints, comma-separated. They get the same fix.
+DATABASE_REPLICA_URLS = [
+    url.strip().replace("postgres://", "postgresql://", 1)
+    for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+    if url.strip()
+]
 
 # --- END: NECESSARY FIXES FOR PRODUCTION ---
 
 
-# Now, we create the engine using our corrected variables.
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args=connect_args
-)
+# --- ENGINE PROFILES ---
+# Pick one with DB_ENGINE_PROFILE. Pool settings only apply where the pool supports them,
+# `statement_timeout_ms` only to PostgreSQL and `sqlite_pragmas` only to SQLite.
+#
+#   default  - what we had before: small pool, no pragmas.
+#   web      - gunicorn + several uvicorn workers: bounded pool per worker, pre-ping and
+#              recycle so stale connections are never handed out, WAL so readers don't
+#              block on the (rare) writer.
+#   batch    - seeding/migration scripts: one long-lived connection, generous timeouts.
+#   snapshot - dashboards serving a static SQLite snapshot: the file is opened read-only
+#              and immutable, so SQLite skips locking and change detection entirely.
+ENGINE_PROFILES = {
+    "default": {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_pre_ping": False,
+        "pool_recycle": -1,
+        "pool_timeout": 30,
+        "statement_timeout_ms": None,
+        "sqlite_pragmas": {},
+        "read_only": False,
+    },
+    "web": {
+        "pool_size": 5,
+        "max_overflow": 5,
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+        "pool_timeout": 10,
+        "statement_timeout_ms": 15000,
+        "sqlite_pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "cache_size": -65536,       # 64 MiB page cache (negative = KiB)
+            "mmap_size": 268435456,     # 256 MiB memory-mapped I/O
+            "temp_store": "MEMORY",
+            "busy_timeout": 5000,
+        },
+        "read_only": False,
+    },
+    "batch": {
+        "pool_size": 1,
+        "max_overflow": 0,
+        "pool_pre_ping": True,
+        "pool_recycle": -1,
+        "pool_timeout": 60,
+        "statement_timeout_ms": 0,      # 0 disables the timeout
+        "sqlite_pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "cache_size": -262144,      # 256 MiB
+            "temp_store": "MEMORY",
+            "busy_timeout": 30000,
+        },
+        "read_only": False,
+    },
+    "snapshot": {
+        "pool_size": 10,
+        "max_overflow": 10,
+        "pool_pre_ping": False,
+        "pool_recycle": -1,
+        "pool_timeout": 10,
+        "statement_timeout_ms": 15000,
+        "sqlite_pragmas": {
+            "cache_size": -65536,
+            "mmap_size": 1073741824,    # 1 GiB: map the whole snapshot
+            "temp_store": "MEMORY",
+            "query_only": "ON",
+        },
+        "read_only": True,
+    },
+}
+
+DB_ENGINE_PROFILE = os.getenv("DB_ENGINE_PROFILE", "default")
+
+
+def get_engine_profile(name: str | None = None) -> dict:
+    """
+    Returns the named profile with any DB_POOL_SIZE / DB_MAX_OVERFLOW /
+    DB_POOL_RECYCLE / DB_STATEMENT_TIMEOUT_MS environment overrides applied.
+    """
+    name = name or DB_ENGINE_PROFILE
+    if name not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown DB_ENGINE_PROFILE '{name}'. Choose one of: {', '.join(ENGINE_PROFILES)}")
+    profile = dict(ENGINE_PROFILES[name])
+    for env_name, key in (
+        ("DB_POOL_SIZE", "pool_size"),
+        ("DB_MAX_OVERFLOW", "max_overflow"),
+        ("DB_POOL_RECYCLE", "pool_recycle"),
+        ("DB_STATEMENT_TIMEOUT_MS", "statement_timeout_ms"),
+    ):
+        if os.getenv(env_name):
+            profile[key] = int(os.getenv(env_name))
+    return profile
+
+
+def _read_only_sqlite_url(url):
+    """Rewrites a SQLite file URL into a read-only, immutable URI connection."""
+    path = os.path.abspath(url.database)
+    return url.set(database=f"file:{path}", query={"mode": "ro", "immutable": "1", "uri": "true"})
+
+
+def _engine_options(url: str, profile: dict, is_async: bool):
+    """Works out the final URL, connect_args and pool kwargs for one engine."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    is_sqlite = backend == "sqlite"
+    is_memory = is_sqlite and url.database in (None, "", ":memory:")
+
+    engine_kwargs = {}
+    connect_args = {}
+
+    if is_sqlite:
+        # The `connect_args` is only for SQLite.
+        connect_args["check_same_thread"] = False
+        if profile["read_only"] and not is_memory:
+            url = _read_only_sqlite_url(url)
+    elif backend == "postgresql" and profile["statement_timeout_ms"] is not None:
+        if is_async:
+            connect_args["server_settings"] = {"statement_timeout": str(profile["statement_timeout_ms"])}
+        else:
+            connect_args["options"] = f"-c statement_timeout={profile['statement_timeout_ms']}"
+
+    if is_async:
+        url = url.set(drivername={"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}.get(backend, url.drivername))
+
+    if not is_memory:
+        # In-memory SQLite uses a singleton pool that takes none of these.
+        engine_kwargs.update(
+            pool_size=profile["pool_size"],
+            max_overflow=profile["max_overflow"],
+            pool_recycle=profile["pool_recycle"],
+            pool_timeout=profile["pool_timeout"],
+        )
+    engine_kwargs["pool_pre_ping"] = profile["pool_pre_ping"]
+    pragmas = profile["sqlite_pragmas"] if is_sqlite else {}
+    return url, connect_args, engine_kwargs, pragmas
+
+
+def _install_sqlite_pragmas(sync_engine, pragmas: dict):
+    """Applies the profile's PRAGMAs to every new DBAPI connection of the engine."""
+    if not pragmas:
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, value in pragmas.items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+        cursor.close()
+
+
+def build_engine(url: str, profile_name: str | None = None):
+    """Creates an engine for `url` configured by the chosen engine profile."""
+    url, connect_args, engine_kwargs, pragmas = _engine_options(url, get_engine_profile(profile_name), is_async=False)
+    engine = create_engine(url, connect_args=connect_args, **engine_kwargs)
+    _install_sqlite_pragmas(engine, pragmas)
+    return engine
+
+
+def build_async_engine(url: str, profile_name: str | None = None):
+    """
+    Creates the asyncio counterpart of `build_engine`: asyncpg for PostgreSQL,
+    aiosqlite for SQLite, with the same profile settings.
+    """
+    url, connect_args, engine_kwargs, pragmas = _engine_options(url, get_engine_profile(profile_name), is_async=True)
+    engine = create_async_engine(url, connect_args=connect_args, **engine_kwargs)
+    _install_sqlite_pragmas(engine.sync_engine, pragmas)
+    return engine
+
+
+# Now, we create the engine using our corrected URL and the selected profile.
+engine = build_engine(SQLALCHEMY_DATABASE_URL)
+
+# True when the profile opens the database read-only (startup must not try to migrate it).
+READ_ONLY = get_engine_profile()["read_only"]
 
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -46,4 +224,133 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# --- ASYNC ACCESS ---
+# Same database and profile, driven by asyncpg/aiosqlite so `async def` routes
+# don't tie up a threadpool thread for the whole DB round trip.
+async_engine = build_async_engine(SQLALCHEMY_DATABASE_URL)
+
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# --- READ REPLICAS ---
+# Read-only dashboard traffic goes through get_read_db / get_async_read_db. With
+# DATABASE_REPLICA_URLS unset these are simply the primary. Otherwise a replica is chosen
+# per request (DATABASE_REPLICA_STRATEGY=round_robin or least_connections); a replica
+# that fails to hand out a connection is skipped for DATABASE_REPLICA_RETRY_SECONDS and
+# the request falls back to the primary.
+DATABASE_REPLICA_STRATEGY = os.getenv("DATABASE_REPLICA_STRATEGY", "round_robin")
+DATABASE_REPLICA_RETRY_SECONDS = float(os.getenv("DATABASE_REPLICA_RETRY_SECONDS", "30"))
+
+# What a dead replica raises on connect. SQLAlchemy wraps driver errors in DBAPIError, but
+# asyncpg's refused/timed-out connections surface as bare OSError/TimeoutError.
+REPLICA_CONNECT_ERRORS = (DBAPIError, OSError, asyncio.TimeoutError)
+
+
+class ReplicaRouter:
+    """Picks a healthy replica for each read session and tracks the ones that are down."""
+
+    def __init__(self, urls: list, strategy: str, retry_seconds: float):
+        if strategy not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown DATABASE_REPLICA_STRATEGY '{strategy}'. Use round_robin or least_connections.")
+        self.urls = urls
+        self.strategy = strategy
+        self.retry_seconds = retry_seconds
+        self.engines = [build_engine(url) for url in urls]
+        self.async_engines = [build_async_engine(url) for url in urls]
+        self._down_until = [0.0] * len(urls)
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def _healthy(self) -> list:
+        now = time.monotonic()
+        return [i for i, until in enumerate(self._down_until) if until <= now]
+
+    def pick(self, is_async: bool = False) -> int | None:
+        """Index of the replica to use, or None when every replica is marked down."""
+        candidates = self._healthy()
+        if not candidates:
+            return None
+        if self.strategy == "least_connections":
+            engines = self.async_engines if is_async else self.engines
+            loads = {i: (engines[i].sync_engine if is_async else engines[i]).pool.checkedout() for i in candidates}
+            fewest = min(loads.values())
+            # Ties (e.g. all idle) are rotated round-robin so one replica doesn't take every request.
+            candidates = [i for i in candidates if loads[i] == fewest]
+        with self._lock:
+            index = candidates[self._next % len(candidates)]
+            self._next += 1
+        return index
+
+    def mark_down(self, index: int, error: Exception):
+        with self._lock:
+            self._down_until[index] = time.monotonic() + self.retry_seconds
+        print(f"⚠️ Read replica #{index} unavailable, using the primary for {self.retry_seconds:.0f}s: {error}")
+
+    def status(self) -> list:
+        now = time.monotonic()
+        return [
+            {"replica": i, "healthy": until <= now, "checked_out": self.engines[i].pool.checkedout()}
+            for i, until in enumerate(self._down_until)
+        ]
+
+
+replica_router = (
+    ReplicaRouter(DATABASE_REPLICA_URLS, DATABASE_REPLICA_STRATEGY, DATABASE_REPLICA_RETRY_SECONDS)
+    if DATABASE_REPLICA_URLS else None
+)
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+AsyncReadSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+
+def open_read_session():
+    """Opens a read session on a replica (or the primary); the caller must close it."""
+    if replica_router is not None:
+        index = replica_router.pick()
+        if index is not None:
+            db = ReadSessionLocal(bind=replica_router.engines[index])
+            try:
+                db.connection()  # checks a connection out now, so a dead replica fails here
+                return db
+            except REPLICA_CONNECT_ERRORS as e:
+                db.close()
+                replica_router.mark_down(index, e)
+    return SessionLocal()
+
+
+async def open_async_read_session():
+    """Async version of open_read_session, for work that outlives the request, like streamed responses."""
+    if replica_router is not None:
+        index = replica_router.pick(is_async=True)
+        if index is not None:
+            db = AsyncReadSessionLocal(bind=replica_router.async_engines[index])
+            try:
+                await db.connection()
+                return db
+            except REPLICA_CONNECT_ERRORS as e:
+                await db.close()
+                replica_router.mark_down(index, e)
+    return AsyncSessionLocal()
+
+
+def get_read_db():
+    db = open_read_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db():
+    db = await open_async_read_session()
+    try:
+        yield db
+    finally:
+        await db.close()
@@ -0,0 +1,167 @@
+# backend/deep_dive_prompt.py
+#
+# Builds the deep-dive insight prompt from analysis.generate_deep_insights() within a
+# token budget. The verbose Level 1/2/3 prose costs ~100 tokens per business x function
+# group, so the prompt (and the LLM's time to answer) grew with every group added.
+# Instead, groups are:
+#
+#   - ranked by signal strength: their Level 3 flags, how far their KPIs sit from the
+#     other groups' (z-scores), cost outliers and headcount coverage gaps;
+#   - written one table row each (plus a line per flag), most notable first, for as
+#     long as the budget allows;
+#   - and the rest collapsed into one hire-weighted row per business, or a single
+#     "all other groups" row when even those would not fit.
+#
+# Tokens are estimated at ~4 characters each, which is close enough for budgeting.
+#
+#   DEEP_DIVE_PROMPT_TOKEN_BUDGET=900     0 = the old verbose prompt, unbounded
+
+import os
+import statistics
+
+TOKEN_BUDGET = int(os.getenv("DEEP_DIVE_PROMPT_TOKEN_BUDGET", "900"))
+
+CHARS_PER_TOKEN = 4
+
+HEADER = (
+    "Here is the data summary: one row per business | function, most notable first. "
+    "'(other ...)' rows aggregate unremarkable groups (hire-weighted). Rates in %, "
+    "ttf = avg time to fill (days), cost = avg cost per hire (₹), gap = headcount gap, "
+    "cover = hires / gap, idle = months without hires; '!' lines are flagged signals.\n"
+    "group | hires | ttf | cost | build | ijp | div | gap | cover | idle | costliest source\n"
+)
+
+# KPIs whose distance from the other groups counts as signal.
+_COMPARED = ("time_to_fill", "cost_per_hire", "build_rate", "ijp_rate", "diversity_rate")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def verbose_prompt(analysis_results: list) -> str:
+    """The original prompt: every group's Level 1/2/3 text."""
+    prompt_text = "Here is the data summary:\n\n"
+    for result in analysis_results:
+        prompt_text += f"--- For {result['Business']} - {result['Function']} ---\n"
+        prompt_text += f"KPIs:\n{result['Level_1_KPIs']}\n"
+        prompt_text += f"Operational Data:\n{result['Level_2_Operational']}\n"
+        prompt_text += f"Deeper Signals:\n{result['Level_3_Deep_Insights']}\n\n"
+    return prompt_text
+
+
+def signal_scores(groups: list) -> list:
+    """How notable each group is; higher is more interesting to the model."""
+    spreads = {}
+    for name in _COMPARED:
+        values = [group["Metrics"][name] for group in groups]
+        spreads[name] = (statistics.fmean(values), statistics.pstdev(values)) if len(values) > 1 else (0.0, 0.0)
+
+    scores = []
+    for group in groups:
+        metrics = group["Metrics"]
+        score = 3.0 * len(group["Signals"])
+        for name, (mean, spread) in spreads.items():
+            if spread > 0:
+                score += max(0.0, abs(metrics[name] - mean) / spread - 1.0)
+        score += min(metrics["cost_outliers"], 5) * 0.5
+        if metrics["coverage"] is not None:
+            score += 2.0 * max(0.0, 1.0 - metrics["coverage"])
+        score += metrics["stagnant_months"] / 4
+        scores.append(score)
+    return scores
+
+
+def _number(value, digits: int = 0) -> str:
+    if value is None:
+        return "-"
+    return f"{value:.{digits}f}" if digits else f"{value:.0f}"
+
+
+def _row(label: str, metrics: dict) -> str:
+    costliest = metrics.get("costliest_source")
+    return " | ".join([
+        label,
+        str(metrics["hires"]),
+        _number(metrics["time_to_fill"], 1),
+        _number(metrics["cost_per_hire"]),
+        _number(metrics["build_rate"] * 100),
+        _number(metrics["ijp_rate"] * 100),
+        _number(metrics["diversity_rate"] * 100),
+        _number(metrics["gap"]),
+        _number(metrics["coverage"] * 100 if metrics["coverage"] is not None else None),
+        _number(metrics["stagnant_months"]),
+        f"{costliest[0]} ₹{costliest[1]} div {costliest[2] * 100:.0f}" if costliest else "-",
+    ]) + "\n"
+
+
+def _flag_lines(signals: list) -> str:
+    # The leading emoji costs tokens and tells the model nothing.
+    return "".join(f"  ! {signal.split(' ', 1)[-1]}\n" for signal in signals)
+
+
+def _aggregate(groups: list) -> dict:
+    """One hire-weighted metrics row standing for several groups."""
+    hires = sum(group["Metrics"]["hires"] for group in groups)
+
+    def weighted(name):
+        return sum(group["Metrics"][name] * group["Metrics"]["hires"] for group in groups) / hires if hires else 0.0
+
+    gaps = [group["Metrics"]["gap"] for group in groups if group["Metrics"]["gap"] is not None]
+    gap = sum(gaps) if gaps else None
+    return {
+        "hires": hires,
+        **{name: weighted(name) for name in _COMPARED},
+        "gap": gap,
+        "coverage": hires / (gap + len(gaps)) if gap is not None and gap + len(gaps) else None,
+        "stagnant_months": max(group["Metrics"]["stagnant_months"] for group in groups),
+    }
+
+
+def _collapsed_rows(groups: list) -> list:
+    """The aggregate rows for `groups`: one per business, then a single one as fallback."""
+    by_business = {}
+    for group in groups:
+        by_business.setdefault(group["Business"], []).append(group)
+    per_business = "".join(
+        _row(f"{business} (other {len(members)} functions)" if len(members) > 1 else f"{business} | {members[0]['Function']}",
+             _aggregate(members))
+        for business, members in by_business.items()
+    )
+    single = _row(f"(other {len(groups)} groups)", _aggregate(groups))
+    return [per_business, single]
+
+
+def build(analysis_results: list, token_budget: int = TOKEN_BUDGET) -> str:
+    """The deep-dive prompt for the analysis, within about `token_budget` tokens."""
+    if token_budget <= 0:
+        return verbose_prompt(analysis_results)
+
+    groups = [result for result in analysis_results if "Metrics" in result]
+    failed = len(analysis_results) - len(groups)
+    scores = signal_scores(groups)
+    ranked = [group for _, group in sorted(zip(scores, groups), key=lambda pair: -pair[0])]
+
+    prompt_text = HEADER
+    if len(groups) > 1:
+        prompt_text += _row("ALL", _aggregate(groups))
+    footer = f"({failed} groups could not be analysed.)\n" if failed else ""
+    budget_chars = token_budget * CHARS_PER_TOKEN
+
+    shown = 0
+    for index, group in enumerate(ranked):
+        block = _row(f"{group['Business']} | {group['Function']}", group["Metrics"]) + _flag_lines(group["Signals"])
+        rest = ranked[index + 1:]
+        # Always leave room to summarise whatever is not written out.
+        reserve = min(len(text) for text in _collapsed_rows(rest)) if rest else 0
+        if shown and len(prompt_text) + len(block) + reserve + len(footer) > budget_chars:
+            break
+        prompt_text += block
+        shown += 1
+
+    rest = ranked[shown:]
+    if rest:
+        per_business, single = _collapsed_rows(rest)
+        fits = len(prompt_text) + len(per_business) + len(footer) <= budget_chars
+        prompt_text += per_business if fits else single
+    return prompt_text + footer
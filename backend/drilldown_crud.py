@@ -1,12 +1,25 @@
 # backend/drilldown_crud.py
 
-from sqlalchemy.orm import Session, Query
-from sqlalchemy import func, cast, Float
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, case
+from sqlalchemy.sql import Select
 
 # CORRECTED: Changed relative import to absolute import for deployment
 import models
-
-def _apply_filters(query: Query, model, business_group: str | None, function: str | None) -> Query:
+import rollup
+import cache
+import analytics
+from columnar import Point
+from crud import business_summaries
+
+# Every drilldown query is built by a `*_query` helper. The sync `get_*` functions and
+# their `get_*_async` twins only differ in how they execute it.
+# All of them are memoized per data version by @cache.cached (see cache.py), so they
+# return plain rows or schemas rather than ORM instances.
+# The per-KPI drilldown endpoints are projections of get_all_kpi_drilldowns.
+
+def _apply_filters(query: Select, model, business_group: str | None, function: str | None) -> Select:
     """Helper function to apply common filters (business_group and function)."""
     if business_group:
         query = query.filter(model.business_group == business_group)
@@ -14,9 +27,8 @@ def _apply_filters(query: Query, model, business_group: str | None, function: st
         query = query.filter(model.function == function)
     return query
 
-def get_summary_data(db: Session, business_group: str | None, function: str | None):
-    """Gets the headcount summary data for the provided filters."""
-    query = db.query(models.BusinessSummary)
+def summary_data_query(business_group: str | None, function: str | None) -> Select:
+    query = select(models.BusinessSummary)
     if business_group:
         if function:
             query = query.filter(
@@ -27,103 +39,117 @@ def get_summary_data(db: Session, business_group: str | None, function: str | No
             query = query.filter(models.BusinessSummary.business_group == business_group)
     elif function:
         query = query.filter(models.BusinessSummary.function == function)
-    return query.all()
-
-# --- EXPLICIT, HARDCODED FUNCTIONS FOR EACH KPI DRILL-DOWN ---
-
-# --- Time to Fill ---
-def get_time_to_fill_trend(db: Session, bg: str | None, fn: str | None):
-    q = db.query(
-        func.strftime("%Y-%m", models.Hiring.hire_date).label("label"),
-        func.avg(models.Hiring.time_to_fill).label("value")
-    )
-    return _apply_filters(q, models.Hiring, bg, fn).group_by("label").order_by("label").all()
-
-def get_time_to_fill_breakdown(db: Session, bg: str | None, fn: str | None):
-    breakdown_col = models.Hiring.business_group if fn else models.Hiring.function
-    q = db.query(
-        breakdown_col.label("label"),
-        func.avg(models.Hiring.time_to_fill).label("value")
-    )
-    return _apply_filters(q, models.Hiring, bg, fn).group_by("label").order_by(func.avg(models.Hiring.time_to_fill).desc()).all()
-
-# --- Cost per Hire ---
-def get_cost_per_hire_trend(db: Session, bg: str | None, fn: str | None):
-    q = db.query(
-        func.strftime("%Y-%m", models.Hiring.hire_date).label("label"),
-        func.avg(models.Hiring.cost_per_hire).label("value")
-    )
-    return _apply_filters(q, models.Hiring, bg, fn).group_by("label").order_by("label").all()
-
-def get_cost_per_hire_breakdown(db: Session, bg: str | None, fn: str | None):
-    q = db.query(
-        models.Hiring.source.label("label"),
-        func.avg(models.Hiring.cost_per_hire).label("value")
-    )
-    return _apply_filters(q, models.Hiring, bg, fn).group_by("label").order_by(func.avg(models.Hiring.cost_per_hire).desc()).all()
-
-# --- Diversity Rate ---
-def get_diversity_rate_trend(db: Session, bg: str | None, fn: str | None):
-    q = db.query(
-        func.strftime("%Y-%m", models.Hiring.hire_date).label("label"),
-        func.avg(cast(models.Hiring.diversity_ratio, Float)).label("value")
-    )
-    return _apply_filters(q, models.Hiring, bg, fn).group_by("label").order_by("label").all()
-
-def get_diversity_rate_breakdown(db: Session, bg: str | None, fn: str | None):
-    breakdown_col = models.Hiring.business_group if fn else models.Hiring.function
-    q = db.query(
-        breakdown_col.label("label"),
-        func.avg(cast(models.Hiring.diversity_ratio, Float)).label("value")
-    )
-    return _apply_filters(q, models.Hiring, bg, fn).group_by("label").order_by(func.avg(cast(models.Hiring.diversity_ratio, Float)).desc()).all()
-
-# --- IJP Adherence Rate ---
-def get_ijp_adherence_rate_trend(db: Session, bg: str | None, fn: str | None):
-    q = db.query(
-        func.strftime("%Y-%m", models.Hiring.hire_date).label("label"),
-        func.avg(cast(models.Hiring.ijp_adherence, Float)).label("value")
-    )
-    return _apply_filters(q, models.Hiring, bg, fn).group_by("label").order_by("label").all()
-
-def get_ijp_adherence_rate_breakdown(db: Session, bg: str | None, fn: str | None):
-    breakdown_col = models.Hiring.business_group if fn else models.Hiring.function
-    q = db.query(
-        breakdown_col.label("label"),
-        func.avg(cast(models.Hiring.ijp_adherence, Float)).label("value")
-    )
-    return _apply_filters(q, models.Hiring, bg, fn).group_by("label").order_by(func.avg(cast(models.Hiring.ijp_adherence, Float)).desc()).all()
-
-# --- Build Rate ---
-def get_build_rate_trend(db: Session, bg: str | None, fn: str | None):
-    q = db.query(
-        func.strftime("%Y-%m", models.Hiring.hire_date).label("label"),
-        func.avg(cast(models.Hiring.build_buy_ratio == 'Build', Float)).label("value")
-    )
-    return _apply_filters(q, models.Hiring, bg, fn).group_by("label").order_by("label").all()
-
-def get_build_rate_breakdown(db: Session, bg: str | None, fn: str | None):
-    breakdown_col = models.Hiring.business_group if fn else models.Hiring.function
-    q = db.query(
-        breakdown_col.label("label"),
-        func.avg(cast(models.Hiring.build_buy_ratio == 'Build', Float)).label("value")
-    )
-    return _apply_filters(q, models.Hiring, bg, fn).group_by("label").order_by(func.avg(cast(models.Hiring.build_buy_ratio == 'Build', Float)).desc()).all()
-
-# --- Total Hires (The New KPI) ---
-def get_total_hires_trend(db: Session, bg: str | None, fn: str | None):
-    """Calculates the month-over-month trend for the COUNT of hires."""
-    q = db.query(
-        func.strftime("%Y-%m", models.Hiring.hire_date).label("label"),
-        func.count(models.Hiring.id).label("value") # <-- Using COUNT instead of AVG
-    )
-    return _apply_filters(q, models.Hiring, bg, fn).group_by("label").order_by("label").all()
-
-def get_total_hires_breakdown(db: Session, bg: str | None, fn: str | None):
-    """Calculates the breakdown of the COUNT of hires by another category."""
-    breakdown_col = models.Hiring.business_group if fn else models.Hiring.function
-    q = db.query(
-        breakdown_col.label("label"),
-        func.count(models.Hiring.id).label("value") # <-- Using COUNT instead of AVG
-    )
-    return _apply_filters(q, models.Hiring, bg, fn).group_by("label").order_by(func.count(models.Hiring.id).desc()).all()
+    return query
+
+@cache.cached
+def get_summary_data(db: Session, business_group: str | None, function: str | None):
+    """Gets the headcount summary data for the provided filters."""
+    return business_summaries(db.scalars(summary_data_query(business_group, function)))
+
+@cache.cached
+async def get_summary_data_async(db: AsyncSession, business_group: str | None, function: str | None):
+    """Async version of get_summary_data."""
+    return business_summaries(await db.scalars(summary_data_query(business_group, function)))
+
+# --- All KPIs in one pass ---
+# One grouped query over (month, breakdown dimension, source) with conditional sums
+# for every measure. Folding its rows in Python yields the monthly trend and both
+# breakdowns of all six KPIs, so a drilldown never needs more than one scan.
+
+DRILLDOWN_KPIS = ["time_to_fill", "cost_per_hire", "diversity_rate", "ijp_adherence_rate", "build_rate", "total_hires"]
+
+# Positions of each KPI's numerator and denominator in a cube row's measures: hires,
+# time_to_fill and cost sums, diversity, ijp and build counts, then how many hires have
+# a value for each of those five. Like AVG(), the averages skip hires without a value.
+_CUBE_RATIOS = {
+    "time_to_fill": (1, 6),
+    "cost_per_hire": (2, 7),
+    "diversity_rate": (3, 8),
+    "ijp_adherence_rate": (4, 9),
+    "build_rate": (5, 10),
+    "total_hires": (0, None),
+}
+
+def breakdown_dimension(fn: str | None) -> str:
+    """The drilldowns break down by business group under a function filter, else by function."""
+    return "business_group" if fn else "function"
+
+_R = models.HiringMonthlyRollup
+
+def drilldown_cube_query(bg: str | None, fn: str | None) -> Select:
+    """
+    Rows of (month, dimension, source, hires, time_to_fill sum, cost sum, diversity, ijp,
+    build counts, and the non-NULL counts of time_to_fill, cost, diversity, ijp and build).
+    """
+    dim = breakdown_dimension(fn)
+    if rollup.ENABLED:
+        q = select(
+            _R.month, getattr(_R, dim), _R.source,
+            func.sum(_R.hire_count), func.sum(_R.time_to_fill_sum), func.sum(_R.cost_per_hire_sum),
+            func.sum(_R.diversity_count), func.sum(_R.ijp_adherence_count), func.sum(_R.build_count),
+            func.sum(_R.time_to_fill_known), func.sum(_R.cost_per_hire_known),
+            func.sum(_R.diversity_known), func.sum(_R.ijp_adherence_known), func.sum(_R.build_buy_known),
+        )
+        # The charts are by month, so the undated hirings' buckets stay out of them.
+        q = q.where(_R.month.isnot(None))
+        return _apply_filters(q, _R, bg, fn).group_by(_R.month, getattr(_R, dim), _R.source)
+    h = models.Hiring
+    q = select(
+        h.hire_month, getattr(h, dim), h.source,
+        func.count(h.id),
+        func.coalesce(func.sum(h.time_to_fill), 0),
+        func.coalesce(func.sum(h.cost_per_hire), 0),
+        func.sum(case((h.diversity_ratio == True, 1), else_=0)),
+        func.sum(case((h.ijp_adherence == True, 1), else_=0)),
+        func.sum(case((h.build_buy_ratio == 'Build', 1), else_=0)),
+        func.count(h.time_to_fill), func.count(h.cost_per_hire),
+        func.count(h.diversity_ratio), func.count(h.ijp_adherence), func.count(h.build_buy_ratio),
+    ).where(h.hire_month.isnot(None))
+    return _apply_filters(q, h, bg, fn).group_by(h.hire_month, getattr(h, dim), h.source)
+
+def _points(groups: dict, ratio, by_value: bool):
+    numerator, denominator = ratio
+    points = []
+    for label, measures in groups.items():
+        if denominator is None:
+            points.append(Point(label, int(measures[numerator])))
+        elif measures[denominator]:
+            points.append(Point(label, float(measures[numerator]) / measures[denominator]))
+    if by_value:
+        return sorted(points, key=lambda p: p.value, reverse=True)
+    return sorted(points, key=lambda p: p.label)
+
+def fold_drilldown_cube(rows) -> dict:
+    """
+    Folds cube rows into {"total_hires": n, "kpis": {kpi: {"trend": [...], "breakdown": [...]}}}.
+    Cost per hire is broken down by source, every other KPI by the breakdown dimension.
+    """
+    months, dims, sources = {}, {}, {}
+    for month, dim, source, *measures in rows:
+        for groups, key in ((months, month), (dims, dim), (sources, source)):
+            totals = groups.setdefault(key, [0] * len(measures))
+            for i, value in enumerate(measures):
+                totals[i] += value or 0
+    kpis = {}
+    for kpi in DRILLDOWN_KPIS:
+        ratio = _CUBE_RATIOS[kpi]
+        kpis[kpi] = {
+            "trend": _points(months, ratio, by_value=False),
+            "breakdown": _points(sources if kpi == "cost_per_hire" else dims, ratio, by_value=True),
+        }
+    return {"total_hires": int(sum(m[0] for m in months.values())), "kpis": kpis}
+
+@cache.cached
+def get_all_kpi_drilldowns(db: Session, bg: str | None, fn: str | None) -> dict:
+    """Trend and breakdown data of every drilldown KPI, from a single grouped scan."""
+    backend = analytics.get_backend(db)
+    if backend is not None:
+        return fold_drilldown_cube(backend.drilldown_cube(bg, fn, breakdown_dimension(fn)))
+    return fold_drilldown_cube(db.execute(drilldown_cube_query(bg, fn)).all())
+
+@cache.cached
+async def get_all_kpi_drilldowns_async(db: AsyncSession, bg: str | None, fn: str | None) -> dict:
+    backend = await analytics.get_backend_async(db)
+    if backend is not None:
+        return fold_drilldown_cube(backend.drilldown_cube(bg, fn, breakdown_dimension(fn)))
+    return fold_drilldown_cube((await db.execute(drilldown_cube_query(bg, fn))).all())
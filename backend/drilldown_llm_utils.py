@@ -1,22 +1,16 @@
 import os
 import json
-from openai import OpenAI
 from typing import List, Dict, Union
 
-def get_kpi_specific_insights(analysis_text: str, kpi_name: str) -> Union[List[Dict[str, str]], Dict]:
-    """
-    Sends KPI-specific data to an LLM and gets a structured JSON response
-    containing two detailed, actionable insights for two cards.
-    """
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return [{"title": "Configuration Error", "description": "OPENAI_API_KEY not found."}]
-
-    try:
-        client = OpenAI(api_key=api_key)
-        
-        # This prompt is now specialized for generating two "critical action" cards.
-        system_prompt = f"""
+import insight_stream
+import llm_cache
+
+MODEL = "gpt-4o-mini"
+TEMPERATURE = 0.7 # Slightly higher for more creative action-oriented text
+
+def _system_prompt(kpi_name: str) -> str:
+    # This prompt is now specialized for generating two "critical action" cards.
+    return f"""
         You are an expert HR strategist analyzing data for a specific KPI: '{kpi_name}'.
         Your task is to generate exactly two distinct and meaningful insights based on the provided data summary.
         These insights will be displayed on two separate cards in an executive dashboard.
@@ -29,26 +23,30 @@ def get_kpi_specific_insights(analysis_text: str, kpi_name: str) -> Union[List[D
         You MUST format your entire response as a single, valid JSON array containing exactly two objects.
         """
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": analysis_text}
-            ],
-            temperature=0.7, # Slightly higher for more creative action-oriented text
-            max_tokens=1000,
-        )
-        
-        raw_response_content = response.choices[0].message.content
-        
-        # This robustly handles the case where the AI might wrap the list in a key
-        parsed_json = json.loads(raw_response_content)
-        if isinstance(parsed_json, dict) and len(parsed_json.keys()) == 1:
-            return list(parsed_json.values())[0]
-        
-        return parsed_json
-
-    except Exception as e:
-        print(f"❌ Drilldown LLM Error: {e}")
-        return [{"title": "AI Communication Error", "description": "There was an issue generating insights."}]
\ No newline at end of file
+def _parse_response(raw_response_content: str):
+    # This robustly handles the case where the AI might wrap the list in a key
+    parsed_json = json.loads(raw_response_content)
+    if isinstance(parsed_json, dict) and len(parsed_json.keys()) == 1:
+        return list(parsed_json.values())[0]
+
+    return parsed_json
+
+def insight_key(analysis_text: str, kpi_name: str) -> str:
+    """Fingerprint of an insight request (also the key of its llm_cache entry)."""
+    return llm_cache.fingerprint(MODEL, _system_prompt(kpi_name), analysis_text, TEMPERATURE)
+
+async def get_cached_kpi_insights_async(analysis_text: str, kpi_name: str) -> Union[List[Dict[str, str]], Dict, None]:
+    """The insights from the LLM cache, or None when they still have to be generated."""
+    cached = await llm_cache.get_async(MODEL, _system_prompt(kpi_name), analysis_text, TEMPERATURE)
+    return None if cached is None else _parse_response(cached)
+
+async def stream_kpi_specific_insights(analysis_text: str, kpi_name: str):
+    """Sends KPI-specific data to the LLM and yields each of its two insight cards as it is written."""
+    if not os.getenv("OPENAI_API_KEY"):
+        yield {"title": "Configuration Error", "description": "OPENAI_API_KEY not found."}
+        return
+
+    async for card in insight_stream.stream_cards(
+        _system_prompt(kpi_name), analysis_text, model=MODEL, temperature=TEMPERATURE, max_tokens=1000
+    ):
+        yield card
@@ -1,7 +1,7 @@
 # backend/drilldown_schemas.py
 
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List, Literal
 
 # CORRECTED: Changed the relative import 'from .schemas' to an absolute import 'from schemas'.
 # This allows the server to correctly locate the file during deployment.
@@ -20,6 +20,28 @@ class KpiDrilldownResponse(BaseModel):
     summary_data: List[BusinessSummary]
     trend_chart_data: List[DrilldownChartDataPoint]
     breakdown_chart_data: List[DrilldownChartDataPoint]
-    ai_insights: AI_Insight
+    # Only filled in when the insights were already generated; otherwise fetch them
+    # from /kpis/drilldown/insights/{insight_token}.
+    ai_insights: AI_Insight | None = None
+    insight_token: str
     # Added total_hires to the schema to match the data being returned by the router.
     total_hires: int
+
+# Answer of the insight endpoint: "pending" (HTTP 202) until the insights are ready.
+class DrilldownInsightStatus(BaseModel):
+    status: Literal["pending", "ready"]
+    ai_insights: AI_Insight | None = None
+
+# One KPI's slice of the all-KPI drilldown response.
+class KpiDrilldownData(BaseModel):
+    title: str
+    unit: str
+    breakdown_title: str
+    trend_chart_data: List[DrilldownChartDataPoint]
+    breakdown_chart_data: List[DrilldownChartDataPoint]
+
+# Trend and breakdown data for every KPI at once (no AI insights), keyed by KPI name.
+class AllKpiDrilldownResponse(BaseModel):
+    summary_data: List[BusinessSummary]
+    total_hires: int
+    kpis: Dict[str, KpiDrilldownData]
@@ -0,0 +1,206 @@
+# backend/duckdb_backend.py
+#
+# Runs the KPI, drilldown and insights aggregations on an embedded DuckDB database,
+# which executes them vectorized and spread over all cores.
+#
+# Two ways to get the data into DuckDB:
+#   - DUCKDB_ATTACH=true: ATTACH the primary database itself (SQLite file or Postgres)
+#     through DuckDB's sqlite/postgres extensions, so every query reads live data.
+#   - otherwise (default): copy hirings and business_summaries into DuckDB tables through
+#     Arrow; analytics.py reloads the copy whenever the data changes.
+#
+# Selected with ANALYTICS_BACKEND=duckdb; needs the duckdb and pyarrow packages.
+
+import os
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+import models
+import arrow_export
+
+try:
+    import duckdb
+except ImportError:  # only needed when ANALYTICS_BACKEND=duckdb
+    duckdb = None
+
+# ":memory:" keeps the copy in RAM; a file path lets DuckDB spill larger datasets to disk.
+DUCKDB_PATH = os.getenv("DUCKDB_PATH", ":memory:")
+DUCKDB_ATTACH = os.getenv("DUCKDB_ATTACH", "false").lower() in ("1", "true", "yes")
+DUCKDB_THREADS = os.getenv("DUCKDB_THREADS")  # defaults to DuckDB's own choice (all cores)
+
+_COPY_BATCH_SIZE = 100_000
+
+BREAKDOWN_COLUMNS = {"business_group", "function", "source"}
+
+
+def _where(business_group=None, function=None, start_date=None, end_date=None, case_insensitive=False, dated_only=False):
+    """
+    WHERE clause and its parameters. Like the rollup, rows without a hire_date only count
+    without a date filter (which leaves them out by itself); the monthly drilldowns pass
+    dated_only to drop them altogether.
+    """
+    clauses, params = ["hire_date IS NOT NULL" if dated_only else "TRUE"], []
+    for column, value in (("business_group", business_group), ("function", function)):
+        if value:
+            clauses.append(f"lower({column}) = lower(?)" if case_insensitive else f"{column} = ?")
+            params.append(value)
+    if start_date:
+        clauses.append("hire_date >= ?")
+        params.append(start_date)
+    if end_date:
+        clauses.append("hire_date <= ?")
+        params.append(end_date)
+    return " AND ".join(clauses), params
+
+
+def _copy_table(con, db: Session, table, name: str):
+    """Copies one table into DuckDB, one Arrow record batch per DB cursor batch."""
+    columns = [column.name for column in table.columns]
+    encoder = arrow_export.BatchEncoder(table, columns, dictionary_columns=())
+    result = db.execute(select(*table.columns).execution_options(yield_per=_COPY_BATCH_SIZE))
+    batches = (encoder.encode(batch) for batch in result.partitions())
+    reader = arrow_export.pa.RecordBatchReader.from_batches(encoder.schema, batches)
+    con.register("_source", reader)
+    try:
+        con.execute(f"CREATE OR REPLACE TABLE {name} AS SELECT * FROM _source")
+    finally:
+        con.unregister("_source")
+
+
+def _attach_source(con, url):
+    """ATTACHes the primary database read-only and exposes its tables as views."""
+    if url.get_backend_name() == "sqlite":
+        con.execute("INSTALL sqlite; LOAD sqlite;")
+        con.execute("ATTACH ? AS src (TYPE sqlite, READ_ONLY)", [url.database])
+    else:
+        con.execute("INSTALL postgres; LOAD postgres;")
+        dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        con.execute("ATTACH ? AS src (TYPE postgres, READ_ONLY)", [dsn])
+    for name in ("hirings", "business_summaries"):
+        con.execute(f"CREATE OR REPLACE VIEW {name} AS SELECT * FROM src.{name}")
+
+
+class DuckDBBackend:
+    """Analytics backend answering the KPI queries with DuckDB SQL."""
+
+    def __init__(self, con, version):
+        self.con = con
+        self.version = version
+        self._in_flight = 0
+        self._retired = False
+        self._state_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, db: Session, version=None) -> "DuckDBBackend":
+        if duckdb is None:
+            raise RuntimeError("ANALYTICS_BACKEND=duckdb needs the duckdb package, which is not installed.")
+        con = duckdb.connect(DUCKDB_PATH)
+        if DUCKDB_THREADS:
+            con.execute(f"SET threads = {int(DUCKDB_THREADS)}")
+        if DUCKDB_ATTACH:
+            _attach_source(con, make_url(str(db.bind.url)))
+        else:
+            _copy_table(con, db, models.Hiring.__table__, "hirings")
+            _copy_table(con, db, models.BusinessSummary.__table__, "business_summaries")
+        return cls(con, version)
+
+    @contextmanager
+    def _holding(self):
+        """Keeps the connection open until the block is done, even if retire() is called meanwhile."""
+        with self._state_lock:
+            if self.con is None:
+                raise RuntimeError("This DuckDB snapshot was replaced and closed; fetch the current backend.")
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._state_lock:
+                self._in_flight -= 1
+                self._close_if_done()
+
+    def _query(self, sql: str, params=(), fetch="fetchall"):
+        # A cursor per query gives each (threadpool or event loop) caller its own
+        # connection handle onto the shared database; one handle is not thread-safe.
+        with self._holding():
+            cursor = self.con.cursor()
+            try:
+                return getattr(cursor.execute(sql, params), fetch)()
+            finally:
+                cursor.close()
+
+    def retire(self):
+        """Closes the connection once the queries still running on this snapshot are done."""
+        with self._state_lock:
+            self._retired = True
+            self._close_if_done()
+
+    def _close_if_done(self):
+        if self._retired and self._in_flight == 0 and self.con is not None:
+            self.con.close()
+            self.con = None
+
+    def kpi_aggregates(self, business_group=None, function=None, start_date=None, end_date=None):
+        """Same fields as the SQL KPI aggregate row, ready for crud._format_kpi_aggregates."""
+        where, params = _where(business_group, function, start_date, end_date)
+        row = self._query(f"""
+            SELECT
+                avg(time_to_fill),
+                avg(cost_per_hire),
+                avg(CASE WHEN ijp_adherence THEN 1.0 ELSE 0.0 END),
+                avg(CASE WHEN build_buy_ratio = 'Build' THEN 1.0 ELSE 0.0 END),
+                avg(CASE WHEN diversity_ratio THEN 1.0 ELSE 0.0 END),
+                count(*)
+            FROM hirings WHERE {where}
+        """, params, fetch="fetchone")
+        return SimpleNamespace(
+            avg_time_to_fill=row[0],
+            avg_cost_per_hire=row[1],
+            ijp_adherence_rate=row[2],
+            build_buy_rate=row[3],
+            diversity_hire_rate=row[4],
+            total_hires=row[5],
+        )
+
+    def drilldown_cube(self, business_group=None, function=None, dim="function"):
+        """
+        Rows of (month, dim, source, hires, time_to_fill sum, cost sum, diversity, ijp,
+        build counts, then the non-NULL count of each of those five).
+        """
+        if dim not in BREAKDOWN_COLUMNS:
+            raise ValueError(f"Unknown breakdown column: {dim}")
+        where, params = _where(business_group, function, dated_only=True)
+        return self._query(f"""
+            SELECT
+                hire_month, {dim}, source,
+                count(*),
+                sum(coalesce(time_to_fill, 0)),
+                sum(coalesce(cost_per_hire, 0)),
+                count_if(diversity_ratio),
+                count_if(ijp_adherence),
+                count_if(build_buy_ratio = 'Build'),
+                count(time_to_fill),
+                count(cost_per_hire),
+                count(diversity_ratio),
+                count(ijp_adherence),
+                count(build_buy_ratio)
+            FROM hirings WHERE {where}
+            GROUP BY hire_month, {dim}, source
+        """, params)
+
+    def frames(self, business_group=None, function=None, start_date=None, end_date=None):
+        """
+        The insights inputs: the filtered hirings (business group/function matched
+        case-insensitively, as the pandas filters do) and all business summaries.
+        """
+        where, params = _where(business_group, function, start_date, end_date, case_insensitive=True)
+        with self._holding():
+            hirings_df = self._query(f"SELECT * FROM hirings WHERE {where}", params, fetch="df")
+            summaries_df = self._query("SELECT * FROM business_summaries", fetch="df")
+        hirings_df["hire_date"] = pd.to_datetime(hirings_df["hire_date"])
+        return hirings_df, summaries_df
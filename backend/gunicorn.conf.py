@@ -0,0 +1,20 @@
+# backend/gunicorn.conf.py
+#
+# Usage: gunicorn main:app -c gunicorn.conf.py
+# Pair with DB_ENGINE_PROFILE=web (or snapshot for a read-only SQLite file).
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("GUNICORN_PRELOAD", "false").lower() in ("1", "true", "yes")
+
+
+def post_fork(server, worker):
+    # With preload_app the engine is created in the master. Forked workers must not
+    # reuse the master's pooled connections, so drop them (without closing the
+    # parent's sockets) and let each worker open its own.
+    if preload_app:
+        from database import engine
+        engine.dispose(close=False)
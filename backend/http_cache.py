@@ -0,0 +1,123 @@
+# backend/http_cache.py
+#
+# Conditional GETs for the read API. Every response from a GET under /api/v1 is a pure
+# function of the path, the query string and the data (data_version.py), so its ETag
+# is derived from exactly those three and can be computed before the route runs. A
+# request whose If-None-Match carries that ETag is answered 304 Not Modified right here,
+# without opening a route session or querying the database.
+#
+# The AI insight endpoints are the exception: their answer also depends on the LLM (an
+# error card now may be real insights on the next try), so they get no ETag. Neither
+# does the dashboard bootstrap when include_insights asks it to embed them.
+#
+# The version is normally already known in-process, so a 304 costs a hash and no I/O.
+#
+#   HTTP_CACHE_ENABLED=false        turns ETags and Cache-Control off
+#   HTTP_CACHE_MAX_AGE=0            seconds a client may reuse a response without asking;
+#                                   0 means it revalidates every time (cheap: usually a 304)
+#   HTTP_CACHE_ETAG_SALT            change on deploys that change response formats, so old
+#                                   ETags stop matching (e.g. the git commit)
+
+import hashlib
+import os
+from urllib.parse import parse_qsl
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+
+import data_version
+from database import open_async_read_session
+
+ENABLED = os.getenv("HTTP_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "0"))
+ETAG_SALT = os.getenv("HTTP_CACHE_ETAG_SALT", "")
+
+CACHE_CONTROL = f"public, max-age={MAX_AGE}, must-revalidate"
+
+# Responses that are not a function of the data alone.
+UNCACHEABLE_PREFIXES = ("/api/v1/stats/", "/api/v1/insights/", "/api/v1/kpis/drilldown/insights/")
+
+# Responses that embed LLM output when a boolean query parameter is set: path -> parameter.
+UNCACHEABLE_WITH = {"/api/v1/dashboard/bootstrap": "include_insights"}
+
+# The query values FastAPI reads as a true bool.
+_TRUE_VALUES = ("1", "true", "on", "yes", "y", "t")
+
+
+async def _current_version() -> int:
+    version = data_version.known()
+    if version is not None:
+        return version
+    db = await open_async_read_session()
+    try:
+        return await data_version.current_async(db)
+    finally:
+        await db.close()
+
+
+def _normalized_query(query_string: bytes) -> list:
+    """Query parameters in a canonical order, without empty values (which routes treat as unset)."""
+    params = parse_qsl(query_string.decode("latin-1"))
+    return sorted((key, value.strip()) for key, value in params if value.strip())
+
+
+def make_etag(version: int, path: str, query_string: bytes) -> str:
+    """A weak ETag: equal for semantically equal responses, e.g. LLM text generated twice."""
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(repr((ETAG_SALT, version, path.rstrip("/"), _normalized_query(query_string))).encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison against an If-None-Match list (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+class ConditionalGetMiddleware:
+    """ASGI middleware adding ETag/Cache-Control to GET responses and answering 304s."""
+
+    def __init__(self, app, prefix: str = "/api/v1"):
+        self.app = app
+        self.prefix = prefix
+
+    def _applies(self, scope) -> bool:
+        if not ENABLED or scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            return False
+        path = scope["path"]
+        if not path.startswith(self.prefix) or path.startswith(UNCACHEABLE_PREFIXES):
+            return False
+        flag = UNCACHEABLE_WITH.get(path.rstrip("/"))
+        return flag is None or not any(
+            key == flag and value.lower() in _TRUE_VALUES
+            for key, value in _normalized_query(scope.get("query_string", b""))
+        )
+
+    async def __call__(self, scope, receive, send):
+        if not self._applies(scope):
+            await self.app(scope, receive, send)
+            return
+
+        etag = make_etag(await _current_version(), scope["path"], scope.get("query_string", b""))
+        if etag_matches(Headers(scope=scope).get("if-none-match"), etag):
+            response = Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+            await response(scope, receive, send)
+            return
+
+        async def send_with_validators(message):
+            # An answer from an outdated analytics snapshot must not be filed under this ETag.
+            if message["type"] == "http.response.start" and message["status"] == 200 and not staleness["stale"]:
+                headers = MutableHeaders(scope=message)
+                # Event streams are live, not a snapshot of the data.
+                if not headers.get("content-type", "").startswith("text/event-stream") and "etag" not in headers:
+                    headers["ETag"] = etag
+                    if "cache-control" not in headers:
+                        headers["Cache-Control"] = CACHE_CONTROL
+            await send(message)
+
+        with data_version.tracking_staleness() as staleness:
+            await self.app(scope, receive, send_with_validators)
@@ -0,0 +1,107 @@
+# backend/insight_jobs.py
+#
+# In-process registry of LLM insight generations that run in the background, so an
+# endpoint can answer with its data right away and let the client collect the
+# insights later. Jobs are keyed by the prompt fingerprint: a request for insights
+# that are already being generated joins the running job instead of starting another.
+# Finished jobs are kept for INSIGHT_JOB_RESULT_TTL_SECONDS so that results which are
+# not in the persistent LLM cache (errors) can still be collected.
+#
+# A job can also publish partial results (insight cards, as the model writes them)
+# that any number of streaming requests follow() while it runs.
+
+import asyncio
+import os
+
+import timings
+
+RESULT_TTL_SECONDS = float(os.getenv("INSIGHT_JOB_RESULT_TTL_SECONDS", "300"))
+
+_jobs: dict[str, asyncio.Task] = {}
+# Where each job's time went (timings.py), keyed by the job itself.
+_phases: dict[asyncio.Task, dict] = {}
+
+
+class _Progress:
+    """The partial results a job has published so far."""
+
+    def __init__(self):
+        self.items = []
+        self.changed = asyncio.Event()
+
+    def publish(self, item):
+        self.items.append(item)
+        self.notify()
+
+    def notify(self):
+        # Wakes everyone waiting on the current event; later waiters get a fresh one.
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+_progress: dict[asyncio.Task, _Progress] = {}
+
+
+def _forget(key: str, job: asyncio.Task):
+    _phases.pop(job, None)
+    _progress.pop(job, None)
+    if _jobs.get(key) is job:
+        del _jobs[key]
+
+
+def phases(job: asyncio.Task) -> dict:
+    """The time the job spent per phase; it is not part of the request that started it."""
+    return _phases.get(job, {})
+
+
+def get(key: str) -> asyncio.Task | None:
+    """The running or recently finished job for `key`, if this process has one."""
+    return _jobs.get(key)
+
+
+def start(key: str, make_coroutine) -> asyncio.Task:
+    """
+    Runs `make_coroutine(publish)` as a background task under `key`, unless that job
+    already exists. The coroutine may call publish(item) to share partial results.
+    """
+    job = _jobs.get(key)
+    if job is None:
+        loop = asyncio.get_running_loop()
+        job_phases = {}
+        progress = _Progress()
+
+        async def run():
+            timings.begin(job_phases)
+            return await make_coroutine(progress.publish)
+
+        job = loop.create_task(run())
+        _jobs[key] = job
+        _phases[job] = job_phases
+        _progress[job] = progress
+        job.add_done_callback(lambda done: progress.notify())
+        job.add_done_callback(lambda done: loop.call_later(RESULT_TTL_SECONDS, _forget, key, done))
+    return job
+
+
+async def follow(job: asyncio.Task):
+    """Yields everything the job has published and will publish, until it finishes."""
+    progress = _progress.get(job) or _Progress()
+    sent = 0
+    while True:
+        changed = progress.changed
+        while sent < len(progress.items):
+            yield progress.items[sent]
+            sent += 1
+        if job.done():
+            return
+        await changed.wait()
+
+
+async def wait(job: asyncio.Task, timeout: float) -> bool:
+    """Waits up to `timeout` seconds for a job (without cancelling it) and tells whether it finished."""
+    if timeout > 0 and not job.done():
+        try:
+            await asyncio.wait_for(asyncio.shield(job), timeout)
+        except asyncio.TimeoutError:
+            pass
+    return job.done()
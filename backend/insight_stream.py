@@ -0,0 +1,147 @@
+# backend/insight_stream.py
+#
+# Streaming of insight cards over Server-Sent Events. The model is asked for the usual
+# JSON (an array of {"title", "description"} cards, possibly wrapped in an object) and
+# streamed token by token; CardParser spots each card the moment its closing brace
+# arrives, so the first card reaches the browser long before the answer is complete.
+#
+# The SSE body sends one `card` event per card, `heartbeat` events while nothing else
+# is happening (analysis, waiting for the first token), and ends with `done` or
+# `error`. When the client disconnects, the producer is cancelled, which closes the
+# upstream LLM stream.
+#
+#   SSE_HEARTBEAT_SECONDS=10
+
+import asyncio
+import json
+import os
+
+import llm_cache
+import llm_gateway
+
+HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "10"))
+
+# Proxies (nginx) must not buffer the stream, and nobody should cache it.
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+class CardParser:
+    """Finds the insight cards in JSON text that arrives in pieces."""
+
+    def __init__(self):
+        self._text = ""
+        self._scanned = 0
+        self._in_string = False
+        self._escaped = False
+        self._open_objects = []
+
+    def feed(self, chunk: str) -> list:
+        """Adds the next piece of text and returns the cards it completed."""
+        self._text += chunk
+        cards = []
+        for index in range(self._scanned, len(self._text)):
+            char = self._text[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._open_objects.append(index)
+            elif char == "}" and self._open_objects:
+                start = self._open_objects.pop()
+                try:
+                    value = json.loads(self._text[start:index + 1])
+                except ValueError:
+                    continue
+                if isinstance(value, dict) and "title" in value and "description" in value:
+                    cards.append(value)
+        self._scanned = len(self._text)
+        return cards
+
+
+def cards_of(parsed) -> list:
+    """The cards in a parsed answer: a bare array, or an object wrapping one."""
+    if isinstance(parsed, list):
+        return parsed
+    if isinstance(parsed, dict):
+        lists = [value for value in parsed.values() if isinstance(value, list)]
+        if len(lists) == 1:
+            return lists[0]
+    return []
+
+
+async def stream_cards(system_prompt: str, user_prompt: str, *, model: str, temperature: float, max_tokens: int):
+    """
+    Yields the cards of a completion as they are generated. Cached answers are
+    replayed at once; a fresh answer is cached once it is complete and valid JSON.
+    """
+    cached = await llm_cache.get_async(model, system_prompt, user_prompt, temperature)
+    if cached is not None:
+        for card in cards_of(json.loads(cached)):
+            yield card
+        return
+
+    parser = CardParser()
+    chunks = []
+    async for text in llm_gateway.stream_async(
+        system_prompt, user_prompt, model=model, temperature=temperature, max_tokens=max_tokens
+    ):
+        chunks.append(text)
+        for card in parser.feed(text):
+            yield card
+
+    raw_response_content = "".join(chunks)
+    json.loads(raw_response_content)  # only complete, valid answers are cached
+    await llm_cache.put_async(model, system_prompt, user_prompt, temperature, raw_response_content)
+
+
+async def replay(cards: list):
+    """An already known list of cards, as a card stream."""
+    for card in cards:
+        yield card
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def event_stream(request, cards):
+    """The SSE body for an async iterator of cards."""
+    queue = asyncio.Queue()
+
+    async def produce():
+        try:
+            async for card in cards:
+                await queue.put(("card", card))
+            await queue.put(("done", None))
+        except Exception as e:
+            print(f"❌ Insight stream error: {e}")
+            await queue.put(("error", str(e)))
+
+    producer = asyncio.create_task(produce())
+    count = 0
+    try:
+        while True:
+            try:
+                kind, payload = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield sse_event("heartbeat", {})
+                continue
+            if kind == "card":
+                count += 1
+                yield sse_event("card", payload)
+            elif kind == "done":
+                yield sse_event("done", {"count": count})
+                return
+            else:
+                yield sse_event("error", {"message": payload})
+                return
+    finally:
+        producer.cancel()
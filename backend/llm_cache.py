@@ -0,0 +1,286 @@
+# backend/llm_cache.py
+#
+# Persistent cache of LLM completions in the llm_cache table. For a given filter set the
+# insight prompts are byte-for-byte identical until the data changes (and then the
+# prompt changes with it), so the completion is keyed on a SHA-256 of model, system
+# prompt, user prompt and temperature. Only responses that parsed successfully are
+# stored; errors are never cached. The cache is shared by every worker and survives
+# restarts, and it never gets in the way: a database error is a miss.
+#
+# A hit only reads. Its hit count and last-use time are kept in memory and written in
+# one batched UPDATE every LLM_CACHE_TOUCH_FLUSH_SECONDS by a background thread, so
+# the LRU eviction sees them that much later.
+#
+#   LLM_CACHE_ENABLED=false          always call the model
+#   LLM_CACHE_TTL_SECONDS=604800     entries older than this are ignored and purged
+#   LLM_CACHE_MAX_ENTRIES=10000      least recently used entries are evicted beyond this
+#   LLM_CACHE_TOUCH_FLUSH_SECONDS=30
+#
+# Usage: python llm_cache.py purge            -> deletes every entry
+#        python llm_cache.py purge --expired  -> deletes only the expired ones
+#        python llm_cache.py stats
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
+import models
+from database import AsyncSessionLocal, READ_ONLY, SessionLocal
+
+ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+TOUCH_FLUSH_SECONDS = float(os.getenv("LLM_CACHE_TOUCH_FLUSH_SECONDS", "30"))
+
+_E = models.LlmCacheEntry
+
+_counters = {"hits": 0, "misses": 0, "stores": 0, "errors": 0}
+_counters_lock = threading.Lock()
+
+
+def _count(name: str):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def fingerprint(model: str, system_prompt: str, user_prompt: str, temperature: float) -> str:
+    """The cache key of one completion request."""
+    payload = json.dumps([model, system_prompt, user_prompt, temperature], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# === Statements (shared by the sync and async paths) ===
+
+def _lookup(key: str):
+    return select(_E.response).where(_E.key == key, _E.created_at > time.time() - TTL_SECONDS)
+
+
+def _store(key: str, model: str, response: str, dialect_name: str):
+    now = time.time()
+    row = {"key": key, "model": model, "response": response, "created_at": now, "last_used_at": now, "hits": 0}
+    if dialect_name in ("sqlite", "postgresql"):
+        if dialect_name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(_E).values(row)
+        # Two workers that missed at the same time both store; the later one wins.
+        return stmt.on_conflict_do_update(
+            index_elements=["key"],
+            set_={"response": stmt.excluded.response, "created_at": now, "last_used_at": now},
+        )
+    return insert(_E).values(row)
+
+
+def _evictions():
+    expired = delete(_E).where(_E.created_at <= time.time() - TTL_SECONDS)
+    overflow = select(_E.key).order_by(_E.last_used_at.desc()).offset(MAX_ENTRIES).scalar_subquery()
+    return [expired, delete(_E).where(_E.key.in_(overflow))]
+
+
+# === Hit bookkeeping ===
+
+# key -> (hits, last used at) of the hits not written to the table yet.
+_touches = {}
+_touches_lock = threading.Lock()
+_flusher_pid = None
+
+
+def _touch(key: str):
+    """Records a hit; the background flusher writes it to the table."""
+    global _flusher_pid
+    if READ_ONLY:
+        return
+    with _touches_lock:
+        hits, _ = _touches.get(key, (0, 0.0))
+        _touches[key] = (hits + 1, time.time())
+        # Threads don't survive a fork, so each (gunicorn) worker starts its own.
+        if _flusher_pid != os.getpid():
+            _flusher_pid = os.getpid()
+            threading.Thread(target=_flush_forever, name="llm-cache-touches", daemon=True).start()
+
+
+def _flush_forever():
+    while True:
+        time.sleep(TOUCH_FLUSH_SECONDS)
+        flush_touches()
+
+
+def flush_touches():
+    """Writes the recorded hits and last-use times in one batched UPDATE."""
+    global _touches
+    with _touches_lock:
+        pending, _touches = _touches, {}
+    if not pending:
+        return
+    table = _E.__table__
+    stmt = (
+        update(table)
+        .where(table.c.key == bindparam("touched_key"))
+        .values(last_used_at=bindparam("used_at"), hits=table.c.hits + bindparam("new_hits"))
+    )
+    db = SessionLocal()
+    try:
+        db.execute(stmt, [
+            {"touched_key": key, "used_at": used_at, "new_hits": hits}
+            for key, (hits, used_at) in pending.items()
+        ])
+        db.commit()
+    except DBAPIError as e:
+        db.rollback()
+        print(f"⚠️ LLM cache hit bookkeeping failed: {e}")
+        _count("errors")
+    finally:
+        db.close()
+
+
+atexit.register(flush_touches)
+
+
+# === Sync API ===
+
+def get(model: str, system_prompt: str, user_prompt: str, temperature: float) -> str | None:
+    """The cached raw response for this request, or None."""
+    if not ENABLED:
+        return None
+    key = fingerprint(model, system_prompt, user_prompt, temperature)
+    db = SessionLocal()
+    try:
+        response = db.execute(_lookup(key)).scalar()
+    except DBAPIError as e:
+        print(f"⚠️ LLM cache read failed: {e}")
+        _count("errors")
+        return None
+    finally:
+        db.close()
+    if response is not None:
+        _touch(key)
+    _count("hits" if response is not None else "misses")
+    return response
+
+
+def put(model: str, system_prompt: str, user_prompt: str, temperature: float, response: str):
+    """Stores a raw response, then drops expired entries and any beyond MAX_ENTRIES."""
+    if not ENABLED or READ_ONLY:
+        return
+    key = fingerprint(model, system_prompt, user_prompt, temperature)
+    db = SessionLocal()
+    try:
+        db.execute(_store(key, model, response, db.bind.dialect.name))
+        for stmt in _evictions():
+            db.execute(stmt)
+        db.commit()
+        _count("stores")
+    except IntegrityError:
+        db.rollback()  # stored concurrently by another worker
+    except DBAPIError as e:
+        db.rollback()
+        print(f"⚠️ LLM cache write failed: {e}")
+        _count("errors")
+    finally:
+        db.close()
+
+
+# === Async API ===
+
+async def get_async(model: str, system_prompt: str, user_prompt: str, temperature: float) -> str | None:
+    """get() on the async engine."""
+    if not ENABLED:
+        return None
+    key = fingerprint(model, system_prompt, user_prompt, temperature)
+    async with AsyncSessionLocal() as db:
+        try:
+            response = (await db.execute(_lookup(key))).scalar()
+        except DBAPIError as e:
+            print(f"⚠️ LLM cache read failed: {e}")
+            _count("errors")
+            return None
+    if response is not None:
+        _touch(key)
+    _count("hits" if response is not None else "misses")
+    return response
+
+
+async def put_async(model: str, system_prompt: str, user_prompt: str, temperature: float, response: str):
+    """put() on the async engine."""
+    if not ENABLED or READ_ONLY:
+        return
+    key = fingerprint(model, system_prompt, user_prompt, temperature)
+    async with AsyncSessionLocal() as db:
+        try:
+            await db.execute(_store(key, model, response, db.bind.dialect.name))
+            for stmt in _evictions():
+                await db.execute(stmt)
+            await db.commit()
+            _count("stores")
+        except IntegrityError:
+            await db.rollback()
+        except DBAPIError as e:
+            await db.rollback()
+            print(f"⚠️ LLM cache write failed: {e}")
+            _count("errors")
+
+
+# === Maintenance ===
+
+def purge(expired_only: bool = False) -> int:
+    """Deletes all entries (or only the expired ones) and returns how many were removed."""
+    stmt = delete(_E)
+    if expired_only:
+        stmt = stmt.where(_E.created_at <= time.time() - TTL_SECONDS)
+    db = SessionLocal()
+    try:
+        removed = db.execute(stmt).rowcount
+        db.commit()
+        return removed
+    finally:
+        db.close()
+
+
+def stats() -> dict:
+    """This worker's hit/miss counters plus the size of the shared table."""
+    with _counters_lock:
+        counters = dict(_counters)
+    lookups = counters["hits"] + counters["misses"]
+    db = SessionLocal()
+    try:
+        entries = db.execute(select(func.count()).select_from(_E)).scalar()
+    except DBAPIError:
+        entries = None
+    finally:
+        db.close()
+    return {
+        "enabled": ENABLED,
+        "entries": entries,
+        "max_entries": MAX_ENTRIES,
+        "ttl_seconds": TTL_SECONDS,
+        **counters,
+        "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from database import engine
+    from migrations import run_migrations
+
+    parser = argparse.ArgumentParser(description="Manage the persistent LLM response cache.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    purge_parser = commands.add_parser("purge", help="delete cached responses")
+    purge_parser.add_argument("--expired", action="store_true", help="only delete entries older than the TTL")
+    commands.add_parser("stats", help="show the number of cached responses")
+    args = parser.parse_args()
+
+    run_migrations(engine)
+    if args.command == "purge":
+        removed = purge(expired_only=args.expired)
+        print(f"✅ Removed {removed} cached LLM responses.")
+    else:
+        print(json.dumps(stats(), indent=2))
@@ -0,0 +1,280 @@
+# backend/llm_gateway.py
+#
+# The one way this backend talks to the LLM. It keeps a single pooled client per
+# process (one sync, one async per event loop), so HTTP connections and TLS sessions
+# are reused across calls, and wraps every completion in:
+#
+#   - connect/read timeouts, so a hung upstream cannot hold a worker indefinitely;
+#   - retries with full-jitter exponential backoff on connection errors, timeouts,
+#     429s and 5xx, all within one total deadline per call;
+#   - a per-process concurrency limit (LLM_MAX_CONCURRENCY calls in flight per kind,
+#     sync and async), so a burst of cache misses queues instead of stampeding;
+#   - timing metrics for every call (see stats()).
+#
+#   OPENAI_API_KEY
+#   OPENAI_BASE_URL                  point at a local stand-in of the OpenAI API for testing
+#   LLM_CONNECT_TIMEOUT_SECONDS=5
+#   LLM_READ_TIMEOUT_SECONDS=30
+#   LLM_DEADLINE_SECONDS=45          total budget of one call, queueing and retries included
+#   LLM_MAX_RETRIES=3
+#   LLM_MAX_CONCURRENCY=8
+
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from collections import deque
+
+import openai
+from openai import AsyncOpenAI, OpenAI
+
+import timings
+
+CONNECT_TIMEOUT_SECONDS = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", "5"))
+READ_TIMEOUT_SECONDS = float(os.getenv("LLM_READ_TIMEOUT_SECONDS", "30"))
+DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "45"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_CAP_SECONDS = 8.0
+
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,  # includes APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class LlmUnavailable(Exception):
+    """The call could not be completed within its deadline."""
+
+
+# === Clients ===
+
+_sync_client = None
+_sync_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+_sync_slots = threading.BoundedSemaphore(MAX_CONCURRENCY)
+_async_slots = weakref.WeakKeyDictionary()
+
+
+def _client_options() -> dict:
+    return {
+        "api_key": os.getenv("OPENAI_API_KEY"),
+        "base_url": os.getenv("OPENAI_BASE_URL") or None,
+        "timeout": openai.Timeout(READ_TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS),
+        "max_retries": 0,  # retries are done here, within the deadline
+    }
+
+
+def sync_client() -> OpenAI:
+    """The process-wide sync client."""
+    global _sync_client
+    if _sync_client is None:
+        with _sync_lock:
+            if _sync_client is None:
+                _sync_client = OpenAI(**_client_options())
+    return _sync_client
+
+
+def async_client() -> AsyncOpenAI:
+    """The async client of the running event loop (its connections belong to that loop)."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncOpenAI(**_client_options())
+    return client
+
+
+def _async_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    slots = _async_slots.get(loop)
+    if slots is None:
+        slots = _async_slots[loop] = asyncio.Semaphore(MAX_CONCURRENCY)
+    return slots
+
+
+# === Metrics ===
+
+class _Metrics:
+    def __init__(self, recent: int = 200):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.in_flight = 0
+        self.recent = deque(maxlen=recent)
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, model: str, queued: float, elapsed: float, attempts: int, ok: bool):
+        with self._lock:
+            self.in_flight -= 1
+            self.calls += 1
+            self.retries += attempts - 1
+            if not ok:
+                self.failures += 1
+            self.recent.append({
+                "model": model,
+                "queued_ms": round(queued * 1000, 1),
+                "elapsed_ms": round(elapsed * 1000, 1),
+                "attempts": attempts,
+                "ok": ok,
+            })
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = sorted(call["elapsed_ms"] for call in self.recent if call["ok"])
+            return {
+                "calls": self.calls,
+                "failures": self.failures,
+                "retries": self.retries,
+                "in_flight": self.in_flight,
+                "max_concurrency": MAX_CONCURRENCY,
+                "p50_ms": latencies[len(latencies) // 2] if latencies else None,
+                "p95_ms": latencies[int(len(latencies) * 0.95)] if latencies else None,
+                "recent": list(self.recent)[-20:],
+            }
+
+
+metrics = _Metrics()
+
+
+def stats() -> dict:
+    """Counters and recent per-call timings of this process."""
+    return metrics.snapshot()
+
+
+# === Completions ===
+
+def _request(model, system_prompt, user_prompt, temperature, max_tokens, json_response) -> dict:
+    request = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+    if json_response:
+        request["response_format"] = {"type": "json_object"}
+    return request
+
+
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def _attempt_timeout(deadline: float) -> openai.Timeout:
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise LlmUnavailable(f"LLM call exceeded its {DEADLINE_SECONDS:.0f}s deadline.")
+    return openai.Timeout(min(READ_TIMEOUT_SECONDS, remaining), connect=min(CONNECT_TIMEOUT_SECONDS, remaining))
+
+
+def complete(system_prompt: str, user_prompt: str, *, model: str, temperature: float,
+             max_tokens: int, json_response: bool = True) -> str:
+    """Runs one chat completion and returns the message content."""
+    request = _request(model, system_prompt, user_prompt, temperature, max_tokens, json_response)
+    started = time.monotonic()
+    deadline = started + DEADLINE_SECONDS
+    if not _sync_slots.acquire(timeout=DEADLINE_SECONDS):
+        raise LlmUnavailable("Too many LLM calls in flight.")
+    queued = time.monotonic() - started
+    metrics.started()
+    attempts, ok = 0, False
+    try:
+        while True:
+            attempts += 1
+            try:
+                response = sync_client().chat.completions.create(**request, timeout=_attempt_timeout(deadline))
+                ok = True
+                return response.choices[0].message.content
+            except RETRYABLE_ERRORS:
+                pause = _backoff(attempts)
+                if attempts > MAX_RETRIES or time.monotonic() + pause >= deadline:
+                    raise
+                time.sleep(pause)
+    finally:
+        _sync_slots.release()
+        metrics.finished(model, queued, time.monotonic() - started, attempts, ok)
+        timings.add("llm", time.monotonic() - started)
+
+
+async def complete_async(system_prompt: str, user_prompt: str, *, model: str, temperature: float,
+                         max_tokens: int, json_response: bool = True) -> str:
+    """complete() on the event loop."""
+    request = _request(model, system_prompt, user_prompt, temperature, max_tokens, json_response)
+    started = time.monotonic()
+    deadline = started + DEADLINE_SECONDS
+    slots = _async_semaphore()
+    try:
+        await asyncio.wait_for(slots.acquire(), DEADLINE_SECONDS)
+    except asyncio.TimeoutError:
+        raise LlmUnavailable("Too many LLM calls in flight.")
+    queued = time.monotonic() - started
+    metrics.started()
+    attempts, ok = 0, False
+    try:
+        while True:
+            attempts += 1
+            try:
+                response = await async_client().chat.completions.create(**request, timeout=_attempt_timeout(deadline))
+                ok = True
+                return response.choices[0].message.content
+            except RETRYABLE_ERRORS:
+                pause = _backoff(attempts)
+                if attempts > MAX_RETRIES or time.monotonic() + pause >= deadline:
+                    raise
+                await asyncio.sleep(pause)
+    finally:
+        slots.release()
+        metrics.finished(model, queued, time.monotonic() - started, attempts, ok)
+        timings.add("llm", time.monotonic() - started)
+
+
+async def stream_async(system_prompt: str, user_prompt: str, *, model: str, temperature: float,
+                       max_tokens: int, json_response: bool = True):
+    """
+    Streams one chat completion, yielding its content as it is generated. Only opening
+    the stream is retried (nothing has been yielded yet then); once tokens flow, the
+    read timeout bounds the wait for each chunk. Closing the generator (e.g. when the
+    client went away) closes the upstream response.
+    """
+    request = {**_request(model, system_prompt, user_prompt, temperature, max_tokens, json_response), "stream": True}
+    started = time.monotonic()
+    deadline = started + DEADLINE_SECONDS
+    slots = _async_semaphore()
+    try:
+        await asyncio.wait_for(slots.acquire(), DEADLINE_SECONDS)
+    except asyncio.TimeoutError:
+        raise LlmUnavailable("Too many LLM calls in flight.")
+    queued = time.monotonic() - started
+    metrics.started()
+    attempts, ok = 0, False
+    try:
+        while True:
+            attempts += 1
+            try:
+                stream = await async_client().chat.completions.create(**request, timeout=_attempt_timeout(deadline))
+                break
+            except RETRYABLE_ERRORS:
+                pause = _backoff(attempts)
+                if attempts > MAX_RETRIES or time.monotonic() + pause >= deadline:
+                    raise
+                await asyncio.sleep(pause)
+        async with stream:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        ok = True
+    finally:
+        slots.release()
+        metrics.finished(model, queued, time.monotonic() - started, attempts, ok)
+        timings.add("llm", time.monotonic() - started)
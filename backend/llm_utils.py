@@ -2,21 +2,16 @@
 
 import os
 import json
-from openai import OpenAI
 from typing import List, Dict, Union
 
-def get_insights_from_llm(analysis_text: str) -> Union[List[Dict[str, str]], Dict]:
-    """
-    Sends the data analysis text to an LLM and gets a structured JSON response
-    containing three detailed insights, each with a title and description.
-    """
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return [{"title": "Configuration Error", "description": "OPENAI_API_KEY not found. Please set it in the .env file."}]
+import insight_stream
+import llm_cache
+import llm_gateway
 
-    try:
-        client = OpenAI(api_key=api_key)
-        system_prompt = """
+MODEL = "gpt-4o-mini"
+TEMPERATURE = 0.6
+
+SYSTEM_PROMPT = """
         You are an expert HR strategist and data analyst reviewing a hiring performance report. 
         Your task is to generate exactly three distinct and detailed insights from the provided data summary. Make sure to call out businesses and functions wherever appropriate for the insights. Please note that Energy, FMCG, Tech, Media are businesses.
 
@@ -42,26 +37,47 @@ def get_insights_from_llm(analysis_text: str) -> Union[List[Dict[str, str]], Dic
           }
         ]
         """
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": analysis_text}
-            ],
-            temperature=0.6,
+
+async def get_insights_from_llm_async(analysis_text: str) -> Union[List[Dict[str, str]], Dict]:
+    """
+    Sends the data analysis text to an LLM and gets a structured JSON response
+    containing three detailed insights, each with a title and description.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return [{"title": "Configuration Error", "description": "OPENAI_API_KEY not found. Please set it in the .env file."}]
+
+    cached = await llm_cache.get_async(MODEL, SYSTEM_PROMPT, analysis_text, TEMPERATURE)
+    if cached is not None:
+        return json.loads(cached)
+
+    try:
+        raw_response_content = await llm_gateway.complete_async(
+            SYSTEM_PROMPT,
+            analysis_text,
+            model=MODEL,
+            temperature=TEMPERATURE,
             max_tokens=500,
         )
-        
-        raw_response_content = response.choices[0].message.content
-        
-        # --- DEBUGGING PRINT ---
-        print("--- RAW LLM RESPONSE ---")
-        print(raw_response_content)
-        print("------------------------")
-        
-        return json.loads(raw_response_content)
+        insights = json.loads(raw_response_content)
 
     except Exception as e:
         print(f"❌ LLM API Error: {e}")
-        return [{"title": "AI Error", "description": f"Error communicating with the AI model: {e}"}]
\ No newline at end of file
+        return [{"title": "AI Error", "description": f"Error communicating with the AI model: {e}"}]
+
+    await llm_cache.put_async(MODEL, SYSTEM_PROMPT, analysis_text, TEMPERATURE, raw_response_content)
+    return insights
+
+async def stream_insights_from_llm(analysis_text: str):
+    """
+    Streaming version of get_insights_from_llm_async: yields each insight card as
+    soon as the model has written it.
+    """
+    if not os.getenv("OPENAI_API_KEY"):
+        yield {"title": "Configuration Error", "description": "OPENAI_API_KEY not found. Please set it in the .env file."}
+        return
+
+    async for card in insight_stream.stream_cards(
+        SYSTEM_PROMPT, analysis_text, model=MODEL, temperature=TEMPERATURE, max_tokens=500
+    ):
+        yield card
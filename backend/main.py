@@ -1,35 +1,81 @@
 # FILE: backend/main.py
 
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 # Using absolute imports
 import models
-from database import engine
-from routers import summary, hiring, insights, drilldowns
-
-# This creates the database tables if they don't exist
-models.Base.metadata.create_all(bind=engine)
+import rollup
+import analysis_pool
+import analytics
+import timings
+import warmup
+from migrations import run_migrations
+from database import engine, SessionLocal, READ_ONLY
+from pagination import NEXT_CURSOR_HEADER
+from http_cache import ConditionalGetMiddleware
+from routers import summary, hiring, insights, drilldowns, export, dashboard, stats
+
+# A read-only snapshot is served as-is; everything else gets migrated on startup.
+if not READ_ONLY:
+    # This creates the database tables and indexes if they don't exist
+    run_migrations(engine)
+
+    # Bring the KPI rollup in line with hirings (e.g. after a pandas/bulk load).
+    _db = SessionLocal()
+    try:
+        rollup.ensure_rollup(_db)
+    finally:
+        _db.close()
+
+# With a NumPy/DuckDB ANALYTICS_BACKEND, load it now so that preloaded gunicorn
+# workers inherit it instead of each loading their own copy.
+analytics.load_on_startup(SessionLocal)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Precomputes the AI insights of every filter slice in the background, now and
+    # after each data load (see warmup.py).
+    warmup_task = warmup.start_background()
+    # Starts the analysis worker processes, if enabled (see analysis_pool.py), off the event loop.
+    asyncio.get_running_loop().run_in_executor(None, analysis_pool.start)
+    yield
+    if warmup_task is not None:
+        warmup_task.cancel()
 
 app = FastAPI(
     title="Talent Dashboard API",
     description="API for the Talent Dashboard.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # --- CORS Configuration ---
 # This allows your frontend to communicate with your backend
 origins = ["*"]
 
+# ETag / If-None-Match on the read API. Added before CORS so that CORS wraps it and
+# 304 responses carry the CORS headers too.
+app.add_middleware(ConditionalGetMiddleware, prefix="/api/v1")
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets browser clients read the keyset pagination cursor and the ETag.
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+# Per-phase Server-Timing header (SQL, analysis, prompt, LLM) for profiling and the
+# benchmarks. Added last so that it is the outermost middleware and times everything.
+if timings.ENABLED:
+    app.add_middleware(timings.ServerTimingMiddleware)
+
 
 # --- API Routers ---
 # Each router is included with its specific prefix based on the API design.
@@ -38,6 +84,9 @@ app.include_router(summary.router, prefix="/api/v1", tags=["Summaries"])
 app.include_router(hiring.router, prefix="/api/v1", tags=["Hiring Data & KPIs"])
 app.include_router(insights.router, prefix="/api/v1", tags=["AI Insights"])
 app.include_router(drilldowns.router, prefix="/api/v1/kpis/drilldown", tags=["KPI Drilldowns"])
+app.include_router(export.router, prefix="/api/v1", tags=["Exports"])
+app.include_router(dashboard.router, prefix="/api/v1", tags=["Dashboard"])
+app.include_router(stats.router, prefix="/api/v1", tags=["Stats"])
 
 @app.get("/")
 def read_root():
@@ -3,8 +3,13 @@
 import os
 import pandas as pd
 from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 
+import data_version
+import rollup
+from migrations import run_migrations
+
 # This will load environment variables from a .env file.
 load_dotenv()
 
@@ -58,4 +63,13 @@ for table_name in tables_to_migrate:
     except Exception as e:
         print(f"  - FAILED to migrate table '{table_name}': {e}")
 
+# to_sql bypasses the ORM hooks: bring the schema (indexes, hire_month, rollup and
+# version tables) up to date, rebuild the KPI rollup from the copied hirings and bump
+# the data version so running APIs drop their caches.
+run_migrations(render_engine)
+with Session(render_engine) as session:
+    rollup.rebuild_rollup(session)
+with render_engine.begin() as connection:
+    data_version.bump(connection)
+
 print("\nMigration process complete!")
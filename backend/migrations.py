@@ -0,0 +1,81 @@
+# backend/migrations.py
+
+from sqlalchemy import func, inspect, update
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.engine import Engine
+
+import models
+import data_version
+
+# Indexes that earlier versions of the models created and that now only mislead the planner.
+OBSOLETE_INDEXES = ["ix_hirings_source", "ix_hirings_bg_fn_month_kpis", "uq_hiring_monthly_rollups_key"]
+
+
+def month_bucket(column, dialect_name: str):
+    """Returns a SQL expression that formats a date column as 'YYYY-MM' for the given dialect."""
+    if dialect_name == "postgresql":
+        return func.to_char(column, "YYYY-MM")
+    return func.strftime("%Y-%m", column)
+
+
+def ensure_hire_month(engine: Engine):
+    """
+    Adds the hirings.hire_month column to databases created before it existed and
+    fills it for any row written without the ORM (initial backfill, pandas loads).
+    """
+    columns = {column["name"] for column in inspect(engine).get_columns("hirings")}
+    with engine.begin() as connection:
+        if "hire_month" not in columns:
+            connection.exec_driver_sql("ALTER TABLE hirings ADD COLUMN hire_month VARCHAR(7)")
+        h = models.Hiring.__table__
+        result = connection.execute(
+            update(h)
+            .where(h.c.hire_month.is_(None) & h.c.hire_date.isnot(None))
+            .values(hire_month=month_bucket(h.c.hire_date, engine.dialect.name))
+        )
+        if result.rowcount:
+            print(f"Backfilled hire_month for {result.rowcount} hiring rows.")
+
+
+def ensure_rollup_schema(engine: Engine):
+    """
+    Drops a hiring_monthly_rollups table created before the *_known counts and the
+    NULL-safe key existed. It only holds derived data: create_all recreates it and
+    rollup.ensure_rollup refills it on startup.
+    """
+    inspector = inspect(engine)
+    if not inspector.has_table(models.HiringMonthlyRollup.__tablename__):
+        return
+    columns = {column["name"] for column in inspector.get_columns(models.HiringMonthlyRollup.__tablename__)}
+    if "diversity_known" not in columns:
+        models.HiringMonthlyRollup.__table__.drop(engine)
+        print("Dropped the outdated KPI rollup table; it is rebuilt on startup.")
+
+
+def ensure_indexes(engine: Engine):
+    """
+    Creates any index declared on the models that is missing from the database.
+    `create_all` only creates indexes together with new tables, so existing
+    deployments would otherwise never pick up indexes added later.
+    """
+    # IF NOT EXISTS rather than checkfirst: reflection can't see the lower(...) expression indexes.
+    with engine.begin() as connection:
+        for table in models.Base.metadata.sorted_tables:
+            for index in table.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+
+
+def drop_obsolete_indexes(engine: Engine):
+    with engine.begin() as connection:
+        for name in OBSOLETE_INDEXES:
+            connection.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+
+
+def run_migrations(engine: Engine):
+    """Brings an existing database schema up to date with the models."""
+    ensure_rollup_schema(engine)
+    models.Base.metadata.create_all(bind=engine)
+    ensure_hire_month(engine)
+    ensure_indexes(engine)
+    drop_obsolete_indexes(engine)
+    data_version.ensure_row(engine)
@@ -0,0 +1,150 @@
+# backend/mock_llm_server.py
+#
+# A local stand-in for the OpenAI chat completions API, for benchmarking and testing
+# the insight endpoints without network access or cost. It answers
+# POST /v1/chat/completions with canned insight cards shaped like the real model's
+# output (three cards for the deep-dive prompt, two for the drilldown prompts), after
+# a latency drawn from a log-normal distribution, and fails a configurable share of
+# calls with 429/500/503 so that the gateway's retries get exercised. With
+# "stream": true the answer arrives as chat.completion.chunk events: a fifth of the
+# latency before the first token, the rest spread evenly over the chunks.
+#
+# Usage: python mock_llm_server.py [--port 8765] [--latency-ms 900] [--sigma 0.4] [--error-rate 0.02]
+# then:  OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=mock uvicorn main:app
+
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Median latency, spread (sigma of the underlying normal; 0 = always the median) and
+# the share of calls that fail.
+config = {
+    "latency_ms": float(os.getenv("MOCK_LLM_LATENCY_MS", "900")),
+    "sigma": float(os.getenv("MOCK_LLM_LATENCY_SIGMA", "0.4")),
+    "error_rate": float(os.getenv("MOCK_LLM_ERROR_RATE", "0.0")),
+}
+
+ERROR_STATUSES = (429, 500, 503)
+STREAM_CHUNK_CHARS = 16
+
+_ids = itertools.count(1)
+
+app = FastAPI(title="Mock OpenAI API")
+
+
+def configure(latency_ms: float | None = None, sigma: float | None = None, error_rate: float | None = None):
+    """Changes the mock's behaviour (for in-process use by the benchmarks)."""
+    for key, value in (("latency_ms", latency_ms), ("sigma", sigma), ("error_rate", error_rate)):
+        if value is not None:
+            config[key] = value
+
+
+def _latency_seconds() -> float:
+    median = config["latency_ms"] / 1000
+    if config["sigma"] <= 0:
+        return median
+    return random.lognormvariate(math.log(median), config["sigma"]) if median > 0 else 0.0
+
+
+def _cards(system_prompt: str, user_prompt: str) -> list:
+    count = 2 if "exactly two" in system_prompt else 3
+    words = user_prompt.split()
+    return [
+        {
+            "title": f"Mock Insight {index + 1}",
+            "description": (
+                f"This is a canned insight generated from a {len(words)}-word prompt. "
+                f"It stands in for the model's analysis of the data summary."
+            ),
+        }
+        for index in range(count)
+    ]
+
+
+async def _stream(completion_id: str, model: str, content: str, latency: float):
+    pieces = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)]
+    await asyncio.sleep(latency * 0.2)
+    for index, piece in enumerate(pieces):
+        if index:
+            await asyncio.sleep(latency * 0.8 / len(pieces))
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+    done = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+    }
+    yield f"data: {json.dumps(done)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    latency = _latency_seconds()
+    if not body.get("stream"):
+        await asyncio.sleep(latency)
+
+    if random.random() < config["error_rate"]:
+        status = random.choice(ERROR_STATUSES)
+        return JSONResponse(
+            status_code=status,
+            content={"error": {"message": f"Mock upstream error {status}", "type": "mock_error", "code": status}},
+        )
+
+    messages = {message["role"]: message["content"] for message in body.get("messages", [])}
+    content = json.dumps({"insights": _cards(messages.get("system", ""), messages.get("user", ""))})
+    if body.get("stream"):
+        return StreamingResponse(
+            _stream(f"chatcmpl-mock-{next(_ids)}", body.get("model", "mock"), content, latency),
+            media_type="text/event-stream",
+        )
+    prompt_tokens = sum(len(text) for text in messages.values()) // 4
+    completion_tokens = len(content) // 4
+    return {
+        "id": f"chatcmpl-mock-{next(_ids)}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "mock"),
+        "choices": [
+            {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible mock for the insight endpoints.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, help="median latency of a completion")
+    parser.add_argument("--sigma", type=float, help="log-normal spread of the latency (0 = fixed)")
+    parser.add_argument("--error-rate", type=float, help="share of calls answered with 429/500/503")
+    args = parser.parse_args()
+
+    configure(args.latency_ms, args.sigma, args.error_rate)
+    print(f"Mock LLM on http://{args.host}:{args.port}/v1 with {config}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -1,6 +1,6 @@
 # backend/models.py
 
-from sqlalchemy import Boolean, Column, Integer, String, Date
+from sqlalchemy import Boolean, Column, Integer, BigInteger, Float, String, Text, Date, Index, event, func, literal_column
 
 # CORRECTED: This now uses an absolute import 'from database'
 # instead of a relative one 'from .database' to fix the deployment error.
@@ -8,21 +8,66 @@ from database import Base
 
 class Hiring(Base):
     __tablename__ = "hirings"
+    __table_args__ = (
+        # Every endpoint filters on business_group [+ function] [+ hire_date range]. The KPI
+        # columns are appended so aggregates and drilldowns are answered from the index alone.
+        Index(
+            "ix_hirings_bg_fn_date_kpis",
+            "business_group", "function", "hire_date",
+            "time_to_fill", "cost_per_hire", "ijp_adherence", "build_buy_ratio", "diversity_ratio", "source",
+        ),
+        # Same idea for the function-only filter (breakdowns by business_group).
+        Index(
+            "ix_hirings_fn_date_kpis",
+            "function", "hire_date", "business_group",
+            "time_to_fill", "cost_per_hire", "ijp_adherence", "build_buy_ratio", "diversity_ratio", "source",
+        ),
+        # Date-range-only filters.
+        Index("ix_hirings_hire_date", "hire_date"),
+        # Keyset pages of /hirings/ filtered on business_group only, in (hire_date, id) order.
+        Index("ix_hirings_bg_date", "business_group", "hire_date"),
+        # Monthly trends and the all-KPI drilldown: filter on business_group [+ function],
+        # GROUP BY hire_month [, function, source], all from the index.
+        Index(
+            "ix_hirings_bg_fn_month_kpis_source",
+            "business_group", "function", "hire_month",
+            "time_to_fill", "cost_per_hire", "ijp_adherence", "build_buy_ratio", "diversity_ratio", "source",
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     business_group = Column(String, index=True)
     function = Column(String, index=True)
     role_title = Column(String)
     hire_date = Column(Date)
+    # "YYYY-MM" bucket of hire_date, stored so trend queries can group on an indexed
+    # column instead of formatting every row (and without SQLite-only strftime).
+    hire_month = Column(String(7))
     cost_per_hire = Column(Integer)
     time_to_fill = Column(Integer)
     ijp_adherence = Column(Boolean)
     build_buy_ratio = Column(String)
     diversity_ratio = Column(Boolean)
-    source = Column(String, index=True)
+    # No standalone index: nothing filters on source, and SQLite would otherwise walk it
+    # for GROUP BY source instead of using the covering indexes above.
+    source = Column(String)
+
+# The insights loader (analytics.load_frames) matches business_group/function
+# case-insensitively; these expression indexes serve its lower(...) = ... filters.
+Index("ix_hirings_lower_bg_fn_date", func.lower(Hiring.business_group), func.lower(Hiring.function), Hiring.hire_date)
+Index("ix_hirings_lower_fn_date", func.lower(Hiring.function), Hiring.hire_date)
+
+@event.listens_for(Hiring, "before_insert")
+@event.listens_for(Hiring, "before_update")
+def _set_hire_month(mapper, connection, target):
+    """Keeps hire_month in step with hire_date on every ORM write."""
+    target.hire_month = target.hire_date.strftime("%Y-%m") if target.hire_date else None
 
 class BusinessSummary(Base):
     __tablename__ = "business_summaries"
+    __table_args__ = (
+        Index("ix_business_summaries_bg_fn", "business_group", "function"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     business_group = Column(String, index=True)
@@ -30,3 +75,106 @@ class BusinessSummary(Base):
     total_headcount = Column(Integer)
     available_headcount = Column(Integer)
     gap = Column(Integer)
+
+Index(
+    "ix_business_summaries_lower_bg_fn",
+    func.lower(BusinessSummary.business_group), func.lower(BusinessSummary.function),
+)
+Index("ix_business_summaries_lower_fn", func.lower(BusinessSummary.function))
+
+class HiringMonthlyRollup(Base):
+    """
+    Pre-aggregated KPI totals per business_group x function x source x month.
+    Kept current by the flush hooks in rollup.py; averages and rates are
+    derived by dividing the sums/tallies by hire_count or, where the raw
+    query's AVG() skips NULLs, by the matching *_known count of non-NULL values.
+    """
+    __tablename__ = "hiring_monthly_rollups"
+    __table_args__ = (
+        # Covering indexes for the monthly trend queries filtered by business_group or function.
+        Index(
+            "ix_hiring_monthly_rollups_bg_month",
+            "business_group", "month", "function", "source", "hire_count", "time_to_fill_sum",
+            "cost_per_hire_sum", "ijp_adherence_count", "build_count", "diversity_count",
+            "time_to_fill_known", "cost_per_hire_known", "ijp_adherence_known", "build_buy_known", "diversity_known",
+        ),
+        Index(
+            "ix_hiring_monthly_rollups_fn_month",
+            "function", "month", "business_group", "source", "hire_count", "time_to_fill_sum",
+            "cost_per_hire_sum", "ijp_adherence_count", "build_count", "diversity_count",
+            "time_to_fill_known", "cost_per_hire_known", "ijp_adherence_known", "build_buy_known", "diversity_known",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    business_group = Column(String, index=True)
+    function = Column(String, index=True)
+    source = Column(String)
+    month = Column(String(7), index=True)  # "YYYY-MM", same format as the trend labels; NULL for undated hirings
+    hire_count = Column(Integer, nullable=False, default=0)
+    time_to_fill_sum = Column(BigInteger, nullable=False, default=0)
+    cost_per_hire_sum = Column(BigInteger, nullable=False, default=0)
+    ijp_adherence_count = Column(Integer, nullable=False, default=0)
+    build_count = Column(Integer, nullable=False, default=0)
+    diversity_count = Column(Integer, nullable=False, default=0)
+    # Hires with a non-NULL value of each measure.
+    time_to_fill_known = Column(Integer, nullable=False, default=0)
+    cost_per_hire_known = Column(Integer, nullable=False, default=0)
+    ijp_adherence_known = Column(Integer, nullable=False, default=0)
+    build_buy_known = Column(Integer, nullable=False, default=0)
+    diversity_known = Column(Integer, nullable=False, default=0)
+
+# The upsert key. NULLs are never equal in a plain unique constraint, so a NULL source
+# (or business group/function, or the month of undated hirings) would get a new row per
+# delta instead of a conflict.
+# The '' is a literal, not a bound parameter, so an ON CONFLICT target matches the index.
+ROLLUP_KEY = [
+    func.coalesce(HiringMonthlyRollup.business_group, literal_column("''")),
+    func.coalesce(HiringMonthlyRollup.function, literal_column("''")),
+    func.coalesce(HiringMonthlyRollup.source, literal_column("''")),
+    func.coalesce(HiringMonthlyRollup.month, literal_column("''")),
+]
+Index("uq_hiring_monthly_rollups_bucket", *ROLLUP_KEY, unique=True)
+
+class DataVersion(Base):
+    """
+    Counter bumped in the same transaction as every write to hirings or
+    business_summaries (see data_version.py). Caches tag their entries with it.
+    """
+    __tablename__ = "data_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+class LlmCacheEntry(Base):
+    """
+    A cached LLM completion, keyed by a hash of model, system prompt, user prompt and
+    temperature (see llm_cache.py). Times are Unix timestamps.
+    """
+    __tablename__ = "llm_cache"
+
+    key = Column(String(64), primary_key=True)
+    model = Column(String, nullable=False)
+    response = Column(Text, nullable=False)
+    created_at = Column(Float, nullable=False)
+    # Least recently used entries are evicted first once the table is full.
+    last_used_at = Column(Float, nullable=False, index=True)
+    hits = Column(Integer, nullable=False, default=0)
+
+class AnalysisResult(Base):
+    """
+    The deep-dive analysis of one filter slice at one data version, as JSON (see
+    analysis_store.py). Written by the insight warm-up, read by the deep-dive endpoints.
+    """
+    __tablename__ = "analysis_results"
+
+    key = Column(String(64), primary_key=True)
+    data_version = Column(BigInteger, nullable=False, index=True)
+    result = Column(Text, nullable=False)
+    created_at = Column(Float, nullable=False)
+
+# The Session-wide write hooks that keep derived data in step with these tables. They
+# are loaded here, with the models, so that every process writing through the ORM
+# (the app, seed.py, one-off scripts) runs them, not only the ones that import main.
+import data_version  # noqa: E402,F401  (bumps data_versions on hirings/summaries writes)
+import rollup  # noqa: E402,F401  (maintains hiring_monthly_rollups on hirings writes)
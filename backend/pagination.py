@@ -0,0 +1,59 @@
+# backend/pagination.py
+
+import base64
+import json
+from types import UnionType
+from datetime import date
+
+# Keyset pagination: instead of OFFSET, each page starts right after the sort key of
+# the previous page's last row, so the database seeks to it through the index and
+# page N costs the same as page 1. The key is handed to clients as an opaque cursor.
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(*key) -> str:
+    """Packs a sort key (dates as ISO strings) into an opaque, URL-safe cursor."""
+    payload = [value.isoformat() if isinstance(value, date) else value for value in key]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_value(value, expected):
+    # `date | None` and the like accept a null as well.
+    if isinstance(expected, UnionType):
+        kinds = expected.__args__
+        if value is None and type(None) in kinds:
+            return None
+        expected = next(kind for kind in kinds if kind is not type(None))
+    if expected is date:
+        return date.fromisoformat(value)
+    return expected(value)
+
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """
+    Unpacks a cursor back into a sort key, checking it against the expected types
+    (give `date | None` for a key part that may be null).
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise InvalidCursor("Malformed cursor.")
+        return tuple(_decode_value(value, expected) for value, expected in zip(payload, types))
+    except InvalidCursor:
+        raise
+    except (ValueError, TypeError):
+        raise InvalidCursor("Malformed cursor.")
+
+
+def next_cursor(rows, limit: int, key) -> str | None:
+    """Cursor for the page after `rows`, or None when this was the last page."""
+    if not rows or len(rows) < limit:
+        return None
+    return encode_cursor(*key(rows[-1]))
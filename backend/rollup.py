@@ -0,0 +1,253 @@
+# backend/rollup.py
+
+import os
+from collections import defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import event, func, case, inspect, insert, delete, update, select
+from sqlalchemy.orm import Session
+
+import models
+
+# The KPI and drilldown queries read from the rollup table while this is on.
+# Set KPI_ROLLUP_ENABLED=false to force every query back onto the raw hirings table.
+# Hirings without a hire_date are kept in buckets with a NULL month: they count in KPIs
+# without a date filter, as they do in a scan of hirings, and no month range selects them.
+ENABLED = os.getenv("KPI_ROLLUP_ENABLED", "true").lower() in ("1", "true", "yes")
+
+Rollup = models.HiringMonthlyRollup
+
+# The measures stored per rollup row, in the order used by the delta vectors below.
+MEASURES = [
+    "hire_count",
+    "time_to_fill_sum",
+    "cost_per_hire_sum",
+    "ijp_adherence_count",
+    "build_count",
+    "diversity_count",
+    "time_to_fill_known",
+    "cost_per_hire_known",
+    "ijp_adherence_known",
+    "build_buy_known",
+    "diversity_known",
+]
+
+KEY_COLUMNS = ["business_group", "function", "source", "month"]
+
+# The Hiring attribute behind each *_known count, in MEASURES order.
+_MEASURED_ATTRS = ["time_to_fill", "cost_per_hire", "ijp_adherence", "build_buy_ratio", "diversity_ratio"]
+
+
+def is_month_aligned(start_date: date | None, end_date: date | None) -> bool:
+    """True when the date filters fall on whole-month boundaries, so the rollup can answer them."""
+    start_ok = start_date is None or start_date.day == 1
+    end_ok = end_date is None or (end_date + timedelta(days=1)).day == 1
+    return start_ok and end_ok
+
+
+def apply_month_range(query, start_date: date | None, end_date: date | None):
+    """Applies a month-aligned date range to a query over the rollup table."""
+    if start_date:
+        query = query.filter(Rollup.month >= start_date.strftime("%Y-%m"))
+    if end_date:
+        query = query.filter(Rollup.month <= end_date.strftime("%Y-%m"))
+    return query
+
+
+# === Incremental maintenance ===
+
+# These Session-wide hooks are loaded by models.py, so every ORM writer runs them.
+
+def _contribution(values: dict):
+    """Turns one hiring row's values into a (key, measure vector) pair."""
+    hire_date = values["hire_date"]
+    # Same bucket as models.Hiring.hire_month, derived from hire_date so it is right even
+    # before the before_insert/before_update hook has filled hire_month in.
+    month = hire_date.strftime("%Y-%m") if hire_date is not None else None
+    key = (values["business_group"], values["function"], values["source"], month)
+    vector = (
+        1,
+        values["time_to_fill"] or 0,
+        values["cost_per_hire"] or 0,
+        1 if values["ijp_adherence"] else 0,
+        1 if values["build_buy_ratio"] == "Build" else 0,
+        1 if values["diversity_ratio"] else 0,
+        *(0 if values[attr] is None else 1 for attr in _MEASURED_ATTRS),
+    )
+    return key, vector
+
+
+_TRACKED_ATTRS = [
+    "business_group", "function", "source", "hire_date",
+    "time_to_fill", "cost_per_hire", "ijp_adherence", "build_buy_ratio", "diversity_ratio",
+]
+
+
+def _noop_set(target, value, oldvalue, initiator):
+    return value
+
+
+# active_history makes SQLAlchemy load the stored value before an expired attribute
+# is overwritten, so updates can always subtract the row's previous contribution.
+for _attr in _TRACKED_ATTRS:
+    event.listen(getattr(models.Hiring, _attr), "set", _noop_set, active_history=True, retval=True)
+
+
+def _current_values(obj) -> dict:
+    return {attr: getattr(obj, attr) for attr in _TRACKED_ATTRS}
+
+
+def _previous_values(obj) -> dict:
+    """Values as they were in the database before this flush."""
+    state = inspect(obj)
+    values = {}
+    for attr in _TRACKED_ATTRS:
+        history = state.attrs[attr].history
+        if history.deleted:
+            values[attr] = history.deleted[0]
+        elif history.unchanged:
+            values[attr] = history.unchanged[0]
+        else:
+            values[attr] = getattr(obj, attr)
+    return values
+
+
+def _add(deltas, values: dict, sign: int):
+    key, vector = _contribution(values)
+    current = deltas[key]
+    for i, v in enumerate(vector):
+        current[i] += sign * v
+
+
+def _collect_deltas(session: Session) -> dict:
+    deltas = defaultdict(lambda: [0] * len(MEASURES))
+    for obj in session.new:
+        if isinstance(obj, models.Hiring):
+            _add(deltas, _current_values(obj), +1)
+    for obj in session.dirty:
+        if isinstance(obj, models.Hiring) and session.is_modified(obj, include_collections=False):
+            _add(deltas, _previous_values(obj), -1)
+            _add(deltas, _current_values(obj), +1)
+    for obj in session.deleted:
+        if isinstance(obj, models.Hiring):
+            _add(deltas, _previous_values(obj), -1)
+    return {key: vector for key, vector in deltas.items() if any(vector)}
+
+
+def _upsert_deltas(connection, deltas: dict):
+    rows = [dict(zip(KEY_COLUMNS, key), **dict(zip(MEASURES, vector))) for key, vector in deltas.items()]
+    dialect_name = connection.dialect.name
+    if dialect_name in ("sqlite", "postgresql"):
+        if dialect_name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(Rollup)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=models.ROLLUP_KEY,
+            set_={m: getattr(Rollup, m) + getattr(stmt.excluded, m) for m in MEASURES},
+        )
+        connection.execute(stmt, rows)
+    else:
+        # Portable fallback: try to bump an existing row, insert when there is none.
+        for row in rows:
+            result = connection.execute(
+                update(Rollup)
+                .where(*(getattr(Rollup, c).is_not_distinct_from(row[c]) for c in KEY_COLUMNS))
+                .values({m: getattr(Rollup, m) + row[m] for m in MEASURES})
+            )
+            if result.rowcount == 0:
+                connection.execute(insert(Rollup), [row])
+
+    # Buckets that lost their last hire are removed so they don't show up as empty months.
+    connection.execute(delete(Rollup).where(Rollup.hire_count <= 0))
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_rollup(session: Session, flush_context):
+    """Applies the net KPI change of every flushed Hiring insert/update/delete to the rollup table."""
+    deltas = _collect_deltas(session)
+    if deltas:
+        _upsert_deltas(session.connection(), deltas)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _rebuild_after_bulk_write(orm_execute_state):
+    """
+    Bulk writes (query().update()/delete(), session.execute(insert/update/delete(Hiring)))
+    never reach after_flush and carry no per-row history, so the rollup is recomputed
+    after them, in the same transaction.
+    """
+    state = orm_execute_state
+    mapper = state.bind_mapper
+    is_write = state.is_update or state.is_delete or state.is_insert
+    if not is_write or mapper is None or mapper.class_ is not models.Hiring:
+        return None
+    result = state.invoke_statement()
+    if result.returns_rows:
+        # Fetch RETURNING rows before the connection runs the rebuild.
+        frozen = result.freeze()
+        _rebuild(state.session.connection())
+        return frozen()
+    _rebuild(state.session.connection())
+    return result
+
+
+# === Rebuild ===
+
+def _source_measures():
+    """The MEASURES of the hirings rows, as SQL aggregates."""
+    h = models.Hiring
+    return [
+        func.count(h.id),
+        func.coalesce(func.sum(h.time_to_fill), 0),
+        func.coalesce(func.sum(h.cost_per_hire), 0),
+        func.coalesce(func.sum(case((h.ijp_adherence == True, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((h.build_buy_ratio == 'Build', 1), else_=0)), 0),
+        func.coalesce(func.sum(case((h.diversity_ratio == True, 1), else_=0)), 0),
+        *(func.count(getattr(h, attr)) for attr in _MEASURED_ATTRS),
+    ]
+
+
+def _rebuild(connection):
+    h = models.Hiring
+    source_query = (
+        select(h.business_group, h.function, h.source, h.hire_month, *_source_measures())
+        .group_by(h.business_group, h.function, h.source, h.hire_month)
+    )
+    connection.execute(delete(Rollup))
+    connection.execute(insert(Rollup).from_select(KEY_COLUMNS + MEASURES, source_query))
+
+
+def rebuild_rollup(db: Session):
+    """Recomputes the whole rollup table from the hirings table in one GROUP BY."""
+    _rebuild(db.connection())
+    db.commit()
+
+
+def ensure_rollup(db: Session):
+    """
+    Rebuilds the rollup when it is out of step with the hirings table, e.g. after
+    a load that bypassed the ORM (pandas.to_sql, raw SQL). Every measure total is
+    compared, so changed values are caught as well as added or removed rows.
+    """
+    rolled_up = db.execute(select(*(func.coalesce(func.sum(getattr(Rollup, m)), 0) for m in MEASURES))).one()
+    actual = db.execute(select(*_source_measures())).one()
+    if tuple(map(int, rolled_up)) != tuple(map(int, actual)):
+        print(f"Rollup out of date ({rolled_up[0]} vs {actual[0]} hires), rebuilding...")
+        rebuild_rollup(db)
+
+
+if __name__ == "__main__":
+    # Usage: python rollup.py   -> rebuilds hiring_monthly_rollups from scratch.
+    from database import SessionLocal, engine
+    from migrations import run_migrations
+
+    run_migrations(engine)
+    db = SessionLocal()
+    try:
+        rebuild_rollup(db)
+        count = db.query(func.count(Rollup.id)).scalar()
+        print(f"✅ Rebuilt rollup table with {count} rows.")
+    finally:
+        db.close()
@@ -0,0 +1,65 @@
+# backend/routers/dashboard.py
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+
+import crud
+import drilldown_crud
+import schemas
+from database import get_async_read_db, open_read_session
+from routers.insights import deep_dive_insights
+
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["Dashboard"]
+)
+
+@router.get("/bootstrap", response_model=schemas.DashboardBootstrap)
+async def get_dashboard_bootstrap(
+    request: Request,
+    business_group: str | None = None,
+    function: str | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    include_insights: bool = False,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Everything the dashboard needs for its first paint in one round trip: the KPI
+    averages, both filter lists, and the headcount summaries, all read through one
+    session. The AI insights are slow (an LLM call), so by default they are left
+    out and `insights_url` says where to fetch them once the page is up; pass
+    include_insights=true to wait for them here instead.
+    """
+    kpis = await crud.get_kpi_aggregates_async(db, business_group, function, start_date, end_date)
+    filters = await crud.get_filter_options_async(db)
+    summaries = await drilldown_crud.get_summary_data_async(db, None, None)
+
+    filter_params = {
+        "business_group": business_group,
+        "function": function,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+    insights_url = request.url_for("get_ai_powered_insights").include_query_params(
+        **{key: value for key, value in filter_params.items() if value}
+    )
+
+    insights = None
+    if include_insights:
+        # Opening a read session may probe a replica, which blocks; keep it off the loop.
+        insights_db = await run_in_threadpool(open_read_session)
+        try:
+            insights = await deep_dive_insights(insights_db, business_group, function, start_date, end_date)
+        finally:
+            insights_db.close()
+
+    return {
+        "kpis": kpis,
+        "filters": filters,
+        "summaries": summaries,
+        "insights": insights,
+        "insights_url": str(insights_url),
+    }
@@ -1,84 +1,238 @@
 # backend/routers/drilldowns.py
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # CORRECTED: Changed relative 'from ..' imports to absolute imports
-from database import get_db
+from database import get_async_read_db
 import drilldown_crud as crud
 import drilldown_schemas as schemas
-from drilldown_llm_utils import get_kpi_specific_insights
+import insight_jobs
+import insight_stream
+import timings
+from drilldown_llm_utils import get_cached_kpi_insights_async, insight_key, stream_kpi_specific_insights
+from pagination import InvalidCursor, decode_cursor, encode_cursor
 
 router = APIRouter()
 
+# Longest a client may hold the insight endpoint open waiting for the LLM.
+MAX_INSIGHT_WAIT_SECONDS = 10.0
+
+# Display unit of each KPI; "%" values are rates and are shown multiplied by 100.
+KPI_UNITS = {
+    "time_to_fill": "days",
+    "cost_per_hire": "cost",
+    "diversity_rate": "%",
+    "ijp_adherence_rate": "%",
+    "build_rate": "%",
+    "total_hires": "hires",
+}
+
+def _breakdown_title(kpi_name: str, function: str | None) -> str:
+    if kpi_name == "cost_per_hire":
+        return "Source"
+    return "Function" if not function else "Business Group"
+
+def _format_points(points, unit: str) -> list:
+    return [{"label": row.label, "value": round(row.value * 100) if unit == "%" else round(row.value)} for row in points]
+
+def kpi_section(drilldowns: dict, kpi_name: str, function: str | None) -> dict:
+    """Projects one KPI out of the all-KPI drilldown result."""
+    unit = KPI_UNITS[kpi_name]
+    data = drilldowns["kpis"][kpi_name]
+    return {
+        "title": kpi_name.replace('_', ' ').title(),
+        "unit": unit,
+        "breakdown_title": _breakdown_title(kpi_name, function),
+        "trend": [row for row in data["trend"] if row.value is not None],
+        "breakdown": [row for row in data["breakdown"] if row.value is not None],
+    }
+
+@router.get("/", response_model=schemas.AllKpiDrilldownResponse)
+async def get_all_kpi_drilldowns(
+    business_group: str | None = None,
+    function: str | None = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Trend and breakdown data for all six KPIs in one response, computed from a
+    single grouped scan. AI insights are only generated by the per-KPI endpoint.
+    """
+    summary_data = await crud.get_summary_data_async(db, business_group, function)
+    drilldowns = await crud.get_all_kpi_drilldowns_async(db, business_group, function)
+    kpis = {}
+    for kpi_name in crud.DRILLDOWN_KPIS:
+        section = kpi_section(drilldowns, kpi_name, function)
+        kpis[kpi_name] = {
+            "title": section["title"],
+            "unit": section["unit"],
+            "breakdown_title": section["breakdown_title"],
+            "trend_chart_data": _format_points(section["trend"], section["unit"]),
+            "breakdown_chart_data": _format_points(section["breakdown"], section["unit"]),
+        }
+    return {
+        "summary_data": summary_data,
+        "total_hires": drilldowns["total_hires"],
+        "kpis": kpis,
+    }
+
+def insight_prompt(section: dict, total_hires: int) -> str:
+    return (
+        f"Data for '{section['title']}' KPI on a selection of {total_hires} hires.\n\n"
+        f"Monthly Trend:\n{', '.join([f'{row.label}: {row.value:.2f}' for row in section['trend']])}\n\n"
+        f"Breakdown by {section['breakdown_title']}:\n{', '.join([f'{row.label}: {row.value:.2f}' for row in section['breakdown']])}"
+    )
+
+async def _generate_insights(prompt_text: str, kpi_title: str, publish) -> list:
+    """Streams the insights from the model, publishing each card as soon as it is written."""
+    cards = []
+    try:
+        async for card in stream_kpi_specific_insights(prompt_text, kpi_title):
+            cards.append(card)
+            publish(card)
+    except Exception as e:
+        print(f"❌ Drilldown LLM Error: {e}")
+        if not cards:
+            cards = [{"title": "AI Communication Error", "description": "There was an issue generating insights."}]
+            publish(cards[0])
+    return cards
+
+def start_insights(prompt_text: str, kpi_title: str):
+    """Starts generating the insights in the background, unless that is already under way."""
+    return insight_jobs.start(
+        insight_key(prompt_text, kpi_title),
+        lambda publish: _generate_insights(prompt_text, kpi_title, publish),
+    )
+
+async def _start_insights_task(prompt_text: str, kpi_title: str):
+    # Async so BackgroundTasks runs it on the event loop rather than in the threadpool.
+    start_insights(prompt_text, kpi_title)
+
 @router.get("/{kpi_name}", response_model=schemas.KpiDrilldownResponse)
-def get_kpi_drilldown(
+async def get_kpi_drilldown(
     kpi_name: str,
+    background_tasks: BackgroundTasks,
     business_group: str | None = None,
     function: str | None = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    summary_data = crud.get_summary_data(db, business_group, function)
-    # The total_hires count is now part of the main response, not fetched separately here.
-    kpi_title = kpi_name.replace('_', ' ').title()
-    
-    # The logic now correctly calls the right function for each KPI
-    if kpi_name == "time_to_fill":
-        trend_data_raw = crud.get_time_to_fill_trend(db, business_group, function)
-        breakdown_data_raw = crud.get_time_to_fill_breakdown(db, business_group, function)
-        breakdown_title = "Function" if not function else "Business Group"
-        unit = "days"
-    elif kpi_name == "cost_per_hire":
-        trend_data_raw = crud.get_cost_per_hire_trend(db, business_group, function)
-        breakdown_data_raw = crud.get_cost_per_hire_breakdown(db, business_group, function)
-        breakdown_title = "Source"
-        unit = "cost"
-    elif kpi_name == "diversity_rate":
-        trend_data_raw = crud.get_diversity_rate_trend(db, business_group, function)
-        breakdown_data_raw = crud.get_diversity_rate_breakdown(db, business_group, function)
-        breakdown_title = "Function" if not function else "Business Group"
-        unit = "%"
-    elif kpi_name == "ijp_adherence_rate":
-        trend_data_raw = crud.get_ijp_adherence_rate_trend(db, business_group, function)
-        breakdown_data_raw = crud.get_ijp_adherence_rate_breakdown(db, business_group, function)
-        breakdown_title = "Function" if not function else "Business Group"
-        unit = "%"
-    elif kpi_name == "build_rate":
-        trend_data_raw = crud.get_build_rate_trend(db, business_group, function)
-        breakdown_data_raw = crud.get_build_rate_breakdown(db, business_group, function)
-        breakdown_title = "Function" if not function else "Business Group"
-        unit = "%"
-    # --- THIS IS THE NEW LOGIC FOR THE TOTAL HIRES KPI ---
-    elif kpi_name == "total_hires":
-        trend_data_raw = crud.get_total_hires_trend(db, business_group, function)
-        breakdown_data_raw = crud.get_total_hires_breakdown(db, business_group, function)
-        breakdown_title = "Function" if not function else "Business Group"
-        unit = "hires" # A new unit for formatting
-    else:
+    """
+    Charts and summary for one KPI. The AI insights take seconds, so they are only
+    included when already generated; otherwise generation starts in the background
+    and the client collects them from /insights/{insight_token}.
+    """
+    if kpi_name not in KPI_UNITS:
         raise HTTPException(status_code=404, detail=f"KPI '{kpi_name}' not found.")
 
-    # We get the overall total hires count to display on the page
-    total_hires_for_selection = sum(row.value for row in breakdown_data_raw if row.value)
-
-    trend_data = [row for row in trend_data_raw if row.value is not None]
-    breakdown_data = [row for row in breakdown_data_raw if row.value is not None]
+    summary_data = await crud.get_summary_data_async(db, business_group, function)
+    # Every KPI is a projection of the same single-scan result.
+    drilldowns = await crud.get_all_kpi_drilldowns_async(db, business_group, function)
+    section = kpi_section(drilldowns, kpi_name, function)
 
-    prompt_text = (
-        f"Data for '{kpi_title}' KPI on a selection of {total_hires_for_selection} hires.\n\n"
-        f"Monthly Trend:\n{', '.join([f'{row.label}: {row.value:.2f}' for row in trend_data])}\n\n"
-        f"Breakdown by {breakdown_title}:\n{', '.join([f'{row.label}: {row.value:.2f}' for row in breakdown_data])}"
-    )
+    # The real number of hires in the selection (not a sum of the breakdown values,
+    # which for averages and rates is not a count).
+    total_hires_for_selection = drilldowns["total_hires"]
 
-    llm_response = get_kpi_specific_insights(prompt_text, kpi_title)
+    with timings.phase("prompt"):
+        prompt_text = insight_prompt(section, total_hires_for_selection)
+    cached_insights = await get_cached_kpi_insights_async(prompt_text, section["title"])
+    if cached_insights is None:
+        background_tasks.add_task(_start_insights_task, prompt_text, section["title"])
 
-    # The formatting logic now handles the new 'hires' unit
-    formatted_trend = [{"label": row.label, "value": round(row.value * 100) if unit == "%" else round(row.value)} for row in trend_data]
-    formatted_breakdown = [{"label": row.label, "value": round(row.value * 100) if unit == "%" else round(row.value)} for row in breakdown_data]
-    
     return {
         "summary_data": summary_data,
         "total_hires": total_hires_for_selection, # Use the calculated total for the filtered view
-        "trend_chart_data": formatted_trend,
-        "breakdown_chart_data": formatted_breakdown,
-        "ai_insights": {"insights": llm_response}
+        "trend_chart_data": _format_points(section["trend"], section["unit"]),
+        "breakdown_chart_data": _format_points(section["breakdown"], section["unit"]),
+        "ai_insights": {"insights": cached_insights} if cached_insights is not None else None,
+        "insight_token": encode_cursor(kpi_name, business_group or "", function or ""),
     }
+
+async def _token_prompt(db: AsyncSession, insight_token: str) -> tuple[str, str]:
+    """The insight prompt and KPI title an insight_token stands for."""
+    # Tokens only name a KPI and filters, so they never expire: a finished or unknown job
+    # is simply started again. What can go wrong is a damaged token or an unknown KPI.
+    try:
+        kpi_name, business_group, function = decode_cursor(insight_token, str, str, str)
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=400,
+            detail="Malformed insight token; use the insight_token of a KPI drilldown response.",
+        )
+    if kpi_name not in KPI_UNITS:
+        raise HTTPException(status_code=404, detail=f"The insight token names an unknown KPI '{kpi_name}'.")
+    business_group, function = business_group or None, function or None
+
+    drilldowns = await crud.get_all_kpi_drilldowns_async(db, business_group, function)
+    section = kpi_section(drilldowns, kpi_name, function)
+    with timings.phase("prompt"):
+        return insight_prompt(section, drilldowns["total_hires"]), section["title"]
+
+@router.get(
+    "/insights/{insight_token}",
+    response_model=schemas.DrilldownInsightStatus,
+    responses={202: {"model": schemas.DrilldownInsightStatus, "description": "Insights are still being generated."}},
+)
+async def get_kpi_drilldown_insights(
+    insight_token: str,
+    response: Response,
+    wait: float = Query(0, ge=0, le=MAX_INSIGHT_WAIT_SECONDS),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    The AI insights behind a drilldown's insight_token. Answers 202 "pending" while
+    they are generated; wait=N holds the request open up to N seconds for them. The
+    token only names the KPI and filters, so any worker can answer it, starting the
+    generation itself if needed.
+    """
+    prompt_text, kpi_title = await _token_prompt(db, insight_token)
+
+    job = insight_jobs.get(insight_key(prompt_text, kpi_title))
+    if job is None:
+        cached_insights = await get_cached_kpi_insights_async(prompt_text, kpi_title)
+        if cached_insights is not None:
+            return {"status": "ready", "ai_insights": {"insights": cached_insights}}
+        job = start_insights(prompt_text, kpi_title)
+
+    # Don't hold a pooled connection while waiting on the LLM.
+    await db.close()
+    if await insight_jobs.wait(job, wait):
+        # Report the time the job spent (the LLM call) as part of this request.
+        timings.merge(insight_jobs.phases(job))
+        return {"status": "ready", "ai_insights": {"insights": job.result()}}
+    response.status_code = 202
+    response.headers["Retry-After"] = "1"
+    return {"status": "pending"}
+
+@router.get("/insights/{insight_token}/stream")
+async def stream_kpi_drilldown_insights(
+    insight_token: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Server-Sent Events version of the insight endpoint: a `card` event for each
+    insight as soon as the model has written it, `heartbeat`s while waiting, then
+    `done`. It follows the same background job as the polling endpoint, so a client
+    that disconnects stops listening but the insights are still generated and cached.
+    """
+    prompt_text, kpi_title = await _token_prompt(db, insight_token)
+
+    job = insight_jobs.get(insight_key(prompt_text, kpi_title))
+    cards = None
+    if job is None:
+        cached_insights = await get_cached_kpi_insights_async(prompt_text, kpi_title)
+        if cached_insights is not None:
+            cards = insight_stream.replay(cached_insights)
+        else:
+            job = start_insights(prompt_text, kpi_title)
+    if cards is None:
+        cards = insight_stream.replay(job.result()) if job.done() else insight_jobs.follow(job)
+
+    await db.close()
+    return StreamingResponse(
+        insight_stream.event_stream(request, cards),
+        media_type="text/event-stream",
+        headers=insight_stream.SSE_HEADERS,
+    )
@@ -0,0 +1,124 @@
+# backend/routers/export.py
+
+import csv
+import io
+import json
+from datetime import date
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+import arrow_export
+import crud
+import models
+from database import open_async_read_session
+
+router = APIRouter(
+    tags=["Exports"]
+)
+
+ExportFormat = Literal["ndjson", "csv", "arrow", "parquet"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    **arrow_export.MEDIA_TYPES,
+}
+
+FILE_EXTENSIONS = {"ndjson": "ndjson", "csv": "csv", "arrow": "arrows", "parquet": "parquet"}
+
+# Few distinct values per column, so Arrow/Parquet store them as dictionary indices.
+HIRING_DICTIONARY_COLUMNS = {"business_group", "function", "role_title", "build_buy_ratio", "source"}
+SUMMARY_DICTIONARY_COLUMNS = {"business_group", "function"}
+
+# Row-oriented formats flush small batches to get the first byte out quickly;
+# columnar formats use larger record batches / row groups.
+ROW_BATCH_SIZE = 5000
+COLUMNAR_BATCH_SIZE = 65536
+
+
+def _ndjson_lines(columns, batch) -> str:
+    return "".join(
+        json.dumps(dict(zip(columns, row)), default=date.isoformat, separators=(",", ":")) + "\n"
+        for row in batch
+    )
+
+
+def _csv_lines(batch) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(batch)
+    return buffer.getvalue()
+
+
+async def _text_body(format, columns, batches):
+    if format == "csv":
+        yield _csv_lines([columns])
+    async for batch in batches:
+        yield _ndjson_lines(columns, batch) if format == "ndjson" else _csv_lines(batch)
+
+
+def _export_response(name, format, db, table, columns, dictionary_columns, batches):
+    """Wraps a stream of row batches in a StreamingResponse of the requested format."""
+    if format in ("ndjson", "csv"):
+        chunks = _text_body(format, columns, batches)
+    else:
+        encoder = arrow_export.BatchEncoder(table, columns, dictionary_columns)
+        writer = arrow_export.ipc_stream if format == "arrow" else arrow_export.parquet_file
+        chunks = writer(encoder, batches)
+
+    async def body():
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await db.close()
+
+    return StreamingResponse(
+        body(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{FILE_EXTENSIONS[format]}"'},
+    )
+
+
+def _check_format(format):
+    if format in arrow_export.MEDIA_TYPES and not arrow_export.AVAILABLE:
+        raise HTTPException(status_code=501, detail=f"The {format} export needs pyarrow, which is not installed.")
+
+
+@router.get("/export/hirings")
+async def export_hirings(
+    format: ExportFormat = "ndjson",
+    business_group: str | None = None,
+    function: str | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+):
+    """
+    Stream every hiring record matching the filters as NDJSON, CSV, an Arrow IPC
+    stream or a Parquet file. Rows are read through a server-side cursor and written
+    out batch by batch, so the export runs in constant memory.
+    """
+    _check_format(format)
+    # The session is opened here rather than through Depends so that it stays open
+    # for the lifetime of the stream and is closed by the response body itself.
+    db = await open_async_read_session()
+    batch_size = ROW_BATCH_SIZE if format in ("ndjson", "csv") else COLUMNAR_BATCH_SIZE
+    batches = crud.stream_filtered_hirings_async(db, business_group, function, start_date, end_date, batch_size=batch_size)
+    return _export_response(
+        "hirings", format, db, models.Hiring.__table__,
+        crud.HIRING_EXPORT_COLUMNS, HIRING_DICTIONARY_COLUMNS, batches,
+    )
+
+
+@router.get("/export/summaries")
+async def export_summaries(format: ExportFormat = "ndjson"):
+    """Stream every business summary record in any of the export formats."""
+    _check_format(format)
+    db = await open_async_read_session()
+    batch_size = ROW_BATCH_SIZE if format in ("ndjson", "csv") else COLUMNAR_BATCH_SIZE
+    batches = crud.stream_business_summaries_async(db, batch_size=batch_size)
+    return _export_response(
+        "business_summaries", format, db, models.BusinessSummary.__table__,
+        crud.SUMMARY_EXPORT_COLUMNS, SUMMARY_DICTIONARY_COLUMNS, batches,
+    )
@@ -1,61 +1,72 @@
 # backend/routers/hiring.py
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import date
 
 # CORRECTED: Changed relative 'from ..' imports to absolute imports
 import crud
 import schemas
-from database import get_db
+from database import get_async_read_db
+from pagination import InvalidCursor, NEXT_CURSOR_HEADER
 
 router = APIRouter(
     tags=["Hiring Data & KPIs"]
 )
 
 @router.get("/hirings/", response_model=List[schemas.Hiring])
-def read_filtered_hirings(
+async def read_filtered_hirings(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     business_group: str | None = None,
     function: str | None = None,
     start_date: date | None = None,
     end_date: date | None = None,
-    db: Session = Depends(get_db)
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
-    Retrieve detailed hiring records with optional filters.
+    Retrieve detailed hiring records with optional filters, ordered by (hire_date, id).
+    When another page exists its cursor is returned in the X-Next-Cursor header;
+    pass it back as `cursor` (instead of `skip`) to fetch that page.
     """
-    hirings = crud.get_filtered_hirings(db, skip=skip, limit=limit, business_group=business_group, function=function, start_date=start_date, end_date=end_date)
+    try:
+        hirings = await crud.get_filtered_hirings_async(db, skip=skip, limit=limit, business_group=business_group, function=function, start_date=start_date, end_date=end_date, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    next_cursor = crud.next_hirings_cursor(hirings, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return hirings
 
 @router.get("/filters/business-groups", response_model=List[str])
-def get_business_groups(db: Session = Depends(get_db)):
+async def get_business_groups(db: AsyncSession = Depends(get_async_read_db)):
     """
     Get a unique list of all business groups to populate UI filters.
     """
-    return crud.get_unique_business_groups(db)
+    return await crud.get_unique_business_groups_async(db)
 
 @router.get("/filters/functions", response_model=List[str])
-def get_functions(db: Session = Depends(get_db)):
+async def get_functions(db: AsyncSession = Depends(get_async_read_db)):
     """
     Get a unique list of all functions to populate UI filters.
     """
-    return crud.get_unique_functions(db)
+    return await crud.get_unique_functions_async(db)
 
 @router.get("/kpis/averages/", response_model=schemas.KpiAverages)
-def get_average_kpis(
+async def get_average_kpis(
     business_group: str | None = None,
     function: str | None = None,
     start_date: date | None = None,
     end_date: date | None = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get aggregated KPIs, such as averages for cost and time, and rates for others.
     """
-    aggregates = crud.get_kpi_aggregates(
+    aggregates = await crud.get_kpi_aggregates_async(
         db,
         business_group=business_group,
         function=function,
@@ -1,7 +1,8 @@
 # backend/routers/insights.py
 
-import pandas as pd
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List
 from datetime import date
@@ -9,53 +10,81 @@ from datetime import date
 # CORRECTED: Changed relative 'from ..' imports to absolute imports
 import schemas
 import analysis
+import analysis_store
+import analytics
+import data_version
+import deep_dive_prompt
+import insight_stream
 import llm_utils
-from database import get_db
+import timings
+from database import get_read_db, open_read_session
 
 router = APIRouter(
     prefix="/insights",
     tags=["AI Insights"]
 )
 
-@router.get("inisights/deep-dive/", response_model=schemas.AI_Insight)
-def get_ai_powered_insights(
-    business_group: str | None = None,
-    function: str | None = None,
-    start_date: date | None = None,
-    end_date: date | None = None,
-    db: Session = Depends(get_db)
-):
-    # Steps 1 & 2: Load and filter the data
-    hirings_df = pd.read_sql_table("hirings", db.bind)
-    summaries_df = pd.read_sql_table("business_summaries", db.bind)
-    hirings_df["hire_date"] = pd.to_datetime(hirings_df["hire_date"])
-
-    filtered_hirings = hirings_df.copy()
-    if business_group:
-        filtered_hirings = filtered_hirings[filtered_hirings["business_group"].str.lower() == business_group.lower()]
-    if function:
-        filtered_hirings = filtered_hirings[filtered_hirings["function"].str.lower() == function.lower()]
-    if start_date:
-        filtered_hirings = filtered_hirings[filtered_hirings["hire_date"].dt.date >= start_date]
-    if end_date:
-        filtered_hirings = filtered_hirings[filtered_hirings["hire_date"].dt.date <= end_date]
-    
+def run_deep_analysis(
+    db: Session,
+    business_group: str | None,
+    function: str | None,
+    start_date: date | None,
+    end_date: date | None
+) -> list:
+    """
+    Loads, filters and analyses the data, unless the warm-up already stored the analysis
+    of this slice (analysis_store.py). This is blocking pandas work, so the route runs
+    it in the threadpool and keeps the event loop free for the LLM call.
+    """
+    with timings.phase("data"):
+        stored = analysis_store.get(db, data_version.current(db), business_group, function, start_date, end_date)
+    if stored is not None:
+        return stored
+
+    # Steps 1 & 2: Load and filter the data (through the configured analytics backend)
+    with timings.phase("data"):
+        filtered_hirings, summaries_df = analytics.load_frames(db, business_group, function, start_date, end_date)
+
     # Step 3: Run the local Pandas analysis
-    analysis_results = analysis.generate_deep_insights(filtered_hirings, summaries_df)
+    with timings.phase("analysis"):
+        return analysis_store.normalize(analysis.generate_deep_insights(filtered_hirings, summaries_df))
+
+def _analyse_in_own_session(
+    business_group: str | None,
+    function: str | None,
+    start_date: date | None,
+    end_date: date | None
+) -> list:
+    """run_deep_analysis for work that outlives the request (streamed responses)."""
+    db = open_read_session()
+    try:
+        return run_deep_analysis(db, business_group, function, start_date, end_date)
+    finally:
+        db.close()
+
+def _deep_dive_prompt(analysis_results: list) -> str:
+    """Step 4: Format the analysis into a prompt (within the token budget, see deep_dive_prompt.py)."""
+    with timings.phase("prompt"):
+        return deep_dive_prompt.build(analysis_results)
+
+async def deep_dive_insights(
+    db: Session,
+    business_group: str | None,
+    function: str | None,
+    start_date: date | None,
+    end_date: date | None
+) -> schemas.AI_Insight:
+    """The deep-dive insights for a filter set; shared by this router and /dashboard/bootstrap."""
+    # Steps 1-3 run off the event loop.
+    analysis_results = await run_in_threadpool(run_deep_analysis, db, business_group, function, start_date, end_date)
     
     if not analysis_results:
         return schemas.AI_Insight(insights=[{"title": "No Data Found", "description": "No hiring records match the specified filters."}])
 
-    # Step 4: Format the analysis into a prompt
-    prompt_text = "Here is the data summary:\n\n"
-    for result in analysis_results:
-        prompt_text += f"--- For {result['Business']} - {result['Function']} ---\n"
-        prompt_text += f"KPIs:\n{result['Level_1_KPIs']}\n"
-        prompt_text += f"Operational Data:\n{result['Level_2_Operational']}\n"
-        prompt_text += f"Deeper Signals:\n{result['Level_3_Deep_Insights']}\n\n"
+    prompt_text = _deep_dive_prompt(analysis_results)
 
     # Step 5: Call the LLM
-    llm_output = llm_utils.get_insights_from_llm(prompt_text)
+    llm_output = await llm_utils.get_insights_from_llm_async(prompt_text)
 
     # This block robustly handles the LLM response.
     final_insights_list = []
@@ -69,3 +98,40 @@ def get_ai_powered_insights(
 
     # Step 6: Create the final response object and return it
     return schemas.AI_Insight(insights=final_insights_list)
+
+@router.get("/deep-dive/", response_model=schemas.AI_Insight)
+async def get_ai_powered_insights(
+    business_group: str | None = None,
+    function: str | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    db: Session = Depends(get_read_db)
+):
+    return await deep_dive_insights(db, business_group, function, start_date, end_date)
+
+@router.get("/deep-dive/stream")
+async def stream_ai_powered_insights(
+    request: Request,
+    business_group: str | None = None,
+    function: str | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None
+):
+    """
+    Server-Sent Events version of /deep-dive/: a `card` event for each insight as soon
+    as the model has written it, `heartbeat`s while the data is analysed and the model
+    thinks, then `done`. A client that disconnects cancels the LLM call.
+    """
+    async def cards():
+        analysis_results = await run_in_threadpool(_analyse_in_own_session, business_group, function, start_date, end_date)
+        if not analysis_results:
+            yield {"title": "No Data Found", "description": "No hiring records match the specified filters."}
+            return
+        async for card in llm_utils.stream_insights_from_llm(_deep_dive_prompt(analysis_results)):
+            yield card
+
+    return StreamingResponse(
+        insight_stream.event_stream(request, cards()),
+        media_type="text/event-stream",
+        headers=insight_stream.SSE_HEADERS,
+    )
@@ -0,0 +1,36 @@
+# backend/routers/stats.py
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import cache
+import data_version
+import llm_cache
+import llm_gateway
+from database import get_async_read_db
+
+router = APIRouter(
+    prefix="/stats",
+    tags=["Stats"]
+)
+
+@router.get("/cache")
+async def get_cache_stats(db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Hit/miss counters of this worker's result cache, plus the data version its
+    entries are currently keyed on.
+    """
+    return {
+        **cache.results.stats(),
+        "data_version": await data_version.current_async(db),
+    }
+
+@router.get("/llm-cache")
+def get_llm_cache_stats():
+    """Size of the shared LLM response cache and this worker's hit/miss counters."""
+    return llm_cache.stats()
+
+@router.get("/llm")
+def get_llm_stats():
+    """Call counts, retries, latency percentiles and recent call timings of this worker's LLM gateway."""
+    return llm_gateway.stats()
@@ -1,26 +1,40 @@
 # backend/routers/summary.py
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 # CORRECTED: Using absolute imports instead of relative ones.
 import crud
 import schemas
-from database import get_db
+from database import get_async_read_db
+from pagination import InvalidCursor, NEXT_CURSOR_HEADER
 
 router = APIRouter()
 
 @router.get("/summaries/", response_model=List[schemas.BusinessSummary])
-def read_all_summaries(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def read_all_summaries(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
     """
     Retrieve all high-level business summary records.
+    When another page exists its cursor is returned in the X-Next-Cursor header.
     """
-    summaries = crud.get_all_business_summaries(db, skip=skip, limit=limit)
+    try:
+        summaries = await crud.get_all_business_summaries_async(db, skip=skip, limit=limit, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    next_cursor = crud.next_summaries_cursor(summaries, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return summaries
 
 @router.get("/summaries/{business_group}", response_model=List[schemas.BusinessSummary])
-def read_summary_for_business_group(business_group: str, db: Session = Depends(get_db)):
+async def read_summary_for_business_group(business_group: str, db: AsyncSession = Depends(get_async_read_db)):
     """
     Retrieve all summary records for a specific business group,
     including the 'Overall' and function-specific summaries.
@@ -29,5 +43,5 @@ def read_summary_for_business_group(business_group: str, db: Session = Depends(g
     # Based on your `crud.py` file, the correct function name is `get_summaries_by_business_group`.
     # I am assuming this is a typo in the provided file and using the name from your crud.py.
     # If a different function is intended, please provide the `crud.py` content.
-    summaries = crud.get_summaries_by_business_group(db, business_group=business_group)
+    summaries = await crud.get_summaries_by_business_group_async(db, business_group=business_group)
     return summaries
@@ -44,4 +44,16 @@ class InsightCard(BaseModel):
     description: str
 
 class AI_Insight(BaseModel):
-    insights: List[InsightCard]
\ No newline at end of file
+    insights: List[InsightCard]
+
+class FilterOptions(BaseModel):
+    business_groups: List[str]
+    functions: List[str]
+
+class DashboardBootstrap(BaseModel):
+    kpis: KpiAverages
+    filters: FilterOptions
+    summaries: List[BusinessSummary]
+    # Only filled when include_insights=true; otherwise fetch insights_url after first paint.
+    insights: AI_Insight | None = None
+    insights_url: str
@@ -0,0 +1,67 @@
+# backend/tests/conftest.py
+#
+# The backend modules are imported flat (`import crud`), as the server does, and bind
+# their engines at import time, so the test database has to be chosen before any of
+# them is imported: a fresh SQLite file per test run.
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+from datetime import date
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _BACKEND_DIR)
+
+_DB_DIR = tempfile.mkdtemp(prefix="dashboard-tests-")
+atexit.register(shutil.rmtree, _DB_DIR, ignore_errors=True)
+_DB_PATH = os.path.join(_DB_DIR, "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_PATH}"
+os.environ.setdefault("ANALYTICS_BACKEND", "sql")
+os.environ.setdefault("DATA_VERSION_POLL_SECONDS", "0")
+
+import pytest
+from sqlalchemy import delete
+
+import data_version
+import models
+from database import SessionLocal, engine
+from migrations import run_migrations
+
+run_migrations(engine)
+
+
+@pytest.fixture
+def db():
+    """A session on an empty hirings table (and so an empty rollup)."""
+    session = SessionLocal()
+    session.execute(delete(models.Hiring))
+    session.execute(delete(models.BusinessSummary))
+    session.commit()
+    data_version.forget()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def new_hiring():
+    """Builds a Hiring with sensible values; keyword arguments override them."""
+    def build(**values):
+        defaults = {
+            "business_group": "Tech",
+            "function": "Engineering",
+            "role_title": "Engineer",
+            "hire_date": date(2025, 1, 15),
+            "cost_per_hire": 1000,
+            "time_to_fill": 30,
+            "ijp_adherence": True,
+            "build_buy_ratio": "Build",
+            "diversity_ratio": False,
+            "source": "Referral",
+        }
+        return models.Hiring(**{**defaults, **values})
+    return build
@@ -0,0 +1,116 @@
+# backend/tests/test_analysis_engines.py
+#
+# The loop and vectorized deep-dive engines (analysis.py), and either of them spread
+# over worker processes (analysis_pool.py), must return the same results.
+
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analysis
+import analysis_pool
+import analytics
+
+
+def differences(expected: list, actual: list) -> list:
+    """Where two analysis results differ (floats compared to 1e-9 relative)."""
+    if len(expected) != len(actual):
+        return [f"{len(expected)} groups vs {len(actual)}"]
+    found = []
+    for left, right in zip(expected, actual):
+        group = f"{left['Business']} - {left['Function']}"
+        for key in left:
+            if key == "Metrics":
+                for name, value in left[key].items():
+                    other = right[key].get(name)
+                    if isinstance(value, float) and isinstance(other, float):
+                        same = math.isclose(value, other, rel_tol=1e-9) or (math.isnan(value) and math.isnan(other))
+                    else:
+                        same = value == other
+                    if not same:
+                        found.append(f"{group}: Metrics.{name} {value!r} != {other!r}")
+            elif left[key] != right.get(key):
+                found.append(f"{group}: {key} differs:\n  {left[key]!r}\n  {right.get(key)!r}")
+    return found
+
+
+def _frames(seed: int = 7):
+    """Hirings over a dozen groups of very different sizes, in the loader's compact dtypes."""
+    rng = np.random.default_rng(seed)
+    groups = [(bg, fn) for bg in ("Tech", "Energy", "Retail") for fn in ("Sales", "Engineering", "HR", "Legal")]
+    parts = []
+    for index, (bg, fn) in enumerate(groups):
+        size = [1, 5, 12, 80, 300][index % 5]
+        parts.append(pd.DataFrame({
+            "business_group": bg,
+            "function": fn,
+            "hire_date": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 365, size), unit="D"),
+            "time_to_fill": rng.integers(10, 90, size) + index,
+            "cost_per_hire": rng.integers(500, 5000, size) * (1 + index % 3),
+            "ijp_adherence": rng.random(size) < 0.5,
+            "diversity_ratio": rng.random(size) < 0.3,
+            "build_buy_ratio": rng.choice(["Build", "Buy"], size),
+            "source": rng.choice(["Referral", "Agency", "Campus", "LinkedIn"], size),
+        }))
+    hirings_df = pd.concat(parts, ignore_index=True)
+    # Groups without any known source, and a source whose costs are all unknown.
+    hirings_df.loc[hirings_df["function"] == "Legal", "source"] = None
+    hirings_df["cost_per_hire"] = hirings_df["cost_per_hire"].astype(float)
+    hirings_df.loc[(hirings_df["function"] == "HR") & (hirings_df["source"] == "Agency"), "cost_per_hire"] = np.nan
+    for name in analytics.CATEGORY_COLUMNS:
+        hirings_df[name] = hirings_df[name].astype("category")
+
+    summaries_df = pd.DataFrame(
+        [{"business_group": bg, "function": fn, "gap": 10 * i} for i, (bg, fn) in enumerate(groups[:-2])]
+    )
+    return hirings_df, summaries_df
+
+
+def test_engines_agree():
+    hirings_df, summaries_df = _frames()
+    expected = analysis.deep_insights_loop(hirings_df, summaries_df)
+    assert not [row for row in expected if "Metrics" not in row], "a group failed in the loop engine"
+    assert differences(expected, analysis.deep_insights_vectorized(hirings_df, summaries_df)) == []
+
+
+def test_groups_without_a_known_source():
+    hirings_df, summaries_df = _frames()
+    for engine in (analysis.deep_insights_loop, analysis.deep_insights_vectorized):
+        legal = [row for row in engine(hirings_df, summaries_df) if row["Function"] == "Legal"]
+        assert legal and all(row["Metrics"]["costliest_source"] is None for row in legal)
+        assert all(row["Metrics"]["top_sources"] == [] for row in legal)
+
+
+@pytest.mark.parametrize("dtype", ["object", "category"])
+def test_equally_used_sources(dtype):
+    # Zeta and Alpha are used twice each: the loop's value_counts() lists Zeta first as
+    # an object column (first appearance) and Alpha first as a categorical one.
+    hirings_df = pd.DataFrame({
+        "business_group": "Tech",
+        "function": "Sales",
+        "hire_date": pd.to_datetime(["2025-01-05", "2025-02-05", "2025-03-05", "2025-04-05"]),
+        "time_to_fill": [30, 40, 50, 60],
+        "cost_per_hire": [5000.0, 1000.0, 5000.0, 1000.0],
+        "ijp_adherence": [True, False, True, False],
+        "diversity_ratio": [False, True, False, True],
+        "build_buy_ratio": ["Build", "Buy", "Build", "Buy"],
+        "source": ["Zeta", "Alpha", "Zeta", "Alpha"],
+    }).astype({"source": dtype})
+    summaries_df = pd.DataFrame([{"business_group": "Tech", "function": "Sales", "gap": 3}])
+    expected = analysis.deep_insights_loop(hirings_df, summaries_df)
+    assert differences(expected, analysis.deep_insights_vectorized(hirings_df, summaries_df)) == []
+
+
+@pytest.mark.skipif(not analysis_pool.AVAILABLE, reason="the process pool needs pyarrow")
+def test_pooled_engines_agree(monkeypatch):
+    hirings_df, summaries_df = _frames()
+    monkeypatch.setattr(analysis_pool, "PROCESSES", 2)
+    monkeypatch.setattr(analysis_pool, "MIN_ROWS", 0)
+    try:
+        expected = analysis.deep_insights_loop(hirings_df, summaries_df)
+        for engine in analysis.ENGINES:
+            assert differences(expected, analysis_pool.generate_deep_insights(hirings_df, summaries_df, engine)) == []
+    finally:
+        analysis_pool.shutdown()
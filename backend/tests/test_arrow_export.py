@@ -0,0 +1,60 @@
+# backend/tests/test_arrow_export.py
+#
+# The Arrow IPC and Parquet exports (arrow_export.py) round-trip the rows, and do their
+# encoding off the event loop.
+
+import asyncio
+import io
+import threading
+from datetime import date
+
+import pytest
+
+import arrow_export
+import models
+
+pytestmark = pytest.mark.skipif(not arrow_export.AVAILABLE, reason="the columnar exports need pyarrow")
+
+COLUMNS = ["business_group", "source", "hire_date", "cost_per_hire"]
+BATCHES = [
+    [("Tech", "Referral", date(2025, 1, 5), 1000), ("Media", None, date(2025, 2, 5), None)],
+    [("Tech", "Agency", None, 3000)],
+]
+
+
+def _export(writer):
+    """Runs one export; returns its bytes and the threads that encoded batches."""
+    encoder = arrow_export.BatchEncoder(models.Hiring.__table__, COLUMNS, {"business_group", "source"})
+    encode, threads = encoder.encode, set()
+
+    def recording_encode(rows):
+        threads.add(threading.get_ident())
+        return encode(rows)
+
+    encoder.encode = recording_encode
+
+    async def batches():
+        for batch in BATCHES:
+            yield batch
+
+    async def run():
+        chunks = [chunk async for chunk in writer(encoder, batches())]
+        return b"".join(chunks), threading.get_ident()
+
+    data, loop_thread = asyncio.run(run())
+    assert threads and loop_thread not in threads
+    return data
+
+
+def _rows(table) -> list:
+    return [tuple(row[name] for name in COLUMNS) for row in table.to_pylist()]
+
+
+def test_ipc_stream():
+    table = arrow_export.pa.ipc.open_stream(_export(arrow_export.ipc_stream)).read_all()
+    assert _rows(table) == [row for batch in BATCHES for row in batch]
+
+
+def test_parquet_file():
+    table = arrow_export.pq.read_table(io.BytesIO(_export(arrow_export.parquet_file)))
+    assert _rows(table) == [row for batch in BATCHES for row in batch]
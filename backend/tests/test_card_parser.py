@@ -0,0 +1,46 @@
+# backend/tests/test_card_parser.py
+
+import json
+
+import pytest
+
+from insight_stream import CardParser, cards_of
+
+CARDS = [
+    {"title": "Costs {rising}", "description": 'Agency hires cost "2x" more \\ on average.'},
+    {"title": "Diversity", "description": "Up 4 points, see {detail: none}."},
+]
+
+
+def _feed_in_pieces(text: str, size: int) -> list:
+    parser = CardParser()
+    found = []
+    for start in range(0, len(text), size):
+        found += parser.feed(text[start:start + size])
+    return found
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 1000])
+@pytest.mark.parametrize("answer", [CARDS, {"insights": CARDS}])
+def test_cards_are_found_whatever_the_chunking(answer, size):
+    assert _feed_in_pieces(json.dumps(answer), size) == CARDS
+
+
+def test_each_card_is_reported_when_its_brace_arrives():
+    parser = CardParser()
+    text = json.dumps(CARDS)
+    first_end = len("[" + json.dumps(CARDS[0]))
+    assert parser.feed(text[:first_end]) == [CARDS[0]]
+    assert parser.feed(text[first_end:]) == [CARDS[1]]
+
+
+def test_objects_that_are_not_cards_are_skipped():
+    text = json.dumps({"meta": {"model": "x"}, "insights": [{"title": "only a title"}, CARDS[0]]})
+    assert _feed_in_pieces(text, 3) == [CARDS[0]]
+
+
+def test_cards_of():
+    assert cards_of(CARDS) == CARDS
+    assert cards_of({"insights": CARDS}) == CARDS
+    assert cards_of({"a": [], "b": []}) == []
+    assert cards_of("text") == []
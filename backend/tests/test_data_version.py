@@ -0,0 +1,84 @@
+# backend/tests/test_data_version.py
+#
+# Every write to the dashboard data moves the data version, and the caches keyed on it
+# never serve an answer from before the write.
+
+import os
+import subprocess
+import sys
+
+import cache
+import crud
+import data_version
+import models
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_orm_and_bulk_writes_bump_the_version(db, new_hiring):
+    before = data_version.current(db)
+    db.add(new_hiring())
+    db.commit()
+    after_insert = data_version.current(db)
+    assert after_insert > before
+
+    db.query(models.Hiring).update({"cost_per_hire": 1})
+    db.commit()
+    assert data_version.current(db) > after_insert
+
+
+def test_rolled_back_writes_keep_the_version(db, new_hiring):
+    before = data_version.current(db)
+    db.add(new_hiring())
+    db.flush()
+    db.rollback()
+    assert data_version.current(db) == before
+
+
+def test_cached_results_follow_the_data(db, new_hiring, monkeypatch):
+    # A commit in this process must invalidate at once, not after the next poll.
+    monkeypatch.setattr(data_version, "POLL_SECONDS", 3600)
+    db.add(new_hiring(business_group="Tech"))
+    db.commit()
+    assert crud.get_unique_business_groups(db) == ["Tech"]
+
+    db.add(new_hiring(business_group="Energy"))
+    db.commit()
+    assert sorted(crud.get_unique_business_groups(db)) == ["Energy", "Tech"]
+
+
+def test_stale_answers_are_not_cached(db):
+    calls = []
+
+    @cache.cached
+    def answer(db, flag: str):
+        calls.append(flag)
+        data_version.mark_stale()
+        return flag
+
+    assert answer(db, "x") == "x"
+    assert answer(db, "x") == "x"
+    assert calls == ["x", "x"]
+
+
+def test_writers_that_never_import_main_bump_the_version(db, tmp_path):
+    # seed.py and other scripts only import database and models; a fresh interpreter
+    # shows whether the hooks come with them.
+    script = """
+import sys
+from database import SessionLocal, engine
+from models import Base, Hiring
+from sqlalchemy import text
+Base.metadata.create_all(bind=engine)
+db = SessionLocal()
+db.add(Hiring(business_group="Tech", function="HR"))
+db.commit()
+print(db.execute(text("SELECT version FROM data_versions WHERE name = 'dataset'")).scalar())
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'writer.db'}"},
+        capture_output=True, text=True, check=True,
+    )
+    assert result.stdout.split()[-1] == "1"
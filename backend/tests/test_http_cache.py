@@ -0,0 +1,37 @@
+# backend/tests/test_http_cache.py
+#
+# Which read API responses the conditional GET middleware (http_cache.py) gives an ETag.
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import data_version
+import http_cache
+
+
+async def _ok(request):
+    return JSONResponse({"ok": True})
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(data_version, "known", lambda: 1)
+    app = Starlette(routes=[Route("/api/v1/{path:path}", _ok)])
+    return TestClient(http_cache.ConditionalGetMiddleware(app))
+
+
+@pytest.mark.parametrize("url, tagged", [
+    ("/api/v1/kpis/", True),
+    ("/api/v1/dashboard/bootstrap", True),
+    ("/api/v1/dashboard/bootstrap?include_insights=false", True),
+    ("/api/v1/dashboard/bootstrap?include_insights=true", False),
+    ("/api/v1/dashboard/bootstrap/?business_group=Tech&include_insights=1", False),
+    ("/api/v1/insights/deep-dive/", False),
+])
+def test_responses_embedding_llm_output_get_no_etag(client, url, tagged):
+    response = client.get(url)
+    assert response.status_code == 200
+    assert ("etag" in response.headers) == tagged
@@ -0,0 +1,32 @@
+# backend/tests/test_insight_tokens.py
+#
+# The drilldown insight endpoints reject bad insight tokens with errors about the token,
+# not about pagination cursors.
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from pagination import encode_cursor
+from routers import drilldowns
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(drilldowns.router)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("suffix", ["", "/stream"])
+def test_malformed_token(client, suffix):
+    response = client.get(f"/insights/not-a-token{suffix}")
+    assert response.status_code == 400
+    assert "insight token" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("suffix", ["", "/stream"])
+def test_token_of_an_unknown_kpi(client, suffix):
+    response = client.get(f"/insights/{encode_cursor('headcount', '', '')}{suffix}")
+    assert response.status_code == 404
+    assert "headcount" in response.json()["detail"]
@@ -0,0 +1,64 @@
+# backend/tests/test_pagination.py
+
+import asyncio
+from datetime import date
+
+import pytest
+
+import crud
+from database import AsyncSessionLocal
+from pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(date(2025, 1, 31), 7), date, int) == (date(2025, 1, 31), 7)
+    assert decode_cursor(encode_cursor(None, 7), date | None, int) == (None, 7)
+
+
+@pytest.mark.parametrize("cursor, types", [
+    ("not base64 json", (int,)),
+    (encode_cursor(1, 2), (int,)),
+    (encode_cursor(None, 7), (date, int)),
+    (encode_cursor("yesterday", 7), (date | None, int)),
+])
+def test_malformed_cursors(cursor, types):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, *types)
+
+
+def _keyset_ids(fetch, limit: int) -> list:
+    ids, cursor = [], None
+    while True:
+        page = fetch(limit=limit, cursor=cursor)
+        ids += [hiring.id for hiring in page]
+        cursor = crud.next_hirings_cursor(page, limit)
+        if cursor is None:
+            return ids
+
+
+@pytest.fixture
+def hirings(db, new_hiring):
+    dates = [date(2025, 1, 1 + i % 5) for i in range(20)] + [None] * 7
+    db.add_all([new_hiring(hire_date=hire_date) for hire_date in dates])
+    db.commit()
+
+
+@pytest.mark.parametrize("limit", [1, 4, 7, 27, 100])
+def test_keyset_pages_cover_every_hiring_once(db, hirings, limit):
+    everything = [hiring.id for hiring in crud.get_filtered_hirings(db, limit=1000)]
+    assert len(everything) == 27
+    assert _keyset_ids(lambda **page: crud.get_filtered_hirings(db, **page), limit) == everything
+
+
+def test_keyset_pages_async(db, hirings):
+    async def walk():
+        async with AsyncSessionLocal() as session:
+            ids, cursor = [], None
+            while True:
+                page = await crud.get_filtered_hirings_async(session, limit=4, cursor=cursor)
+                ids += [hiring.id for hiring in page]
+                cursor = crud.next_hirings_cursor(page, 4)
+                if cursor is None:
+                    return ids
+
+    assert asyncio.run(walk()) == [hiring.id for hiring in crud.get_filtered_hirings(db, limit=1000)]
@@ -0,0 +1,118 @@
+# backend/timings.py
+#
+# Per-request breakdown of where the time goes, reported in a Server-Timing header
+# (e.g. `sql;dur=12.1, analysis;dur=85.0, prompt;dur=0.4, llm;dur=912.7, total;dur=1013.2`).
+# Phases are accumulated in a dict held by a context variable, so every piece of work
+# done for a request adds to it: threadpool calls and SQLAlchemy's async greenlets
+# inherit the context, and the dict itself is shared.
+#
+#   sql       time inside cursor.execute, for every engine (engine events below)
+#   data      loading the insight DataFrames (analytics.load_frames)
+#   analysis  the pandas analysis (analysis.generate_deep_insights)
+#   prompt    building LLM prompts
+#   llm       LLM calls through llm_gateway, retries included
+#
+#   SERVER_TIMING_ENABLED=true       adds the header (off by default: it reveals internals)
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() in ("1", "true", "yes")
+
+_phases: ContextVar[dict | None] = ContextVar("timings", default=None)
+
+
+def begin(phases: dict | None = None) -> dict:
+    """Starts collecting phases in the current context and returns the dict they go into."""
+    phases = {} if phases is None else phases
+    _phases.set(phases)
+    return phases
+
+
+def add(name: str, seconds: float):
+    phases = _phases.get()
+    if phases is not None:
+        phases[name] = phases.get(name, 0.0) + seconds
+
+
+def merge(phases: dict):
+    """Adds phases collected elsewhere (e.g. by a background job) to the current context."""
+    for name, seconds in phases.items():
+        add(name, seconds)
+
+
+@contextmanager
+def phase(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(name, time.perf_counter() - started)
+
+
+def header_value(phases: dict, total: float | None = None) -> str:
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in phases.items()]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def parse_header(value: str) -> dict:
+    """Server-Timing header -> {name: milliseconds}; used by the benchmarks."""
+    parsed = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        name, _, params = entry.partition(";")
+        for param in params.split(";"):
+            key, _, number = param.strip().partition("=")
+            if key == "dur":
+                parsed[name.strip()] = parsed.get(name.strip(), 0.0) + float(number)
+    return parsed
+
+
+def _sql_started(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("timings_started", []).append(time.perf_counter())
+
+
+def _sql_finished(conn, cursor, statement, parameters, context, executemany):
+    add("sql", time.perf_counter() - conn.info["timings_started"].pop())
+
+
+def _sql_failed(exception_context):
+    started = exception_context.connection.info.get("timings_started") if exception_context.connection else None
+    if started:
+        add("sql", time.perf_counter() - started.pop())
+
+
+if ENABLED:
+    event.listen(Engine, "before_cursor_execute", _sql_started)
+    event.listen(Engine, "after_cursor_execute", _sql_finished)
+    event.listen(Engine, "handle_error", _sql_failed)
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware that collects the phases of each HTTP request into Server-Timing."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        phases = begin()
+        started = time.perf_counter()
+
+        async def send_with_timings(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["Server-Timing"] = header_value(phases, time.perf_counter() - started)
+            await send(message)
+
+        await self.app(scope, receive, send_with_timings)
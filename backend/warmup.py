@@ -0,0 +1,215 @@
+# backend/warmup.py
+#
+# Precomputes the AI insights of every filter slice, so that no user has to wait for
+# the analysis and the LLM: "all", every business group, every function and every
+# business group x function. For each slice it stores the deep-dive analysis
+# (analysis_store.py) and generates the deep-dive insights and the six per-KPI
+# drilldown insights through the normal code paths, which store them in the persistent
+# LLM cache (llm_cache.py); the request path then only reads both. Because the LLM
+# cache is keyed on the prompt, any request whose data yields the same prompt is
+# served from it.
+#
+# The job runs in the background of every worker and re-runs whenever the data
+# version moves (i.e. after each data load). Two rows of data_versions coordinate the
+# workers: `warmup_lease` holds the Unix time until which one worker owns the job
+# (taken with an atomic UPDATE, renewed after every slice), and `warmup_done` the last
+# data version that was warmed completely. A worker that dies or fails mid-run leaves
+# the version undone, and another one takes over once the lease has expired.
+#
+#   WARMUP_ENABLED=false             never warm up (it is also off without OPENAI_API_KEY)
+#   WARMUP_CONCURRENCY=2             slices warmed at the same time
+#   WARMUP_POLL_SECONDS=60           how often workers check for a new data version
+#   WARMUP_LEASE_SECONDS=600         how long a worker owns the job without renewing it
+#   WARMUP_START_DATE=2025-01-01     date range of the warmed deep-dive insights; keep it
+#   WARMUP_END_DATE=2025-12-31       in line with the dashboard's initial date range
+#
+# Usage: python warmup.py [--force]  -> warms every slice now (--force: even if already
+#                                       done for the current data version)
+
+import asyncio
+import os
+import time
+from datetime import date
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+import analysis_store
+import crud
+import data_version
+import drilldown_crud
+import llm_cache
+import models
+from database import AsyncSessionLocal, READ_ONLY, open_async_read_session, open_read_session
+from routers.drilldowns import KPI_UNITS, insight_prompt, kpi_section, start_insights
+from routers.insights import deep_dive_insights, run_deep_analysis
+
+ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+CONCURRENCY = int(os.getenv("WARMUP_CONCURRENCY", "2"))
+POLL_SECONDS = float(os.getenv("WARMUP_POLL_SECONDS", "60"))
+LEASE_SECONDS = int(os.getenv("WARMUP_LEASE_SECONDS", "600"))
+START_DATE = date.fromisoformat(os.getenv("WARMUP_START_DATE", "2025-01-01"))
+END_DATE = date.fromisoformat(os.getenv("WARMUP_END_DATE", "2025-12-31"))
+
+LEASE = "warmup_lease"
+DONE = "warmup_done"
+
+_V = models.DataVersion
+_done_version = None
+
+
+def is_enabled() -> bool:
+    """Warming up needs the LLM and somewhere writable to keep its results."""
+    return ENABLED and bool(os.getenv("OPENAI_API_KEY")) and llm_cache.ENABLED and not READ_ONLY
+
+
+def slices(filter_options: dict) -> list:
+    """Every (business_group, function) filter combination, None meaning "all"."""
+    business_groups, functions = filter_options["business_groups"], filter_options["functions"]
+    return (
+        [(None, None)]
+        + [(bg, None) for bg in business_groups]
+        + [(None, fn) for fn in functions]
+        + [(bg, fn) for bg in business_groups for fn in functions]
+    )
+
+
+async def _set_row(db, name: str, value: int, only_if=None) -> bool:
+    """Sets a data_versions row, creating it when missing; False if `only_if` kept it as it was."""
+    stmt = update(_V).where(_V.name == name).values(version=value)
+    if only_if is not None:
+        stmt = stmt.where(only_if)
+    if (await db.execute(stmt)).rowcount:
+        return True
+    if await db.get(_V, name) is not None:
+        return False
+    try:
+        await db.execute(insert(_V).values(name=name, version=value))
+    except IntegrityError:
+        await db.rollback()  # created concurrently by another worker
+        return False
+    return True
+
+
+async def _done() -> int:
+    async with AsyncSessionLocal() as db:
+        row = await db.get(_V, DONE)
+        return row.version if row is not None else -1
+
+
+async def _take_lease() -> bool:
+    """Atomically takes the warm-up job for LEASE_SECONDS; False while another worker holds it."""
+    now = int(time.time())
+    async with AsyncSessionLocal() as db:
+        taken = await _set_row(db, LEASE, now + LEASE_SECONDS, only_if=_V.version <= now)
+        await db.commit()
+        return taken
+
+
+async def _renew_lease():
+    async with AsyncSessionLocal() as db:
+        await _set_row(db, LEASE, int(time.time()) + LEASE_SECONDS)
+        await db.commit()
+
+
+async def _finish(version: int | None):
+    """Releases the lease, recording `version` as warmed when the run completed."""
+    async with AsyncSessionLocal() as db:
+        if version is not None:
+            await _set_row(db, DONE, version, only_if=_V.version < version)
+        await _set_row(db, LEASE, 0)
+        await db.commit()
+
+
+async def _warm_slice(version: int, business_group, function, slots: asyncio.Semaphore) -> bool:
+    async with slots:
+        db = await open_async_read_session()
+        try:
+            drilldowns = await drilldown_crud.get_all_kpi_drilldowns_async(db, business_group, function)
+        finally:
+            await db.close()
+        if not drilldowns["total_hires"]:
+            return False
+
+        # Same prompts (and so the same cache entries) as the drilldown endpoints.
+        jobs = []
+        for kpi_name in KPI_UNITS:
+            section = kpi_section(drilldowns, kpi_name, function)
+            jobs.append(start_insights(insight_prompt(section, drilldowns["total_hires"]), section["title"]))
+
+        sync_db = await run_in_threadpool(open_read_session)
+        try:
+            results = await run_in_threadpool(run_deep_analysis, sync_db, business_group, function, START_DATE, END_DATE)
+            await run_in_threadpool(analysis_store.put, version, business_group, function, START_DATE, END_DATE, results)
+            await deep_dive_insights(sync_db, business_group, function, START_DATE, END_DATE)
+        finally:
+            sync_db.close()
+        await asyncio.gather(*jobs)
+        await _renew_lease()
+        return True
+
+
+async def warm_up(force: bool = False) -> int | None:
+    """
+    Warms every slice unless this data version is already warmed or another worker is
+    warming it. Returns the number of slices with data that were warmed, or None when
+    there was nothing to do.
+    """
+    global _done_version
+    db = await open_async_read_session()
+    try:
+        version = await data_version.current_async(db)
+        if version == _done_version and not force:
+            return None
+        filter_options = await crud.get_filter_options_async(db)
+    finally:
+        await db.close()
+
+    if not force:
+        if await _done() >= version:
+            _done_version = version
+            return None
+        if not await _take_lease():
+            return None
+
+    started = time.monotonic()
+    slots = asyncio.Semaphore(CONCURRENCY)
+    try:
+        warmed = await asyncio.gather(*[_warm_slice(version, bg, fn, slots) for bg, fn in slices(filter_options)])
+    except BaseException:
+        await _finish(None)
+        raise
+    await _finish(version)
+    _done_version = version
+    print(f"✅ Warmed insights of {sum(warmed)} slices for data version {version} in {time.monotonic() - started:.1f}s.")
+    return sum(warmed)
+
+
+async def run_forever():
+    """The background job: warms up now and again after every data version change."""
+    while True:
+        try:
+            await warm_up()
+        except Exception as e:
+            print(f"⚠️ Insight warm-up failed: {e}")
+        await asyncio.sleep(POLL_SECONDS)
+
+
+def start_background() -> asyncio.Task | None:
+    """Starts run_forever() on the running event loop when warming up is enabled."""
+    if not is_enabled():
+        return None
+    return asyncio.get_running_loop().create_task(run_forever())
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Precompute the AI insights of every filter slice.")
+    parser.add_argument("--force", action="store_true", help="warm up even if this data version already was")
+    args = parser.parse_args()
+    if not is_enabled():
+        print("Warm-up is disabled (WARMUP_ENABLED, OPENAI_API_KEY, LLM_CACHE_ENABLED or a read-only database).")
+    else:
+        asyncio.run(warm_up(force=args.force))
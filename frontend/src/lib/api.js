@@ -17,6 +17,33 @@ function buildQueryParams(params) {
   return query.toString();
 }
 
+// Browsers revalidate cached GETs with the API's ETags on their own. The SvelteKit
+// server has no HTTP cache, so during SSR we keep the last few bodies here and send
+// If-None-Match ourselves; an unchanged payload then comes back as an empty 304.
+const SSR_CACHE_SIZE = 200;
+const ssrCache = new Map();
+
+async function fetchWithEtag(url, fetch) {
+  if (!import.meta.env.SSR) {
+    return fetch(url);
+  }
+  const cached = ssrCache.get(url);
+  const response = await fetch(url, cached ? { headers: { 'If-None-Match': cached.etag } } : undefined);
+  if (response.status === 304 && cached) {
+    return new Response(cached.body, { status: 200, headers: { 'Content-Type': 'application/json' } });
+  }
+  const etag = response.headers.get('ETag');
+  if (response.ok && etag) {
+    const body = await response.clone().text();
+    ssrCache.delete(url);
+    ssrCache.set(url, { etag, body });
+    if (ssrCache.size > SSR_CACHE_SIZE) {
+      ssrCache.delete(ssrCache.keys().next().value);
+    }
+  }
+  return response;
+}
+
 /**
  * MODIFIED: Now accepts `fetch` as an argument.
  * This allows the function to use the special, server-aware `fetch` from SvelteKit's `load` function.
@@ -37,6 +64,43 @@ export async function getDashboardData(filters, fetch) {
   };
 }
 
+/**
+ * Fetches everything the first paint needs (KPIs, filter options, headcount summaries)
+ * in a single request. The slow AI insights are not included: `insightData` is null and
+ * the page fetches them once it is up (see `getInsightData`).
+ */
+export async function getDashboardBootstrap(filters, fetch) {
+  const queryString = buildQueryParams(filters);
+  const response = await fetchWithEtag(`${API_BASE_URL}/dashboard/bootstrap?${queryString}`, fetch);
+  if (!response.ok) {
+    throw new Error('Failed to fetch dashboard data from API.');
+  }
+  const body = await response.json();
+  return {
+    dashboardData: {
+      kpiData: body.kpis,
+      insightData: body.insights,
+    },
+    filterOptions: {
+      businessGroups: body.filters.business_groups,
+      functions: body.filters.functions,
+    },
+    headcountData: body.summaries,
+  };
+}
+
+/**
+ * Fetches only the AI insights for a filter set.
+ */
+export async function getInsightData(filters, fetch) {
+  const queryString = buildQueryParams(filters);
+  const response = await fetchWithEtag(`${API_BASE_URL}/insights/deep-dive/?${queryString}`, fetch);
+  if (!response.ok) {
+    throw new Error('Failed to fetch insights from API.');
+  }
+  return response.json();
+}
+
 /**
  * MODIFIED: Now accepts `fetch` as an argument.
  */
@@ -46,13 +110,72 @@ export async function getDrilldownData(kpiKey, filters, fetch) {
     function: filters.function,
   };
   const queryString = buildQueryParams(drilldownFilters);
-  const response = await fetch(`${API_BASE_URL}/kpis/drilldown/${kpiKey}?${queryString}`);
+  const response = await fetchWithEtag(`${API_BASE_URL}/kpis/drilldown/${kpiKey}?${queryString}`, fetch);
   if (!response.ok) {
     throw new Error(`Failed to fetch drilldown data for ${kpiKey} from API.`);
   }
   return response.json();
 }
 
+/**
+ * Collects the AI insights of a drilldown from its `insight_token`. The server holds
+ * each request open for a few seconds and answers 202 while the insights are still
+ * being generated, so this simply asks again until they are ready.
+ */
+export async function getDrilldownInsights(insightToken, fetch, { attempts = 10, waitSeconds = 8 } = {}) {
+  for (let attempt = 0; attempt < attempts; attempt++) {
+    const response = await fetch(`${API_BASE_URL}/kpis/drilldown/insights/${insightToken}?wait=${waitSeconds}`);
+    if (response.status === 202) {
+      continue;
+    }
+    if (!response.ok) {
+      throw new Error('Failed to fetch drilldown insights from API.');
+    }
+    return (await response.json()).ai_insights;
+  }
+  throw new Error('Timed out waiting for drilldown insights.');
+}
+
+/**
+ * Streams the AI insights of a drilldown over Server-Sent Events, calling `onCard`
+ * with each card as soon as the model has written it. Resolves with all the cards.
+ * Falls back to getDrilldownInsights() where EventSource is unavailable or the
+ * stream breaks before the first card.
+ */
+export function streamDrilldownInsights(insightToken, onCard, fetch) {
+  if (typeof EventSource === 'undefined') {
+    return getDrilldownInsights(insightToken, fetch).then((aiInsights) => {
+      aiInsights.insights.forEach(onCard);
+      return aiInsights.insights;
+    });
+  }
+  return new Promise((resolve, reject) => {
+    const cards = [];
+    const source = new EventSource(`${API_BASE_URL}/kpis/drilldown/insights/${insightToken}/stream`);
+    source.addEventListener('card', (event) => {
+      const card = JSON.parse(event.data);
+      cards.push(card);
+      onCard(card);
+    });
+    source.addEventListener('done', () => {
+      source.close();
+      resolve(cards);
+    });
+    // `error` is both the server's error event and EventSource's own connection error.
+    source.addEventListener('error', () => {
+      source.close();
+      if (cards.length > 0) {
+        resolve(cards);
+        return;
+      }
+      getDrilldownInsights(insightToken, fetch).then((aiInsights) => {
+        aiInsights.insights.forEach(onCard);
+        resolve(aiInsights.insights);
+      }, reject);
+    });
+  });
+}
+
 /**
  * MODIFIED: Now accepts `fetch` as an argument.
  */
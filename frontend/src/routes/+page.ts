@@ -1,7 +1,7 @@
 // src/routes/+page.ts
 
 // We import the API functions and a SvelteKit helper for creating errors.
-import { getDashboardData, getFilterOptions, getHeadcountData } from '$lib/api.js';
+import { getDashboardBootstrap } from '$lib/api.js';
 import { error } from '@sveltejs/kit';
 
 /**
@@ -16,13 +16,10 @@ export async function load({ fetch }) {
       end_date: '2025-12-31',
     };
     
-    // We call all our API functions in parallel, passing the special `fetch` to each one.
-    // This is the key change that makes it work on Vercel.
-    const [dashboardData, filterOptions, headcountData] = await Promise.all([
-      getDashboardData(initialFilters, fetch),
-      getFilterOptions(fetch),
-      getHeadcountData(fetch)
-    ]);
+    // One bootstrap request returns the KPIs, filter options and headcount data,
+    // passing the special `fetch` so it works on Vercel. The slow AI insights are
+    // left out here and loaded by the page in the browser after first paint.
+    const { dashboardData, filterOptions, headcountData } = await getDashboardBootstrap(initialFilters, fetch);
 
     // We return all the data we fetched.
     return {